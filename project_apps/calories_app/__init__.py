@@ -1,7 +1,8 @@
+import os
 from flask import Flask, render_template
 from flask_login import LoginManager
 from .models import User
-from .database import get_mongo_connection, get_user_specific_collection
+from .database import init_mongo, ensure_indexes, get_user_specific_collection
 from bson import ObjectId
 from .auth_routes import auth_bp
 from .calorie_routes import calorie_bp
@@ -16,8 +17,27 @@ app.secret_key = 'plius+-minus4816237mousymouse####'
 login_manager = LoginManager(app)
 login_manager.login_view = 'auth_bp.login' 
 
+# MongoDB client settings; every blueprint and helper shares the one pool created from them
+app.config.update(
+    MONGO_URI=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'),
+    MONGO_DB_NAME=os.environ.get('MONGO_DB_NAME', 'calories_database'),
+    MONGO_MAX_POOL_SIZE=int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)),
+    MONGO_MIN_POOL_SIZE=int(os.environ.get('MONGO_MIN_POOL_SIZE', 0)),
+    MONGO_MAX_IDLE_TIME_MS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000)),
+    MONGO_WAIT_QUEUE_TIMEOUT_MS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+    MONGO_SERVER_SELECTION_TIMEOUT_MS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    MONGO_CONNECT_TIMEOUT_MS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+    MONGO_SOCKET_TIMEOUT_MS=int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 10000)),
+)
+
 # Initialize MongoDB connection
-client, db, _, _ = get_mongo_connection()
+client, db = init_mongo(app)
+
+# Indexes are ensured on the first request of each process rather than at import,
+# so a pre-forking server does not connect before it forks its workers
+@app.before_request
+def ensure_database_indexes():
+    ensure_indexes(db)
 
 @app.route('/')
 def index():
@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from .models import User
-from .database import get_mongo_connection, find_user_by_email, find_user_by_username, add_user
+from .database import get_db, find_user_by_email, find_user_by_username, add_user
 from bson import ObjectId
 
 auth_bp = Blueprint('auth_bp', __name__)
@@ -12,8 +12,7 @@ def login():
     if request.method == 'POST':
         login_id = request.form['login_id']
         password = request.form['password']
-        _, db, _, _ = get_mongo_connection()
-        users_collection = db['users']
+        users_collection = get_db()['users']
 
         if "@" in login_id:
             user_document = find_user_by_email(users_collection, login_id)
@@ -42,8 +41,7 @@ def signup():
             flash('Passwords do not match. Please try again.', 'error')
             return redirect(url_for('auth_bp.signup'))
 
-        _, db, _, _ = get_mongo_connection()
-        users_collection = db['users']
+        users_collection = get_db()['users']
 
         user_added = add_user(users_collection, email, username, password1)
         if user_added:
@@ -59,7 +57,7 @@ def signup():
 @login_required
 def user_settings():
     if request.method == 'POST':
-        _, _, _, users_collection = get_mongo_connection()
+        users_collection = get_db()['users']
         action = request.form.get('action')
 
         if action == 'change_email':
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, Response
 from flask_login import login_required, current_user
-from .database import get_mongo_connection, get_user_calories_collection, get_user_calorie_items_collection
+from .database import get_user_calories_collection, get_user_calorie_items_collection
 from datetime import datetime
 from io import StringIO
 import csv, math
@@ -9,10 +9,6 @@ from bson import ObjectId
 # Blueprint for calorie tracking routes
 calorie_item_bp = Blueprint('calorie_item_bp', __name__)
 
-# MongoDB setup
-client, db, _, _ = get_mongo_connection()
-
-
 @calorie_item_bp.route('/add_calorie_item', methods=['GET', 'POST'])
 @login_required
 def add_calorie_item():
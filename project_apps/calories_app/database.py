@@ -1,15 +1,94 @@
+import re
+import threading
+from flask import current_app
 from pymongo import MongoClient, ASCENDING
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from werkzeug.security import generate_password_hash
 
+# One MongoClient (and connection pool) per URI and option set, shared by the whole process
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_mongo_client(uri='mongodb://localhost:27017/', **options):
+    key = (uri, tuple(sorted(options.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # connect=False defers the monitor threads to the first operation, so a
+            # pre-forking server does not copy them into its workers
+            client = MongoClient(uri, connect=False, **options)
+            _clients[key] = client
+        return client
+
+def init_mongo(app):
+    config = app.config
+    client = get_mongo_client(
+        config['MONGO_URI'],
+        maxPoolSize=config['MONGO_MAX_POOL_SIZE'],
+        minPoolSize=config['MONGO_MIN_POOL_SIZE'],
+        maxIdleTimeMS=config['MONGO_MAX_IDLE_TIME_MS'],
+        waitQueueTimeoutMS=config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+        serverSelectionTimeoutMS=config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        connectTimeoutMS=config['MONGO_CONNECT_TIMEOUT_MS'],
+        socketTimeoutMS=config['MONGO_SOCKET_TIMEOUT_MS'],
+    )
+    db = client[config['MONGO_DB_NAME']]
+    app.extensions['mongo'] = {'client': client, 'db': db}
+    return client, db
+
+# Collections (by full name) whose unique date index was created by this process
+_ensured_indexes = set()
+_ensured_lock = threading.Lock()
+
+# Collections holding one entry per date
+DATE_INDEXED_COLLECTIONS = ('daily_calories', 'user_calories')
+USER_CALORIES_PATTERN = re.compile(r'^daily_calories\.user_.+_calories$')
+
+def ensure_date_index(collection):
+    if collection.full_name in _ensured_indexes:
+        return collection
+    with _ensured_lock:
+        if collection.full_name not in _ensured_indexes:
+            collection.create_index([('date', ASCENDING)], unique=True)
+            _ensured_indexes.add(collection.full_name)
+    return collection
+
+# Set once ensure_indexes has run in this process
+_indexes_bootstrapped = False
+
+# Create the indexes of every existing collection once per process, so later
+# requests only check the registry. A failure (e.g. the server is down) is
+# reported and the indexes are then created on first use of each collection.
+def ensure_indexes(db):
+    global _indexes_bootstrapped
+    with _ensured_lock:
+        if _indexes_bootstrapped:
+            return
+        _indexes_bootstrapped = True
+    try:
+        for collection_name in DATE_INDEXED_COLLECTIONS:
+            ensure_date_index(db[collection_name])
+        for collection_name in db.list_collection_names():
+            if USER_CALORIES_PATTERN.match(collection_name):
+                ensure_date_index(db[collection_name])
+    except PyMongoError as e:
+        print(f"Could not create indexes at startup: {e}")
+
+# Indexes for a newly created user's collections
+def ensure_user_indexes(db, user_id):
+    ensure_date_index(db['daily_calories'][f'user_{user_id}_calories'])
+
+# Database of the running app, for request handlers and helpers
+def get_db():
+    return current_app.extensions['mongo']['db']
+
 # MongoDB Connection Function
-def get_mongo_connection(database_name='calories_database', collection_name='daily_calories'):
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client[database_name]
+def get_mongo_connection(database_name=None, collection_name='daily_calories'):
+    client = current_app.extensions['mongo']['client']
+    db = client[database_name] if database_name else get_db()
 
     if collection_name == 'daily_calories':
-        collection = db[collection_name]
-        collection.create_index([('date', ASCENDING)], unique=True)
+        collection = ensure_date_index(db[collection_name])
         users_collection = db['users']
         return client, db, collection, users_collection
     elif collection_name == 'users':
@@ -22,21 +101,20 @@ def get_mongo_connection(database_name='calories_database', collection_name='dai
 
 def get_collection(database, collection_name):
     collection = database[collection_name]
-    if collection_name in ['daily_calories', 'user_calories']:
-        collection.create_index([('date', ASCENDING)], unique=True)
+    if collection_name in DATE_INDEXED_COLLECTIONS:
+        ensure_date_index(collection)
     return collection
 
+# These helpers have always named their collections under daily_calories
+# (daily_calories.user_<id>_...), where existing calorie items are stored
 def get_user_calories_collection(user_id):
-    _, _, db, _ = get_mongo_connection()
     calories_collection_name = f'user_{user_id}_calories'
-    collection = db[calories_collection_name]
-    collection.create_index([('date', ASCENDING)], unique=True)
-    return collection
+    collection = get_db()['daily_calories'][calories_collection_name]
+    return ensure_date_index(collection)
 
 def get_user_calorie_items_collection(user_id):
-    _, _, db, _ = get_mongo_connection()
     calorie_items_collection_name = f'user_{user_id}_calorie_items'
-    collection = db[calorie_items_collection_name]
+    collection = get_db()['daily_calories'][calorie_items_collection_name]
     return collection
 
 def get_user_specific_collection(db, user_id, collection_type):
@@ -53,11 +131,17 @@ def add_user(users_collection, email, username, password):
     try:
         hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
         user_data = {'email': email, 'username': username, 'password': hashed_password}
-        users_collection.insert_one(user_data)
-        return True
+        result = users_collection.insert_one(user_data)
     except DuplicateKeyError:
         return False
 
+    try:
+        ensure_user_indexes(users_collection.database, result.inserted_id)
+    except PyMongoError as e:
+        # The user exists; the index is created on first use of the collection instead
+        print(f"Could not create indexes for new user: {e}")
+    return True
+
 # Function to find a user by email or username
 def find_user_by_email(users_collection, email):
     return users_collection.find_one({'email': email})
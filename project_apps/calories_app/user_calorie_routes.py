@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, Response
 from flask_login import login_required, current_user
-from .database import get_mongo_connection, get_user_calories_collection
+from .database import get_db, get_user_calories_collection
 from .utils import get_start_of_month, get_end_of_month, calculate_average_calories
 from datetime import datetime
 from io import StringIO
@@ -14,18 +14,12 @@ from pymongo import ASCENDING
 # Blueprint for calorie tracking routes
 user_calorie_bp = Blueprint('user_calorie_bp', __name__)
 
-# MongoDB setup
-client, db, _, _ = get_mongo_connection()
-
-
 @user_calorie_bp.route('/add_calories', methods=['GET', 'POST'])
 @login_required
 def add_calories():
     current_date = datetime.now()
 
     if request.method == 'POST':
-        _, _, _, users_collection = get_mongo_connection()
-
         calories_str = request.form['calories']
         date_str = request.form['date']
 
@@ -74,7 +68,6 @@ def add_calories():
 @user_calorie_bp.route('/list_calories')
 @login_required
 def list_calories():
-    _, _, _, _ = get_mongo_connection()
     option = request.args.get('option', 'current_month')
     page = request.args.get('page', 1, type=int)
     per_page = 15  # Number of records per page
@@ -223,13 +216,12 @@ def delete_user():
                 # Log out the user before deleting their account
                 logout_user()
 
-                _, _, users_collection = get_mongo_connection(collection_name='users')
+                users_collection = get_db()['users']
                 users_collection.delete_one({'_id': ObjectId(user_id)})
 
                 # Check if calories_collection exists before trying to access it
                 if hasattr(current_user, 'calories_collection'):
                     # Delete the user's calories collection
-                    _, _, _, user_calories_collection = get_mongo_connection()
                     user_calories_collection = current_user.calories_collection
                     user_calories_collection.drop()
 
@@ -0,0 +1,11 @@
+"""Entry point for `python -m tip_tracker`, the headless command line interface."""
+
+import os
+import sys
+
+# Modules import each other from the tip_tracker directory, as when running main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
\ No newline at end of file
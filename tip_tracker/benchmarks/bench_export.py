@@ -0,0 +1,95 @@
+"""Benchmark the streaming exporter against the old pandas-based export_to_csv."""
+
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pandas as pd
+from database.tip_operations import TipOperations
+from benchmarks.common import get_bench_components, seed_tips, measure, print_result
+
+
+def legacy_export_to_csv(tip_operations, filename, start_date=None, end_date=None, include_zero_days=True):
+    """Previous export_to_csv: tip list, zero-filled row list and DataFrame in memory."""
+    tips = tip_operations.get_tips(start_date, end_date)
+    if not tips:
+        return False
+
+    if not include_zero_days:
+        pd.DataFrame(tips).to_csv(filename, index=False)
+        return True
+
+    if not start_date:
+        start_date = min(tips, key=lambda x: x['date'])['date']
+    if not end_date:
+        end_date = max(tips, key=lambda x: x['date'])['date']
+
+    date_range = []
+    current_date = datetime.combine(start_date.date(), datetime.min.time())
+    end_date_normalized = datetime.combine(end_date.date(), datetime.min.time())
+    while current_date <= end_date_normalized:
+        date_range.append(current_date)
+        current_date = current_date + timedelta(days=1)
+
+    default_currency = tip_operations.currency_converter.get_base_currency()
+
+    tips_by_date = {}
+    for tip in tips:
+        tips_by_date.setdefault(tip['date'].strftime('%Y-%m-%d'), []).append(tip)
+
+    comprehensive_data = []
+    for date in date_range:
+        date_key = date.strftime('%Y-%m-%d')
+        if date_key not in tips_by_date:
+            comprehensive_data.append({
+                'date': date,
+                'amount': 0.0,
+                'currency': default_currency,
+                'notes': 'Auto-generated zero entry',
+                'base_amount': 0.0,
+                'location': ''
+            })
+        else:
+            comprehensive_data.extend(tips_by_date[date_key])
+
+    pd.DataFrame(comprehensive_data).to_csv(filename, index=False)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tips", type=int, default=100000, help="number of synthetic tips")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the existing benchmark data")
+    parser.add_argument("--parquet", action="store_true", help="also time Parquet output (needs pyarrow)")
+    args = parser.parse_args()
+
+    db_manager, currency_converter = get_bench_components()
+    tip_operations = TipOperations(db_manager, currency_converter)
+
+    if not args.no_seed:
+        seed_tips(db_manager, args.tips)
+
+    out_dir = tempfile.mkdtemp(prefix="tip_export_bench_")
+    csv_path = os.path.join(out_dir, "tips.csv")
+    parquet_path = os.path.join(out_dir, "tips.parquet")
+
+    for include_zero_days in (False, True):
+        print(f"export, include_zero_days={include_zero_days}")
+        print_result("pandas (legacy)", measure(
+            lambda: legacy_export_to_csv(tip_operations, csv_path, include_zero_days=include_zero_days),
+            args.repeat))
+        print_result("streaming csv", measure(
+            lambda: tip_operations.export_tips(csv_path, include_zero_days=include_zero_days),
+            args.repeat))
+        if args.parquet:
+            print_result("streaming parquet", measure(
+                lambda: tip_operations.export_tips(parquet_path, include_zero_days=include_zero_days,
+                                                   file_format="parquet"),
+                args.repeat))
+
+    db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
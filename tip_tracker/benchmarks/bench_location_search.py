@@ -0,0 +1,39 @@
+"""Benchmark location filtering: unanchored regex on location vs prefix match on location_key."""
+
+import argparse
+import re
+import pymongo
+from benchmarks.common import get_bench_components, seed_tips, measure, print_result, explain_find
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tips", type=int, default=100000, help="number of synthetic tips")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the existing benchmark data")
+    parser.add_argument("--location", default="Air", help="location filter text")
+    args = parser.parse_args()
+
+    db_manager, _ = get_bench_components()
+    tips_collection = db_manager.get_tips_collection()
+
+    if not args.no_seed:
+        seed_tips(db_manager, args.tips)
+
+    queries = {
+        "unanchored $regex (legacy)": {"location": {"$regex": args.location, "$options": "i"}},
+        "prefix on location_key": {"location_key": {"$regex": "^" + re.escape(args.location.lower())}}
+    }
+    sort = [("date", pymongo.DESCENDING)]
+
+    for name, query in queries.items():
+        print_result(name, measure(lambda: list(tips_collection.find(query).sort(sort)), args.repeat))
+        plan = explain_find(tips_collection, query, sort)
+        print(f"    examined {plan['docs_examined']} docs / {plan['keys_examined']} keys, "
+              f"returned {plan['docs_returned']}, plan {plan['plan']}")
+
+    db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
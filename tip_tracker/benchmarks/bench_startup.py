@@ -0,0 +1,117 @@
+"""Measure cold-start import time with `python -X importtime`.
+
+Each module is imported in a fresh interpreter, so the numbers include
+everything it pulls in. `main` is what runs before the first frame is
+drawn; the tab modules are imported later, when their tab is first
+selected. Save a run with --json and compare later runs with --baseline:
+
+    python -m benchmarks.bench_startup --json startup.json
+    python -m benchmarks.bench_startup --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules timed by default: startup path first, then the lazily built tabs
+DEFAULT_MODULES = (
+    "main",
+    "cli",
+    "gui.add_tip_tab",
+    "gui.view_tips_tab",
+    "gui.statistics_tab",
+    "gui.settings_tab",
+    "database.storage",
+    "utils.currency"
+)
+
+TIP_TRACKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    Import a module in a new interpreter and parse its -X importtime report.
+
+    Returns:
+        list: (self_us, cumulative_us, depth, name) for every imported module, in report order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=TIP_TRACKER_DIR, capture_output=True, text=True, check=True
+    )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # Column header
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def measure_module(module, repeat):
+    """
+    Time a module's import over several fresh interpreters.
+
+    Returns:
+        dict: best and mean cumulative import time in microseconds, and the
+        entries of the fastest run
+    """
+    runs = []
+    for _ in range(repeat):
+        entries = import_times(module)
+        end = max(i for i, (_, _, depth, name) in enumerate(entries) if depth == 0 and name == module)
+        # The module's own imports follow the interpreter startup (site) ones
+        start = max((i + 1 for i, entry in enumerate(entries[:end]) if entry[2] == 0), default=0)
+        runs.append((entries[end][1], entries[start:end + 1]))
+
+    totals = [total for total, _ in runs]
+    best_total, best_entries = min(runs, key=lambda run: run[0])
+    return {"best_us": best_total, "mean_us": sum(totals) / len(totals), "entries": best_entries}
+
+
+def heaviest(entries, count):
+    """Return the `count` modules with the largest self time."""
+    return sorted(entries, key=lambda entry: entry[0], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports listed per module")
+    parser.add_argument("--json", help="write the best times to this file")
+    parser.add_argument("--baseline", help="compare against times written earlier with --json")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    for module in args.modules:
+        result = measure_module(module, args.repeat)
+        results[module] = result["best_us"]
+
+        line = f"{module:<32} best {result['best_us'] / 1000:9.1f} ms  mean {result['mean_us'] / 1000:9.1f} ms"
+        if module in baseline:
+            change = (result["best_us"] - baseline[module]) / 1000
+            line += f"  ({change:+.1f} ms vs baseline)"
+        print(line)
+
+        for self_us, cumulative_us, _, name in heaviest(result["entries"], args.top):
+            print(f"    {name:<40} self {self_us / 1000:7.1f} ms  cumulative {cumulative_us / 1000:7.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Compare insert and query throughput of the MongoDB and SQLite storage backends."""
+
+import argparse
+import os
+import time
+from itertools import islice
+from database.sqlite_storage import SQLiteDatabaseManager
+from benchmarks.common import (
+    BenchCurrencyConverter, get_bench_components, generate_tips, measure, print_result
+)
+
+BENCH_SQLITE_PATH = "tip_tracker_bench.db"
+
+
+def open_backend(name):
+    """Create an empty benchmark database and its tip operations for a backend."""
+    if name == "sqlite":
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(BENCH_SQLITE_PATH + suffix):
+                os.remove(BENCH_SQLITE_PATH + suffix)
+        db_manager = SQLiteDatabaseManager(BENCH_SQLITE_PATH)
+        currency_converter = BenchCurrencyConverter(db_manager, base_currency="USD")
+    else:
+        db_manager, currency_converter = get_bench_components()
+        db_manager.get_tips_collection().delete_many({})
+        db_manager.get_rollups_collection().delete_many({})
+    return db_manager, db_manager.create_tip_operations(currency_converter)
+
+
+def bench_inserts(tip_operations, tips, batch_size, single):
+    """Time bulk inserts of all tips and single add_tip calls; return tips per second."""
+    started = time.perf_counter()
+    tips = iter(tips)
+    while True:
+        batch = list(islice(tips, batch_size))
+        if not batch:
+            break
+        tip_operations.insert_tips(batch)
+    bulk_rate = tip_operations.count_tips() / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for tip in generate_tips(single, seed=7):
+        tip_operations.add_tip(tip["amount"], tip["currency"], tip["date"], tip["notes"], tip["location"])
+    single_rate = single / (time.perf_counter() - started)
+    return bulk_rate, single_rate
+
+
+def run_backend(name, args):
+    """Run the insert and query benchmarks for one backend."""
+    db_manager, tip_operations = open_backend(name)
+    print(f"\n== {name} ==")
+
+    bulk_rate, single_rate = bench_inserts(tip_operations, generate_tips(args.tips), args.batch_size, args.single)
+    print(f"insert_tips                      {bulk_rate:12.0f} tips/s")
+    print(f"add_tip                          {single_rate:12.0f} tips/s")
+
+    first_page = tip_operations.get_tips_page(args.page_size)
+    queries = {
+        "count_tips": tip_operations.count_tips,
+        "get_tips_page (first)": lambda: tip_operations.get_tips_page(args.page_size),
+        "get_tips_page (next)": lambda: tip_operations.get_tips_page(
+            args.page_size, after=(first_page[-1]["date"], first_page[-1]["_id"])),
+        "get_tips_page (last)": lambda: tip_operations.get_tips_page(args.page_size, last=True),
+        "get_tips_page (location)": lambda: tip_operations.get_tips_page(args.page_size, location="air"),
+        "get_tips (currency)": lambda: tip_operations.get_tips(currency="EUR"),
+        "get_summary_stats": tip_operations.get_summary_stats,
+        "get_trend (month)": tip_operations.get_trend
+    }
+    for query_name, query in queries.items():
+        print_result(query_name, measure(query, args.repeat))
+
+    db_manager.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tips", type=int, default=100000, help="number of synthetic tips")
+    parser.add_argument("--single", type=int, default=1000, help="number of add_tip calls")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", choices=["mongodb", "sqlite"], action="append",
+                        help="backend to run (default: both)")
+    args = parser.parse_args()
+
+    for name in args.backend or ["mongodb", "sqlite"]:
+        run_backend(name, args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
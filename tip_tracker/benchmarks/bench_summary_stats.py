@@ -0,0 +1,64 @@
+"""Benchmark aggregation-based get_summary_stats against the old Python loop."""
+
+import argparse
+from database.tip_operations import TipOperations
+from benchmarks.common import get_bench_components, seed_tips, measure, print_result
+
+
+def legacy_summary_stats(tip_operations, start_date=None, end_date=None):
+    """Previous get_summary_stats: load every tip and total in Python."""
+    tips = tip_operations.get_tips(start_date, end_date)
+
+    if not tips:
+        return None
+
+    currency_totals = {}
+    for tip in tips:
+        curr = tip['currency']
+        if curr not in currency_totals:
+            currency_totals[curr] = 0
+        currency_totals[curr] += tip['amount']
+
+    total_base = sum(tip['base_amount'] for tip in tips if 'base_amount' in tip)
+
+    usd_equivalents = {}
+    for curr, amount in currency_totals.items():
+        usd_equivalents[curr] = tip_operations.currency_converter.convert(amount, curr, "USD")
+
+    return {
+        "total_tips": len(tips),
+        "currency_totals": currency_totals,
+        "total_base_currency": total_base,
+        "base_currency": tip_operations.currency_converter.get_base_currency(),
+        "usd_equivalents": usd_equivalents
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tips", type=int, default=100000, help="number of synthetic tips")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the existing benchmark data")
+    args = parser.parse_args()
+
+    db_manager, currency_converter = get_bench_components()
+    tip_operations = TipOperations(db_manager, currency_converter)
+
+    if not args.no_seed:
+        seed_tips(db_manager, args.tips)
+
+    # Both paths must agree before their timings mean anything
+    legacy = legacy_summary_stats(tip_operations)
+    current = tip_operations.get_summary_stats()
+    assert legacy["total_tips"] == current["total_tips"]
+    assert abs(legacy["total_base_currency"] - current["total_base_currency"]) < 1e-6 * max(1, legacy["total_base_currency"])
+
+    print(f"get_summary_stats over {current['total_tips']} tips")
+    print_result("python loop (legacy)", measure(lambda: legacy_summary_stats(tip_operations), args.repeat))
+    print_result("$group pipeline", measure(tip_operations.get_summary_stats, args.repeat))
+
+    db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Measure TipOperations as the tips collection grows.
+
+Seeds the benchmark database with 10k, 100k and 1M synthetic tips (or the
+--scales given) and times get_tips with every filter combination,
+get_summary_stats, export_to_csv with and without zero days, and
+recalculate_base_amounts. Wall time, peak RSS and the documents examined by
+each operation's queries can be saved as a JSON baseline, and later runs
+compared against it:
+
+    python -m benchmarks.bench_tip_operations --json baseline.json
+    python -m benchmarks.bench_tip_operations --baseline baseline.json
+    python -m benchmarks.bench_tip_operations --mongomock --scales 10000
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from itertools import combinations
+from database.query_profiler import ExplainingCollection
+from database.tip_operations import TipOperations
+from benchmarks.common import get_bench_components, seed_tips, measure, print_result
+
+DEFAULT_SCALES = (10000, 100000, 1000000)
+
+# Slowdown of the best time over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def filter_values(now):
+    """get_tips filters by name; every combination of them is benchmarked."""
+    return {
+        "date": {"start_date": now - timedelta(days=30), "end_date": now},
+        "currency": {"currency": "EUR"},
+        "location": {"location": "air"}
+    }
+
+
+def benchmark_cases(tip_operations, export_dir):
+    """
+    Build the operations to time.
+
+    Returns:
+        list: (name, callable) pairs
+    """
+    now = datetime.now()
+    filters = filter_values(now)
+    cases = []
+    for size in range(len(filters) + 1):
+        for names in combinations(filters, size):
+            kwargs = {key: value for name in names for key, value in filters[name].items()}
+            cases.append((f"get_tips[{'+'.join(names) or 'all'}]",
+                          lambda kwargs=kwargs: tip_operations.get_tips(**kwargs)))
+
+    year_ago = now - timedelta(days=365)
+    cases += [
+        ("get_summary_stats[all]", lambda: tip_operations.get_summary_stats()),
+        ("get_summary_stats[year]", lambda: tip_operations.get_summary_stats(year_ago, now)),
+        ("export_to_csv[zero_days]", lambda: tip_operations.export_to_csv(
+            os.path.join(export_dir, "zero_days.csv"), include_zero_days=True)),
+        ("export_to_csv[tips_only]", lambda: tip_operations.export_to_csv(
+            os.path.join(export_dir, "tips_only.csv"), include_zero_days=False)),
+        # Rates are fixed, so repeated runs leave the same base amounts behind
+        ("recalculate_base_amounts", lambda: tip_operations.recalculate_base_amounts())
+    ]
+    return cases
+
+
+def docs_examined(tip_operations, func):
+    """
+    Run func once with the tips collection explained and total the documents its queries examined.
+
+    Returns:
+        int: Documents examined, or None if the server cannot explain (mongomock)
+    """
+    summaries = []
+    collection = tip_operations.tips_collection
+    tip_operations.tips_collection = ExplainingCollection(
+        collection, on_explain=lambda operation, summary: summaries.append(summary)
+    )
+    try:
+        func()
+    finally:
+        tip_operations.tips_collection = collection
+
+    examined = [summary["docs_examined"] for summary in summaries if summary["docs_examined"] is not None]
+    return sum(examined) if examined else None
+
+
+def run_scale(db_manager, currency_converter, count, repeat, only=None):
+    """Seed `count` tips and benchmark every case (or those named in `only`); returns {case name: result}."""
+    seed_tips(db_manager, count)
+    tip_operations = TipOperations(db_manager, currency_converter)
+    tip_operations.rollups.rebuild()
+
+    export_dir = tempfile.mkdtemp(prefix="tip_bench_")
+    results = {}
+    try:
+        print(f"\n{count} tips")
+        for name, func in benchmark_cases(tip_operations, export_dir):
+            if only and not any(text in name for text in only):
+                continue
+            result = measure(func, repeat)
+            result["docs_examined"] = docs_examined(tip_operations, func)
+            results[name] = result
+            print_result(name, result)
+            if result["docs_examined"] is not None:
+                print(f"{'':<32} examined {result['docs_examined']} docs")
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change of every best time against the baseline.
+
+    Returns:
+        list: (scale, case) pairs slower than the baseline by more than tolerance
+    """
+    regressions = []
+    print(f"\nCompared with baseline from {baseline.get('created', 'unknown date')}")
+    for scale, cases in results.items():
+        for name, result in cases.items():
+            previous = baseline.get("results", {}).get(scale, {}).get(name)
+            if not previous:
+                continue
+            change = result["best_s"] / previous["best_s"] - 1 if previous["best_s"] else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESSION"
+                regressions.append((scale, name))
+            print(f"{scale:>8} {name:<32} {change * 100:+7.1f} %{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="numbers of synthetic tips to benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mongomock", action="store_true",
+                        help="use an in-memory mongomock server (slow for bulk updates, no docs examined)")
+    parser.add_argument("--only", nargs="+", help="run only the cases whose names contain one of these")
+    parser.add_argument("--json", help="write the results to this file as a new baseline")
+    parser.add_argument("--baseline", help="compare against results written earlier with --json")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown reported as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Explain summaries are collected, not logged
+    logging.getLogger("tip_tracker.queries").addHandler(logging.NullHandler())
+
+    db_manager, currency_converter = get_bench_components(use_mongomock=args.mongomock)
+    try:
+        results = {
+            str(count): run_scale(db_manager, currency_converter, count, args.repeat, args.only)
+            for count in args.scales
+        }
+    finally:
+        db_manager.close_connection()
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "server": "mongomock" if args.mongomock else "mongodb",
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
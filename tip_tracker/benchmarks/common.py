@@ -0,0 +1,182 @@
+"""Shared helpers for Tip Tracker benchmarks.
+
+Benchmarks run against a separate database on the configured MongoDB server
+so real tip data is never touched. Run them from the tip_tracker directory:
+
+    python -m benchmarks.bench_summary_stats --tips 100000
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from config import MONGODB_URL, DATABASE_NAME
+from database.db_manager import DatabaseManager
+from database.query_profiler import summarize_explain
+from utils.currency import CurrencyConverter
+from utils.location import location_key
+
+BENCH_DATABASE_NAME = f"{DATABASE_NAME}_bench"
+
+# Fixed rates so timings do not depend on the exchange rate API
+BENCH_RATES = {
+    "USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 151.2,
+    "CAD": 1.36, "AUD": 1.52, "CHF": 0.90, "CNY": 7.23
+}
+
+
+class BenchCurrencyConverter(CurrencyConverter):
+    """Currency converter using fixed rates instead of the live API."""
+
+    def _load_stored_rates(self):
+        """Use the fixed benchmark rates."""
+        self.exchange_rates = dict(BENCH_RATES)
+        self.rates_updated = datetime.now()
+
+    def update_exchange_rates(self):
+        """Keep the fixed benchmark rates."""
+        return False
+
+
+def get_bench_components(url=MONGODB_URL, db_name=BENCH_DATABASE_NAME, use_mongomock=False):
+    """
+    Create database manager and currency converter for the benchmark database.
+
+    With use_mongomock, an in-memory mongomock server stands in for MongoDB;
+    its timings say little about a real server, but it needs none.
+    """
+    client = None
+    if use_mongomock:
+        try:
+            import mongomock
+        except ImportError:
+            raise ImportError("--mongomock requires mongomock (pip install mongomock)")
+        client = mongomock.MongoClient()
+    db_manager = DatabaseManager(url, db_name, journal_path=f"{db_name}_journal.jsonl", client=client)
+    currency_converter = BenchCurrencyConverter(db_manager, base_currency="USD")
+    return db_manager, currency_converter
+
+
+def generate_tips(count, days=3 * 365, seed=42):
+    """Yield `count` synthetic tip dicts with base amounts at the fixed rates."""
+    rng = random.Random(seed)
+    currencies = list(BENCH_RATES.keys())
+    locations = ["Downtown", "Airport", "Harbour", "Old Town", "Mall", ""]
+    start = datetime.now() - timedelta(days=days)
+
+    for _ in range(count):
+        currency = rng.choice(currencies)
+        location = rng.choice(locations)
+        amount = round(rng.uniform(1, 100), 2)
+        yield {
+            "amount": amount,
+            "currency": currency,
+            "date": start + timedelta(seconds=rng.randrange(days * 86400)),
+            "notes": "",
+            "location": location,
+            "base_amount": amount / BENCH_RATES[currency]
+        }
+
+
+def seed_tips(db_manager, count, days=3 * 365, batch_size=10000, seed=42):
+    """Replace the benchmark tips collection with `count` synthetic tips."""
+    tips_collection = db_manager.get_tips_collection()
+    tips_collection.delete_many({})
+
+    batch = []
+    for tip in generate_tips(count, days, seed):
+        tip["location_key"] = location_key(tip["location"])
+        batch.append(tip)
+        if len(batch) >= batch_size:
+            tips_collection.insert_many(batch, ordered=False)
+            batch = []
+
+    if batch:
+        tips_collection.insert_many(batch, ordered=False)
+
+
+def reset_peak_rss():
+    """Reset the process's peak resident set size, where the OS allows it (Linux)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """
+    Get the peak resident set size of the process in bytes.
+
+    On Linux this is the peak since the last reset_peak_rss(); elsewhere it
+    is the peak over the process lifetime. None if it cannot be read.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(func, repeat=5):
+    """
+    Time a callable and track its peak Python heap usage and peak RSS.
+
+    Returns:
+        dict: best and mean wall time in seconds, peak traced memory and
+        peak resident set size in bytes
+    """
+    timings = []
+    peak = 0
+    rss = None
+    for _ in range(repeat):
+        reset_peak_rss()
+        tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        run_rss = peak_rss()
+        if run_rss is not None:
+            rss = max(rss or 0, run_rss)
+
+    return {
+        "best_s": min(timings),
+        "mean_s": sum(timings) / len(timings),
+        "peak_bytes": peak,
+        "peak_rss_bytes": rss
+    }
+
+
+def explain_find(collection, query, sort=None):
+    """
+    Run a find through explain and summarize its execution statistics.
+
+    Returns:
+        dict: docs/keys examined, docs returned and the winning plan's stages
+    """
+    command = {"find": collection.name, "filter": query}
+    if sort:
+        command["sort"] = dict(sort)
+    summary = summarize_explain(collection.database.command("explain", command, verbosity="executionStats"))
+    summary["plan"] = " <- ".join(stage for stage in summary["plan"] if stage)
+    return summary
+
+
+def print_result(name, result):
+    """Print a single benchmark result line."""
+    print(f"{name:<32} best {result['best_s'] * 1000:9.1f} ms  "
+          f"mean {result['mean_s'] * 1000:9.1f} ms  "
+          f"peak {result['peak_bytes'] / 1024 / 1024:8.2f} MiB"
+          + (f"  rss {result['peak_rss_bytes'] / 1024 / 1024:8.1f} MiB" if result.get("peak_rss_bytes") else ""))
@@ -0,0 +1,170 @@
+"""Headless command line interface for scripted reports.
+
+Uses the same storage and currency code as the GUI without importing
+tkinter or matplotlib. Results are written to stdout as JSON lines, one
+object per line; progress goes to stderr. Run from the repository root
+(or as `python cli.py ...` from the tip_tracker directory):
+
+    python -m tip_tracker summary --start 2024-01-01 --end 2024-12-31 --by month
+    python -m tip_tracker export tips.csv --format csv --no-zero-days
+    python -m tip_tracker export - --format jsonl --start 2024-01-01
+    python -m tip_tracker rebase --base EUR
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from config import STORAGE_BACKEND
+from database.storage import EXPORT_FIELDS, EXPORT_CHUNK_SIZE
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD argument."""
+    try:
+        return datetime.strptime(text, DATE_FORMAT)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}, use YYYY-MM-DD")
+
+
+def date_range(args):
+    """Get the (start, end) datetimes of the --start/--end arguments; --end includes its whole day."""
+    end_date = args.end + timedelta(days=1) - timedelta(microseconds=1) if args.end else None
+    return args.start, end_date
+
+
+def _json_default(value):
+    """Encode datetimes and ObjectIds for JSON output."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def emit(record, stream=sys.stdout):
+    """Write one JSON line."""
+    stream.write(json.dumps(record, default=_json_default) + "\n")
+
+
+def open_storage(backend):
+    """Create the database manager, currency converter and tip operations for a backend."""
+    # Imported here so --help and argument errors return without loading numpy or a database driver
+    from database.storage import create_db_manager
+    from utils.currency import CurrencyConverter
+
+    db_manager = create_db_manager(backend)
+    # The rates are refreshed only when a command asks for it
+    currency_converter = CurrencyConverter(db_manager, refresh_rates=False)
+    return db_manager, currency_converter, db_manager.create_tip_operations(currency_converter)
+
+
+def run_summary(args, currency_converter, tip_operations):
+    """Print summary statistics, then one line per day or month with --by."""
+    start_date, end_date = date_range(args)
+    stats = tip_operations.get_summary_stats(start_date, end_date)
+    emit(dict(stats or {"total_tips": 0, "base_currency": currency_converter.get_base_currency()},
+              type="summary", start=start_date, end=end_date))
+
+    if args.by:
+        for period in tip_operations.get_trend(args.by, start_date, end_date):
+            emit(dict(period, type=args.by))
+    return 0
+
+
+def run_export(args, currency_converter, tip_operations):
+    """Stream tips to a CSV, Parquet or JSON lines file (or JSON lines to stdout)."""
+    start_date, end_date = date_range(args)
+    include_zero_days = not args.no_zero_days
+
+    if args.format != "jsonl":
+        if args.output == "-":
+            raise SystemExit("CSV and Parquet exports need an output file")
+        exported = tip_operations.export_tips(args.output, start_date, end_date, include_zero_days,
+                                              file_format=args.format, chunk_size=args.chunk_size)
+        emit({"type": "export", "file": args.output, "format": args.format, "exported": exported})
+        return 0 if exported else 1
+
+    rows = tip_operations.iter_export_rows(start_date, end_date, include_zero_days, args.chunk_size)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8",
+                                                           buffering=1024 * 1024)
+    count = 0
+    try:
+        for row in rows:
+            emit(dict(zip(EXPORT_FIELDS, row)), output)
+            count += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.output != "-":
+        emit({"type": "export", "file": args.output, "format": "jsonl", "exported": count > 0, "rows": count})
+    return 0 if count else 1
+
+
+def run_rebase(args, currency_converter, tip_operations):
+    """Change the base currency if asked and recalculate every base amount."""
+    if args.refresh_rates:
+        currency_converter.update_exchange_rates()
+
+    if args.base:
+        base_currency = args.base.upper()
+        if base_currency not in currency_converter.get_available_currencies():
+            raise SystemExit(f"No exchange rate for {base_currency}")
+        currency_converter.set_base_currency(base_currency)
+
+    def report_progress(done, total):
+        emit({"type": "progress", "done": done, "total": total}, sys.stderr)
+
+    total = tip_operations.recalculate_base_amounts(progress_callback=report_progress)
+    emit({"type": "rebase", "base_currency": currency_converter.get_base_currency(), "tips": total})
+    return 0
+
+
+def build_parser():
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(prog="tip_tracker", description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongodb", "sqlite"], default=STORAGE_BACKEND)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_range(command):
+        command.add_argument("--start", type=parse_date, help="first day (YYYY-MM-DD)")
+        command.add_argument("--end", type=parse_date, help="last day (YYYY-MM-DD), included")
+
+    summary = commands.add_parser("summary", help="summary statistics as JSON lines")
+    add_range(summary)
+    summary.add_argument("--by", choices=["day", "month"], help="also print totals per day or month")
+    summary.set_defaults(handler=run_summary)
+
+    export = commands.add_parser("export", help="stream tips to a file")
+    export.add_argument("output", help="output file, or - for JSON lines on stdout")
+    add_range(export)
+    export.add_argument("--format", choices=["csv", "parquet", "jsonl"], default="jsonl")
+    export.add_argument("--no-zero-days", action="store_true", help="leave out placeholder rows for days without tips")
+    export.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="tips read per batch")
+    export.set_defaults(handler=run_export)
+
+    rebase = commands.add_parser("rebase", help="recalculate base amounts")
+    rebase.add_argument("--base", help="new base currency")
+    rebase.add_argument("--refresh-rates", action="store_true", help="fetch current exchange rates first")
+    rebase.set_defaults(handler=run_rebase)
+    return parser
+
+
+def main(argv=None):
+    """Run a command and return its exit status."""
+    args = build_parser().parse_args(argv)
+    db_manager, currency_converter, tip_operations = open_storage(args.backend)
+    try:
+        return args.handler(args, currency_converter, tip_operations)
+    except BrokenPipeError:
+        # Output piped into a command that stopped reading (e.g. head)
+        sys.stdout = open(os.devnull, "w")
+        return 1
+    finally:
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
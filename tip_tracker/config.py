@@ -1,16 +1,40 @@
 """Configuration file for the Tip Tracker application."""
 
+# Storage backend: "mongodb", or "sqlite" for a local file without a MongoDB server
+STORAGE_BACKEND = "mongodb"
+SQLITE_PATH = "tip_tracker.db"
+
 # MongoDB Configuration
 MONGODB_URL = 'mongodb://localhost:27017/'
 DATABASE_NAME = 'tip_tracker'
 COLLECTIONS = {
     'tips': 'tips',
     'currencies': 'currencies',
-    'settings': 'settings'
+    'settings': 'settings',
+    'tip_rollups': 'tip_rollups'
 }
+MONGODB_TIMEOUT_MS = 2000  # Server selection and connect timeout, so an unreachable server fails fast
+
+# Tips added while MongoDB is unreachable are journaled here and written once it is back
+TIP_JOURNAL_PATH = "tip_journal.jsonl"
+JOURNAL_FLUSH_INTERVAL = 15  # Seconds between attempts to write journaled tips
+JOURNAL_FLUSH_BATCH = 500  # Journaled tips written per insert_many
+
+# Serve tip counts, list pages and statistics from an in-memory copy of the tip columns,
+# kept current with a change stream (replica sets) or by reloading every poll interval
+TIP_CACHE = False
+TIP_CACHE_POLL_INTERVAL = 30  # Seconds between reloads on standalone servers
+
+# Log explain() output (docs examined/returned, winning plan) for tip queries
+QUERY_DEBUG = False
+
+# Match location filters by word with a text index instead of by prefix
+LOCATION_TEXT_SEARCH = False
 
 # Exchange Rate API
 EXCHANGE_RATE_API_URL = "https://open.er-api.com/v6/latest/USD"
+EXCHANGE_RATE_TTL_HOURS = 12  # Stored rates younger than this are used without refreshing
+EXCHANGE_RATE_TIMEOUT = 5  # Seconds to wait for the rate API
 
 # Default Settings
 DEFAULT_BASE_CURRENCY = "USD"
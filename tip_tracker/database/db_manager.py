@@ -2,28 +2,101 @@
 
 from datetime import datetime
 import pymongo
+import pymongo.errors
 from pymongo import MongoClient
-from config import MONGODB_URL, DATABASE_NAME, COLLECTIONS
+from config import (MONGODB_URL, DATABASE_NAME, COLLECTIONS, LOCATION_TEXT_SEARCH, QUERY_DEBUG,
+                    MONGODB_TIMEOUT_MS, TIP_JOURNAL_PATH, TIP_CACHE)
+from database.migrations import run_migrations
+from database.query_profiler import ExplainingCollection
+from database.rollup_operations import ROLLUP_INDEX
+from database.tip_journal import TipJournal
+from database.tip_operations import TipOperations
+
+# Tip indexes, each matching a query shape in TipOperations
+TIP_INDEXES = [
+    # Unfiltered and date-range listing, sorted newest first (get_tips, keyset pages, exports)
+    [('date', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)],
+    # Currency equality, then the date sort/range (currency filter, rebase per currency and period)
+    [('currency', pymongo.ASCENDING), ('date', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)],
+    # Location prefix within a date range
+    [('location_key', pymongo.ASCENDING), ('date', pymongo.DESCENDING)],
+    # Covers the date $match and currency $group of get_summary_stats
+    [('date', pymongo.ASCENDING), ('currency', pymongo.ASCENDING),
+     ('amount', pymongo.ASCENDING), ('base_amount', pymongo.ASCENDING)],
+]
+
+# Index names created by older versions
+LEGACY_TIP_INDEXES = ['date_1', 'currency_1']
 
 
 class DatabaseManager:
-    def __init__(self):
-        """Initialize MongoDB connection and setup indexes."""
-        self.client = MongoClient(MONGODB_URL)
-        self.db = self.client[DATABASE_NAME]
+    def __init__(self, url=MONGODB_URL, db_name=DATABASE_NAME, debug=QUERY_DEBUG,
+                 timeout_ms=MONGODB_TIMEOUT_MS, journal_path=TIP_JOURNAL_PATH, client=None):
+        """Initialize MongoDB connection and setup indexes.
+        
+        With debug enabled, tip queries are explained and their plans logged.
+        If the server cannot be reached, index setup and migrations wait until
+        it can, and new tips are kept in the journal at journal_path.
+        An existing client (e.g. a mongomock one for benchmarks) can be passed
+        instead of a url.
+        """
+        self.client = client or MongoClient(url, serverSelectionTimeoutMS=timeout_ms, connectTimeoutMS=timeout_ms)
+        self.db = self.client[db_name]
+        self.journal = TipJournal(journal_path)
+        self.tip_cache = None  # Created with the first cached TipOperations
+        self._setup_done = False
         
         # Get collections
         self.tips_collection = self.db[COLLECTIONS['tips']]
         self.currencies_collection = self.db[COLLECTIONS['currencies']]
         self.settings_collection = self.db[COLLECTIONS['settings']]
+        self.rollups_collection = self.db[COLLECTIONS['tip_rollups']]
+        
+        try:
+            self.ensure_setup()
+        except pymongo.errors.ConnectionFailure as e:
+            print(f"MongoDB is unreachable, new tips will be journaled: {e}")
+        
+        if debug:
+            self.tips_collection = ExplainingCollection(self.tips_collection)
+    
+    def ensure_setup(self):
+        """Create indexes and run migrations unless done already; raises ConnectionFailure if offline."""
+        if self._setup_done:
+            return
         
         # Create indexes for faster queries
         self._create_indexes()
+        
+        # Bring documents from older versions up to date
+        run_migrations(self)
+        self._setup_done = True
     
     def _create_indexes(self):
-        """Create indexes for better query performance."""
-        self.tips_collection.create_index([('date', pymongo.ASCENDING)])
-        self.tips_collection.create_index([('currency', pymongo.ASCENDING)])
+        """
+        Create indexes for better query performance.
+        
+        Compound tip indexes follow the Equality, Sort, Range rule for the
+        query shapes TipOperations actually issues.
+        """
+        for keys in TIP_INDEXES:
+            self.tips_collection.create_index(keys)
+        # Natural key of imported tips; tips entered by hand have none
+        self.tips_collection.create_index(
+            [('import_key', pymongo.ASCENDING)],
+            unique=True,
+            partialFilterExpression={'import_key': {'$type': 'string'}}
+        )
+        if LOCATION_TEXT_SEARCH:
+            self.tips_collection.create_index([('location', pymongo.TEXT)])
+        
+        # Single-field indexes made redundant by the compound indexes above
+        existing = self.tips_collection.index_information()
+        for name in LEGACY_TIP_INDEXES:
+            if name in existing:
+                self.tips_collection.drop_index(name)
+        
+        self.rollups_collection.create_index(ROLLUP_INDEX)
     
     def get_tips_collection(self):
         """Get the tips collection."""
@@ -37,17 +110,38 @@ class DatabaseManager:
         """Get the settings collection."""
         return self.settings_collection
     
+    def get_rollups_collection(self):
+        """Get the tip rollups collection."""
+        return self.rollups_collection
+    
+    def create_tip_operations(self, currency_converter):
+        """Create the tip operations for this database, reading through the tip cache if enabled."""
+        if TIP_CACHE:
+            from database.tip_cache import TipCache, CachedTipOperations
+            if self.tip_cache is None:
+                self.tip_cache = TipCache(self.tips_collection)
+            return CachedTipOperations(self, currency_converter, self.tip_cache)
+        return TipOperations(self, currency_converter)
+    
     def close_connection(self):
         """Close the MongoDB connection."""
+        self.journal.stop_flusher()
+        if self.tip_cache:
+            self.tip_cache.stop()
         self.client.close()
     
-    def test_connection(self, url, db_name):
-        """Test connection to MongoDB with provided parameters."""
+    @staticmethod
+    def test_connection(url, db_name):
+        """Test connection to MongoDB with provided parameters, using a short-lived client."""
+        test_client = None
         try:
-            test_client = MongoClient(url)
-            test_db = test_client[db_name]
+            test_client = MongoClient(url, serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+                                      connectTimeoutMS=MONGODB_TIMEOUT_MS)
             # A simple operation to verify connection
-            test_db.list_collection_names()
+            test_client[db_name].command("ping")
             return True, None
         except Exception as e:
-            return False, str(e)
\ No newline at end of file
+            return False, str(e)
+        finally:
+            if test_client is not None:
+                test_client.close()
\ No newline at end of file
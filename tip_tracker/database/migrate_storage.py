@@ -0,0 +1,96 @@
+"""Copy tip data between storage backends.
+
+Tips keep their amounts, dates and base amounts but get new IDs in the
+target. Currency documents (current and daily rates) and settings are copied
+as they are. Run from the tip_tracker directory:
+
+    python -m database.migrate_storage mongodb sqlite
+    python -m database.migrate_storage sqlite mongodb --sqlite-path other.db
+"""
+
+import argparse
+from database.storage import EXPORT_CHUNK_SIZE
+
+# Fields copied for every tip; IDs are assigned by the target
+TIP_FIELDS = ("amount", "currency", "date", "notes", "location", "base_amount")
+
+
+def migrate(source, target, batch_size=EXPORT_CHUNK_SIZE, progress_callback=None):
+    """
+    Copy all tips, currency documents and settings from one database manager to another.
+
+    Args:
+        source: Database manager to read from
+        target: Database manager to write to
+        batch_size: Number of tips read and inserted per batch
+        progress_callback: Optional callable(copied) receiving the number of tips copied so far
+
+    Returns:
+        int: Number of tips copied
+    """
+    # Bulk inserts do not convert, so no currency converter is needed
+    source_tips = source.create_tip_operations(None)
+    target_tips = target.create_tip_operations(None)
+
+    for getter in ("get_currencies_collection", "get_settings_collection"):
+        target_collection = getattr(target, getter)()
+        for document in getattr(source, getter)().find({}):
+            target_collection.replace_one({"_id": document["_id"]}, document, upsert=True)
+
+    copied = 0
+    batch = []
+    for tip in source_tips._iter_tips_by_date(batch_size=batch_size):
+        copy = {field: tip.get(field) for field in TIP_FIELDS}
+        if tip.get("import_key"):
+            # Keeps re-imports into the target deduplicated
+            copy["import_key"] = tip["import_key"]
+        batch.append(copy)
+        if len(batch) >= batch_size:
+            copied += target_tips.insert_tips(batch)
+            batch = []
+            if progress_callback:
+                progress_callback(copied)
+
+    if batch:
+        copied += target_tips.insert_tips(batch)
+        if progress_callback:
+            progress_callback(copied)
+    return copied
+
+
+def main():
+    """Copy the configured databases from one backend to the other."""
+    from database.db_manager import DatabaseManager
+    from database.sqlite_storage import SQLiteDatabaseManager
+    from config import MONGODB_URL, DATABASE_NAME, SQLITE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", choices=["mongodb", "sqlite"])
+    parser.add_argument("target", choices=["mongodb", "sqlite"])
+    parser.add_argument("--mongodb-url", default=MONGODB_URL)
+    parser.add_argument("--database", default=DATABASE_NAME, help="MongoDB database name")
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH)
+    parser.add_argument("--batch-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("source and target must be different backends")
+
+    def open_manager(backend):
+        if backend == "sqlite":
+            return SQLiteDatabaseManager(args.sqlite_path)
+        return DatabaseManager(args.mongodb_url, args.database)
+
+    source = open_manager(args.source)
+    target = open_manager(args.target)
+    try:
+        copied = migrate(source, target, args.batch_size,
+                         progress_callback=lambda done: print(f"Copied {done} tips", end="\r"))
+    finally:
+        source.close_connection()
+        target.close_connection()
+    print(f"Copied {copied} tips from {args.source} to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
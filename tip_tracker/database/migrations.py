@@ -0,0 +1,54 @@
+"""One-time data migrations, applied in order and tracked in the settings collection."""
+
+from utils.location import location_key
+
+SCHEMA_DOCUMENT_ID = "schema"
+
+
+def backfill_location_keys(db_manager):
+    """Add the normalized location_key field to tips created before it existed."""
+    tips_collection = db_manager.get_tips_collection()
+    missing = {"location_key": {"$exists": False}}
+
+    # Locations repeat a lot, so update every tip sharing a location at once
+    for location in tips_collection.distinct("location", missing):
+        if not isinstance(location, str):
+            continue  # Left for the empty-key update below
+        tips_collection.update_many(
+            {"location": location, **missing},
+            {"$set": {"location_key": location_key(location)}}
+        )
+
+    # Tips without a location (or with a non-string one) get an empty key
+    tips_collection.update_many(missing, {"$set": {"location_key": ""}})
+
+
+# (version, migration) pairs; append new migrations with the next version
+MIGRATIONS = [
+    (1, backfill_location_keys),
+]
+
+
+def run_migrations(db_manager):
+    """
+    Apply all migrations newer than the stored schema version.
+
+    Returns:
+        int: The schema version after migrating
+    """
+    settings_collection = db_manager.get_settings_collection()
+    schema = settings_collection.find_one({"_id": SCHEMA_DOCUMENT_ID}) or {}
+    version = schema.get("version", 0)
+
+    for migration_version, migration in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        migration(db_manager)
+        version = migration_version
+        settings_collection.update_one(
+            {"_id": SCHEMA_DOCUMENT_ID},
+            {"$set": {"version": version}},
+            upsert=True
+        )
+
+    return version
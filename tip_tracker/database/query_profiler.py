@@ -0,0 +1,146 @@
+"""Query plan instrumentation for debugging slow tip queries.
+
+When QUERY_DEBUG is enabled in config, DatabaseManager wraps the tips
+collection in an ExplainingCollection. Every find, aggregate and
+count_documents is explained first, and the docs examined, docs returned
+and winning plan are logged to the "tip_tracker.queries" logger. Plans
+containing a COLLSCAN are logged as warnings.
+"""
+
+import logging
+
+logger = logging.getLogger("tip_tracker.queries")
+
+
+def _find_key(document, key):
+    """Find the first value for `key` anywhere in a nested explain document."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan):
+    """Flatten a winning plan into its stage names, outermost first."""
+    stages = []
+    pending = [plan] if plan else []
+    while pending:
+        stage = pending.pop(0)
+        name = stage.get("stage")
+        if name == "IXSCAN":
+            name = f"IXSCAN {stage.get('indexName')}"
+        stages.append(name)
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+        pending.extend(stage.get("inputStages", []))
+    return stages
+
+
+def summarize_explain(explain):
+    """
+    Summarize an explain result.
+
+    Returns:
+        dict: docs_examined, keys_examined, docs_returned and plan stage names
+    """
+    stats = _find_key(explain, "executionStats") or {}
+    return {
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_returned": stats.get("nReturned"),
+        "plan": _plan_stages(_find_key(explain, "winningPlan"))
+    }
+
+
+def log_explain(operation, collection_name, explain):
+    """Log the summary of an explain result."""
+    summary = summarize_explain(explain)
+    collscan = any(stage.startswith("COLLSCAN") for stage in summary["plan"] if stage)
+    logger.log(
+        logging.WARNING if collscan else logging.DEBUG,
+        "%s on %s: examined %s docs / %s keys, returned %s, plan %s",
+        operation, collection_name,
+        summary["docs_examined"], summary["keys_examined"], summary["docs_returned"],
+        " <- ".join(stage for stage in summary["plan"] if stage)
+    )
+    return summary
+
+
+class ExplainingCursor:
+    """Cursor wrapper that explains the query once, right before it is iterated."""
+
+    def __init__(self, cursor, collection_name, on_explain=None):
+        self._cursor = cursor
+        self._collection_name = collection_name
+        self._on_explain = on_explain
+        self._explained = False
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Keep chained calls (sort, limit, batch_size, ...) wrapped
+            if isinstance(result, type(self._cursor)):
+                self._cursor = result
+                return self
+            return result
+        return call
+
+    def __iter__(self):
+        if not self._explained:
+            self._explained = True
+            try:
+                summary = log_explain("find", self._collection_name, self._cursor.clone().explain())
+                if self._on_explain:
+                    self._on_explain("find", summary)
+            except Exception as e:
+                logger.debug("explain failed for find on %s: %s", self._collection_name, e)
+        return iter(self._cursor)
+
+
+class ExplainingCollection:
+    """Collection wrapper that explains find, aggregate and count_documents calls.
+
+    Summaries are logged, and passed to on_explain(operation, summary) if given.
+    """
+
+    def __init__(self, collection, on_explain=None):
+        self._collection = collection
+        self._on_explain = on_explain
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, *args, **kwargs):
+        return ExplainingCursor(self._collection.find(*args, **kwargs), self._collection.name, self._on_explain)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        self._explain_command("aggregate", {"aggregate": self._collection.name, "pipeline": pipeline, "cursor": {}})
+        return self._collection.aggregate(pipeline, *args, **kwargs)
+
+    def count_documents(self, filter, *args, **kwargs):
+        self._explain_command("count_documents", {"count": self._collection.name, "query": filter})
+        return self._collection.count_documents(filter, *args, **kwargs)
+
+    def _explain_command(self, operation, command):
+        """Explain a command with execution statistics and log the summary."""
+        try:
+            explain = self._collection.database.command("explain", command, verbosity="executionStats")
+            summary = log_explain(operation, self._collection.name, explain)
+            if self._on_explain:
+                self._on_explain(operation, summary)
+        except Exception as e:
+            logger.debug("explain failed for %s on %s: %s", operation, self._collection.name, e)
@@ -0,0 +1,260 @@
+"""Daily and monthly tip rollups maintained alongside the tips collection.
+
+Each rollup document holds the totals of one day or month:
+
+    {
+        "_id": "day:2024-05-01",          # or "month:2024-05"
+        "period": "day",                  # or "month"
+        "start": datetime(2024, 5, 1),
+        "count": 12,
+        "base_amount": 153.2,
+        "currencies": {"EUR": {"amount": 80.0, "count": 7}, ...}
+    }
+
+Rebuild the rollups of an existing database from the tip_tracker directory with:
+
+    python -m database.rollup_operations
+"""
+
+from datetime import datetime
+import pymongo
+from pymongo import UpdateOne
+
+PERIODS = ("day", "month")
+
+# Index of the rollups collection, serving the period and date range queries
+ROLLUP_INDEX = [('period', pymongo.ASCENDING), ('start', pymongo.ASCENDING)]
+
+
+def period_start(date, period):
+    """Get the start of the day or month containing `date`."""
+    if period == "day":
+        return datetime(date.year, date.month, date.day)
+    return datetime(date.year, date.month, 1)
+
+
+def rollup_id(date, period):
+    """Get the rollup _id for the day or month containing `date`."""
+    if period == "day":
+        return f"day:{date:%Y-%m-%d}"
+    return f"month:{date:%Y-%m}"
+
+
+class RollupOperations:
+    def __init__(self, db_manager):
+        """Initialize rollup operations with database manager."""
+        self.tips_collection = db_manager.get_tips_collection()
+        self.rollups_collection = db_manager.get_rollups_collection()
+        # Set once the rollups are known to exist, so reads skip the check
+        self._built = False
+
+    def apply_tip(self, tip, sign=1):
+        """Add a tip to (sign=1) or remove it from (sign=-1) its day and month rollups."""
+        if sign > 0:
+            self.apply_changes(added=[tip])
+        else:
+            self.apply_changes(removed=[tip])
+
+    def replace_tip(self, old_tip, new_tip):
+        """Move a tip's contribution after an update."""
+        self.apply_changes(removed=[old_tip], added=[new_tip])
+
+    def apply_changes(self, removed=(), added=()):
+        """
+        Remove tips from and add tips to their day and month rollups.
+
+        Increments are summed per rollup document first, so any number of
+        tips costs one unordered bulk write.
+        """
+        increments = {}
+        for tips, sign in ((removed, -1), (added, 1)):
+            for tip in tips:
+                base_amount = tip.get("base_amount") or 0.0
+                for period in PERIODS:
+                    key = rollup_id(tip["date"], period)
+                    if key not in increments:
+                        increments[key] = (period, period_start(tip["date"], period), {})
+                    inc = increments[key][2]
+                    for field, value in (
+                        ("count", sign),
+                        ("base_amount", sign * base_amount),
+                        (f"currencies.{tip['currency']}.amount", sign * tip["amount"]),
+                        (f"currencies.{tip['currency']}.count", sign)
+                    ):
+                        inc[field] = inc.get(field, 0) + value
+
+        if not increments:
+            return
+
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {"$inc": inc, "$setOnInsert": {"period": period, "start": start}},
+                upsert=True
+            )
+            for key, (period, start, inc) in increments.items()
+        ]
+        self.rollups_collection.bulk_write(operations, ordered=False)
+
+    def rebuild(self):
+        """
+        Recompute all rollups from the tips collection.
+
+        Tips are grouped per day and currency on the server; the day
+        documents are then folded into months in Python.
+
+        Returns:
+            int: Number of rollup documents written
+        """
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "year": {"$year": "$date"},
+                    "month": {"$month": "$date"},
+                    "day": {"$dayOfMonth": "$date"},
+                    "currency": "$currency"
+                },
+                "amount": {"$sum": "$amount"},
+                "base_amount": {"$sum": "$base_amount"},
+                "count": {"$sum": 1}
+            }}
+        ]
+
+        rollups = {}
+        for group in self.tips_collection.aggregate(pipeline, allowDiskUse=True):
+            key = group["_id"]
+            day = datetime(key["year"], key["month"], key["day"])
+            for period in PERIODS:
+                doc = rollups.setdefault(rollup_id(day, period), {
+                    "_id": rollup_id(day, period),
+                    "period": period,
+                    "start": period_start(day, period),
+                    "count": 0,
+                    "base_amount": 0.0,
+                    "currencies": {}
+                })
+                doc["count"] += group["count"]
+                doc["base_amount"] += group["base_amount"]
+                totals = doc["currencies"].setdefault(key["currency"], {"amount": 0.0, "count": 0})
+                totals["amount"] += group["amount"]
+                totals["count"] += group["count"]
+
+        if not rollups:
+            self.rollups_collection.delete_many({})
+            self._built = True
+            return 0
+
+        # Written to a scratch collection that replaces the rollups in one rename,
+        # so readers never see a partly rebuilt (or empty) collection
+        staging = self.rollups_collection.database[self.rollups_collection.name + "_rebuild"]
+        staging.drop()
+        staging.insert_many(list(rollups.values()), ordered=False)
+        staging.create_index(ROLLUP_INDEX)
+        staging.rename(self.rollups_collection.name, dropTarget=True)
+        self._built = True
+        return len(rollups)
+
+    def ensure_built(self):
+        """
+        Build the rollups once for databases created before they existed.
+
+        The check runs on the first read only; from then on the rollups
+        are kept up to date by apply_changes and rebuild.
+        """
+        if self._built:
+            return
+        if self.rollups_collection.find_one({}, {"_id": 1}) is None and \
+                self.tips_collection.find_one({}, {"_id": 1}) is not None:
+            self.rebuild()
+        self._built = True
+
+    def get_rollups(self, period="month", start_date=None, end_date=None):
+        """
+        Get rollup documents for a period type, oldest first.
+
+        Args:
+            period: "day" or "month"
+            start_date: Optional start date; the rollup containing it is included
+            end_date: Optional end date; the rollup containing it is included
+
+        Returns:
+            list: Rollup documents with at least one tip
+        """
+        self.ensure_built()
+
+        query = {"period": period, "count": {"$gt": 0}}
+        date_range = {}
+        if start_date:
+            date_range["$gte"] = period_start(start_date, period)
+        if end_date:
+            date_range["$lte"] = period_start(end_date, period)
+        if date_range:
+            query["start"] = date_range
+
+        return list(self.rollups_collection.find(query).sort("start", pymongo.ASCENDING))
+
+    def get_day_range(self, start_date=None, end_date=None):
+        """
+        Get the first and last day with tips in a date range.
+
+        Returns:
+            tuple: (first day, last day), or None if the range has no tips
+        """
+        query = self._day_query(start_date, end_date)
+        first = self.rollups_collection.find_one(query, {"start": 1}, sort=[("start", pymongo.ASCENDING)])
+        if first is None:
+            return None
+        last = self.rollups_collection.find_one(query, {"start": 1}, sort=[("start", pymongo.DESCENDING)])
+        return first["start"], last["start"]
+
+    def get_day_buckets(self, first_day, bucket_days, end_date=None):
+        """
+        Sum the day rollups from first_day on into buckets of `bucket_days` days.
+
+        Returns:
+            list: (bucket number, base_amount, count) tuples, oldest first
+        """
+        pipeline = [
+            {"$match": self._day_query(first_day, end_date)},
+            {"$group": {
+                # Whole buckets since the first day; date subtraction gives milliseconds
+                "_id": {"$floor": {"$divide": [
+                    {"$subtract": ["$start", first_day]}, bucket_days * 86400000
+                ]}},
+                "base_amount": {"$sum": "$base_amount"},
+                "count": {"$sum": "$count"}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        return [
+            (group["_id"], group["base_amount"], group["count"])
+            for group in self.rollups_collection.aggregate(pipeline)
+        ]
+
+    def _day_query(self, start_date=None, end_date=None):
+        """Build the filter for the non-empty day rollups of a date range."""
+        self.ensure_built()
+
+        query = {"period": "day", "count": {"$gt": 0}}
+        date_range = {}
+        if start_date:
+            date_range["$gte"] = period_start(start_date, "day")
+        if end_date:
+            date_range["$lte"] = period_start(end_date, "day")
+        if date_range:
+            query["start"] = date_range
+        return query
+
+
+def main():
+    """Rebuild the rollups of the configured database."""
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    written = RollupOperations(db_manager).rebuild()
+    db_manager.close_connection()
+    print(f"Rebuilt {written} rollup documents")
+
+
+if __name__ == "__main__":
+    main()
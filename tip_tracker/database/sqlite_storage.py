@@ -0,0 +1,637 @@
+"""Tip storage on an embedded SQLite database.
+
+Used instead of MongoDB when STORAGE_BACKEND is "sqlite" in config, so the
+app runs without a MongoDB server. The database runs in WAL mode, which lets
+the GUI read while a background thread writes. Each thread uses its own
+connection.
+
+Tips live in a `tips` table with an integer primary key. Dates are stored as
+ISO-8601 text with microseconds, so text order is date order. Currency and
+settings documents are stored as JSON in a `documents` table, behind a small
+collection-like wrapper that covers the calls CurrencyConverter and the
+settings tab make.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from config import SQLITE_PATH
+from database.storage import TipStorage, EXPORT_CHUNK_SIZE, DAILY_TOTALS_MAX_POINTS
+from utils.location import location_key
+
+# Largest number of IDs bound into one IN (...) clause
+ID_CHUNK_SIZE = 500
+
+TIP_COLUMNS = "id, amount, currency, date, notes, location, base_amount, import_key"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tips (
+    id INTEGER PRIMARY KEY,
+    amount REAL NOT NULL,
+    currency TEXT NOT NULL,
+    date TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL DEFAULT '',
+    location_key TEXT NOT NULL DEFAULT '',
+    base_amount REAL,
+    import_key TEXT
+);
+-- Same query shapes as the MongoDB tip indexes
+CREATE INDEX IF NOT EXISTS tips_date_id ON tips (date, id);
+CREATE INDEX IF NOT EXISTS tips_currency_date_id ON tips (currency, date, id);
+CREATE INDEX IF NOT EXISTS tips_location_key_date ON tips (location_key, date);
+
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+"""
+
+# Natural key of imported tips; tips entered by hand have none
+IMPORT_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS tips_import_key ON tips (import_key) WHERE import_key IS NOT NULL"
+
+
+def _date_text(date):
+    """Format a datetime the way tip dates are stored."""
+    return date.isoformat(timespec="microseconds")
+
+
+def _encode(value):
+    """JSON hook storing datetimes as {"$date": iso}."""
+    if isinstance(value, datetime):
+        return {"$date": _date_text(value)}
+    raise TypeError(f"Cannot store {type(value).__name__} in a document")
+
+
+def _decode(obj):
+    """JSON hook restoring datetimes stored by _encode."""
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _tip_from_row(row):
+    """Convert a tips row to the tip dict used by the GUI."""
+    tip_id, amount, currency, date, notes, location, base_amount, import_key = row
+    tip = {
+        "_id": tip_id,
+        "amount": amount,
+        "currency": currency,
+        "date": datetime.fromisoformat(date),
+        "notes": notes,
+        "location": location,
+        "base_amount": base_amount
+    }
+    if import_key is not None:
+        tip["import_key"] = import_key
+    return tip
+
+
+def _chunks(values, size=ID_CHUNK_SIZE):
+    """Split a list into lists of at most `size` items."""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class SQLiteDocumentCursor:
+    """Result of SQLiteDocumentCollection.find, sortable like a pymongo cursor."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction=1):
+        """Sort the documents by one field."""
+        self.documents.sort(key=lambda doc: doc.get(key), reverse=direction < 0)
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class SQLiteDocumentCollection:
+    """Minimal collection of JSON documents keyed by _id.
+
+    Queries only support equality on top-level fields; updates only support
+    $set. That is all the currency and settings documents need.
+    """
+
+    def __init__(self, db_manager, name):
+        self.db_manager = db_manager
+        self.name = name
+
+    def _load_all(self):
+        """Load every document of the collection."""
+        rows = self.db_manager.connection().execute(
+            "SELECT body FROM documents WHERE collection = ?", (self.name,)
+        )
+        return [json.loads(body, object_hook=_decode) for (body,) in rows]
+
+    def _load(self, doc_id):
+        """Load one document by _id, or None."""
+        row = self.db_manager.connection().execute(
+            "SELECT body FROM documents WHERE collection = ? AND id = ?", (self.name, str(doc_id))
+        ).fetchone()
+        return json.loads(row[0], object_hook=_decode) if row else None
+
+    def _save(self, document):
+        """Insert or replace a document."""
+        with self.db_manager.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (collection, id, body) VALUES (?, ?, ?)",
+                (self.name, str(document["_id"]), json.dumps(document, default=_encode))
+            )
+
+    def find(self, query=None):
+        """Find documents whose fields equal the query's values."""
+        query = query or {}
+        if list(query) == ["_id"]:
+            document = self._load(query["_id"])
+            documents = [document] if document else []
+        else:
+            documents = [
+                doc for doc in self._load_all()
+                if all(doc.get(field) == value for field, value in query.items())
+            ]
+        return SQLiteDocumentCursor(documents)
+
+    def find_one(self, query=None):
+        """Find the first matching document, or None."""
+        return next(iter(self.find(query)), None)
+
+    def replace_one(self, query, document, upsert=False):
+        """Replace the document with the query's _id."""
+        if upsert or self._load(query["_id"]) is not None:
+            self._save(dict(document, _id=query["_id"]))
+
+    def update_one(self, query, update, upsert=False):
+        """Apply a $set update to the document with the query's _id."""
+        document = self._load(query["_id"])
+        if document is None:
+            if not upsert:
+                return
+            document = {"_id": query["_id"]}
+        document.update(update.get("$set", {}))
+        self._save(document)
+
+
+class SQLiteDatabaseManager:
+    def __init__(self, path=SQLITE_PATH):
+        """Open (or create) the SQLite database and set up its schema."""
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        self.currencies_collection = SQLiteDocumentCollection(self, "currencies")
+        self.settings_collection = SQLiteDocumentCollection(self, "settings")
+
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before imports existed lack the column
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tips)")}
+            if "import_key" not in columns:
+                conn.execute("ALTER TABLE tips ADD COLUMN import_key TEXT")
+            conn.execute(IMPORT_KEY_INDEX)
+
+    def connection(self):
+        """Get the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL; only the last commits can be lost on power failure
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get_currencies_collection(self):
+        """Get the currencies collection."""
+        return self.currencies_collection
+
+    def get_settings_collection(self):
+        """Get the settings collection."""
+        return self.settings_collection
+
+    def create_tip_operations(self, currency_converter):
+        """Create the tip operations for this database."""
+        return SQLiteTipOperations(self, currency_converter)
+
+    def close_connection(self):
+        """Close the connections of all threads."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class SQLiteTipOperations(TipStorage):
+    """Tip storage on SQLite."""
+
+    def __init__(self, db_manager, currency_converter):
+        """Initialize tip operations with database manager and currency converter."""
+        self.db_manager = db_manager
+        self.currency_converter = currency_converter
+
+    def _conn(self):
+        return self.db_manager.connection()
+
+    def parse_tip_id(self, tip_id_text):
+        """Convert a tip ID shown in the GUI back to an integer."""
+        return int(tip_id_text)
+
+    def add_tip(self, amount, currency, date=None, notes="", location=""):
+        """Add a new tip entry to database."""
+        if date is None:
+            date = datetime.now()
+
+        # Store the equivalent in base currency (at the tip date's rates) for easier reporting
+        base_amount = self.currency_converter.convert_to_base(float(amount), currency, date)
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "INSERT INTO tips (amount, currency, date, notes, location, location_key, base_amount) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (float(amount), currency, _date_text(date), notes, location, location_key(location), base_amount)
+            )
+        return cursor.lastrowid
+
+    def insert_tips(self, tips):
+        """
+        Insert complete tip dicts in bulk.
+
+        Tips must already carry their base_amount; location_key is derived.
+        Tips whose import_key is already stored are ignored.
+
+        Returns:
+            int: Number of tips inserted
+        """
+        rows = [
+            (float(tip["amount"]), tip["currency"], _date_text(tip["date"]), tip.get("notes") or "",
+             tip.get("location") or "", location_key(tip.get("location")), tip.get("base_amount"),
+             tip.get("import_key"))
+            for tip in tips
+        ]
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tips "
+                "(amount, currency, date, notes, location, location_key, base_amount, import_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def update_tip(self, tip_id, amount=None, currency=None, date=None, notes=None, location=None):
+        """Update an existing tip entry."""
+        update_data = {}
+
+        if amount is not None:
+            update_data["amount"] = float(amount)
+
+        if currency is not None:
+            update_data["currency"] = currency
+
+        if date is not None:
+            update_data["date"] = _date_text(date)
+
+        if notes is not None:
+            update_data["notes"] = notes
+
+        if location is not None:
+            update_data["location"] = location
+            update_data["location_key"] = location_key(location)
+
+        # Recalculate base amount if amount, currency or date changed
+        if amount is not None or currency is not None or date is not None:
+            row = self._conn().execute(
+                "SELECT amount, currency, date FROM tips WHERE id = ?", (tip_id,)
+            ).fetchone()
+            if row:
+                new_amount = amount if amount is not None else row[0]
+                new_currency = currency if currency is not None else row[1]
+                new_date = date if date is not None else datetime.fromisoformat(row[2])
+                update_data["base_amount"] = self.currency_converter.convert_to_base(
+                    float(new_amount), new_currency, new_date
+                )
+
+        if not update_data:
+            return 0
+
+        assignments = ", ".join(f"{column} = ?" for column in update_data)
+        with self._conn() as conn:
+            cursor = conn.execute(
+                f"UPDATE tips SET {assignments} WHERE id = ?", (*update_data.values(), tip_id)
+            )
+        return cursor.rowcount
+
+    def update_tips(self, tip_ids, currency=None, notes=None, location=None):
+        """
+        Set currency, notes and/or location on several tips at once.
+
+        A currency change also recalculates each tip's base amount at its
+        own date's rates.
+
+        Returns:
+            int: Number of tips modified
+        """
+        tip_ids = list(tip_ids)
+        update_data = {}
+
+        if notes is not None:
+            update_data["notes"] = notes
+
+        if location is not None:
+            update_data["location"] = location
+            update_data["location_key"] = location_key(location)
+
+        if not tip_ids or (currency is None and not update_data):
+            return 0
+
+        modified = 0
+        if currency is None:
+            assignments = ", ".join(f"{column} = ?" for column in update_data)
+            with self._conn() as conn:
+                for chunk in _chunks(tip_ids):
+                    placeholders = ", ".join("?" * len(chunk))
+                    modified += conn.execute(
+                        f"UPDATE tips SET {assignments} WHERE id IN ({placeholders})",
+                        (*update_data.values(), *chunk)
+                    ).rowcount
+            return modified
+
+        # Validate the currency before touching anything
+        self.currency_converter.convert_to_base(1.0, currency)
+
+        assignments = ", ".join(f"{column} = ?" for column in update_data) + ", " if update_data else ""
+        with self._conn() as conn:
+            for chunk in _chunks(tip_ids):
+                placeholders = ", ".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT id, amount, date FROM tips WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+                conn.executemany(
+                    f"UPDATE tips SET {assignments}currency = ?, base_amount = ? WHERE id = ?",
+                    [
+                        (*update_data.values(), currency,
+                         self.currency_converter.convert_to_base(amount, currency, datetime.fromisoformat(date)),
+                         tip_id)
+                        for tip_id, amount, date in rows
+                    ]
+                )
+                modified += len(rows)
+        return modified
+
+    def delete_tip(self, tip_id):
+        """Delete a tip by ID."""
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM tips WHERE id = ?", (tip_id,)).rowcount
+
+    def delete_tips(self, tip_ids):
+        """
+        Delete several tips by ID.
+
+        Returns:
+            int: Number of tips deleted
+        """
+        tip_ids = list(tip_ids)
+        deleted = 0
+        with self._conn() as conn:
+            for chunk in _chunks(tip_ids):
+                placeholders = ", ".join("?" * len(chunk))
+                deleted += conn.execute(f"DELETE FROM tips WHERE id IN ({placeholders})", chunk).rowcount
+        return deleted
+
+    def _build_where(self, start_date=None, end_date=None, currency=None, location=None):
+        """Build the WHERE clause and parameters shared by tip queries."""
+        conditions = []
+        params = []
+
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(_date_text(start_date))
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(_date_text(end_date))
+
+        if currency:
+            conditions.append("currency = ?")
+            params.append(currency)
+
+        if location:
+            # Prefix match as a range on the lowercase key, so it uses the index
+            key = location_key(location)
+            if key:
+                conditions.append("location_key >= ? AND location_key < ?")
+                params.extend([key, key[:-1] + chr(ord(key[-1]) + 1)])
+
+        return conditions, params
+
+    @staticmethod
+    def _where_sql(conditions):
+        return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    def get_tip(self, tip_id):
+        """Get one tip by ID, or None."""
+        row = self._conn().execute(f"SELECT {TIP_COLUMNS} FROM tips WHERE id = ?", (tip_id,)).fetchone()
+        return _tip_from_row(row) if row else None
+
+    def get_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Retrieve tips with optional filters."""
+        conditions, params = self._build_where(start_date, end_date, currency, location)
+        rows = self._conn().execute(
+            f"SELECT {TIP_COLUMNS} FROM tips{self._where_sql(conditions)} ORDER BY date DESC, id DESC", params
+        )
+        return [_tip_from_row(row) for row in rows]
+
+    def count_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Count tips matching the filters without fetching them."""
+        conditions, params = self._build_where(start_date, end_date, currency, location)
+        return self._conn().execute(
+            f"SELECT COUNT(*) FROM tips{self._where_sql(conditions)}", params
+        ).fetchone()[0]
+
+    def get_tips_page(self, page_size, start_date=None, end_date=None, currency=None, location=None,
+                      after=None, before=None, last=False, last_page_size=None, offset=0):
+        """
+        Retrieve one page of tips (newest first) using keyset pagination.
+
+        Same arguments and result as TipOperations.get_tips_page; the keyset
+        is a row-value comparison on the (date, id) index.
+        """
+        if after is not None or before is not None:
+            offset = 0
+        conditions, params = self._build_where(start_date, end_date, currency, location)
+
+        if after is not None:
+            date, tip_id = after
+            conditions.append("(date, id) < (?, ?)")
+            params.extend([_date_text(date), tip_id])
+            order, reverse, limit = "DESC", False, page_size
+        elif before is not None:
+            date, tip_id = before
+            conditions.append("(date, id) > (?, ?)")
+            params.extend([_date_text(date), tip_id])
+            order, reverse, limit = "ASC", True, page_size
+        elif last:
+            # Walk the index from the oldest end and flip the result
+            order, reverse, limit = "ASC", True, last_page_size or page_size
+        else:
+            order, reverse, limit = "DESC", False, page_size
+
+        rows = self._conn().execute(
+            f"SELECT {TIP_COLUMNS} FROM tips{self._where_sql(conditions)} "
+            f"ORDER BY date {order}, id {order} LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall()
+        if reverse:
+            rows.reverse()
+        return [_tip_from_row(row) for row in rows]
+
+    def get_summary_stats(self, start_date=None, end_date=None):
+        """Get summary statistics of tips, totalled per currency with GROUP BY."""
+        conditions, params = self._build_where(start_date, end_date)
+        groups = self._conn().execute(
+            f"SELECT currency, SUM(amount), COUNT(*), TOTAL(base_amount) FROM tips"
+            f"{self._where_sql(conditions)} GROUP BY currency",
+            params
+        )
+        return self._summarize_currency_groups(groups)
+
+    def get_trend(self, period="month", start_date=None, end_date=None):
+        """
+        Get tip totals per day or month, grouped directly on the tips table.
+
+        Like the MongoDB rollups, the periods containing start_date and
+        end_date are included in full.
+
+        Returns:
+            list: dicts with period start, tip count, base currency total and per-currency totals
+        """
+        # Length of the "YYYY-MM-DD" or "YYYY-MM" date prefix
+        width = 10 if period == "day" else 7
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date.strftime("%Y-%m-%d" if period == "day" else "%Y-%m"))
+        if end_date:
+            conditions.append(f"substr(date, 1, {width}) <= ?")
+            params.append(end_date.strftime("%Y-%m-%d" if period == "day" else "%Y-%m"))
+
+        rows = self._conn().execute(
+            f"SELECT substr(date, 1, {width}) AS period, currency, SUM(amount), COUNT(*), TOTAL(base_amount) "
+            f"FROM tips{self._where_sql(conditions)} GROUP BY period, currency ORDER BY period",
+            params
+        )
+
+        trend = []
+        for key, currency, amount, count, base_amount in rows:
+            if not trend or trend[-1]["key"] != key:
+                start = datetime.strptime(key, "%Y-%m-%d" if period == "day" else "%Y-%m")
+                trend.append({"key": key, "start": start, "count": 0, "base_amount": 0.0, "currency_totals": {}})
+            entry = trend[-1]
+            entry["count"] += count
+            entry["base_amount"] += base_amount
+            entry["currency_totals"][currency] = amount
+
+        for entry in trend:
+            del entry["key"]
+        return trend
+
+    def get_daily_totals(self, start_date=None, end_date=None, max_points=DAILY_TOTALS_MAX_POINTS):
+        """
+        Get base currency totals per day (or per bucket of days), grouped on the tips table.
+
+        Like the MongoDB day rollups, the days containing start_date and
+        end_date are included in full.
+        """
+        conditions = []
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date.strftime("%Y-%m-%d"))
+        if end_date:
+            conditions.append("date < ?")
+            params.append(_date_text(datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)))
+        where = self._where_sql(conditions)
+        first, last = self._conn().execute(f"SELECT MIN(date), MAX(date) FROM tips{where}", params).fetchone()
+        if first is None:
+            return {"bucket_days": 1, "points": []}
+
+        first_day = datetime.fromisoformat(first[:10])
+        bucket_days = self._bucket_days(first_day, datetime.fromisoformat(last[:10]), max_points)
+        groups = self._conn().execute(
+            f"SELECT CAST((julianday(substr(date, 1, 10)) - julianday(?)) / ? AS INTEGER) AS bucket, "
+            f"TOTAL(base_amount), COUNT(*) FROM tips{where} GROUP BY bucket ORDER BY bucket",
+            (first[:10], bucket_days, *params)
+        )
+        return {"bucket_days": bucket_days, "points": self._bucket_points(first_day, bucket_days, groups)}
+
+    def _has_tips(self, start_date=None, end_date=None):
+        """Check whether any tip falls in the date range."""
+        conditions, params = self._build_where(start_date, end_date)
+        return self._conn().execute(
+            f"SELECT 1 FROM tips{self._where_sql(conditions)} LIMIT 1", params
+        ).fetchone() is not None
+
+    def _iter_tips_by_date(self, start_date=None, end_date=None, ascending=True, batch_size=EXPORT_CHUNK_SIZE):
+        """Iterate tips in the date range ordered by date, fetching `batch_size` rows at a time."""
+        conditions, params = self._build_where(start_date, end_date)
+        order = "ASC" if ascending else "DESC"
+        cursor = self._conn().execute(
+            f"SELECT {TIP_COLUMNS} FROM tips{self._where_sql(conditions)} ORDER BY date {order}, id {order}",
+            params
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _tip_from_row(row)
+
+    def recalculate_base_amounts(self, progress_callback=None):
+        """
+        Recalculate all base amounts after base currency change.
+
+        Tips are converted with the rates of their own date: every rate period
+        of a currency is one UPDATE multiplying by that period's factor, all in
+        a single transaction.
+
+        Args:
+            progress_callback: Optional callable(done, total) receiving the number of tips processed
+
+        Returns:
+            int: Number of tips processed
+        """
+        counts = self._conn().execute("SELECT currency, COUNT(*) FROM tips GROUP BY currency").fetchall()
+        total = sum(count for _, count in counts)
+        done = 0
+
+        with self._conn() as conn:
+            for currency, count in counts:
+                for start, end, factor in self.currency_converter.base_factor_periods(currency):
+                    conditions = ["currency = ?"]
+                    params = [currency]
+                    if start is not None:
+                        conditions.append("date >= ?")
+                        params.append(_date_text(start))
+                    if end is not None:
+                        conditions.append("date < ?")
+                        params.append(_date_text(end))
+
+                    # A NULL factor (unknown currency) leaves base_amount NULL
+                    conn.execute(
+                        f"UPDATE tips SET base_amount = amount * ?{self._where_sql(conditions)}",
+                        (factor, *params)
+                    )
+
+                done += count
+                if progress_callback:
+                    progress_callback(done, total)
+
+        return total
\ No newline at end of file
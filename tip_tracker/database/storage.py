@@ -0,0 +1,405 @@
+"""Storage-independent interface for tip operations."""
+
+import csv
+import math
+from datetime import datetime, timedelta
+from itertools import islice
+from config import STORAGE_BACKEND
+
+# Column order of exported files
+EXPORT_FIELDS = ["_id", "amount", "currency", "date", "notes", "location", "base_amount"]
+
+# Rows per write when streaming exports
+EXPORT_CHUNK_SIZE = 5000
+
+# Rows validated and inserted per batch when importing
+IMPORT_CHUNK_SIZE = 5000
+
+# Most points returned by get_daily_totals; longer ranges are bucketed
+DAILY_TOTALS_MAX_POINTS = 365
+
+
+def create_db_manager(backend=STORAGE_BACKEND):
+    """
+    Create the database manager for a storage backend.
+    
+    Managers provide get_currencies_collection, get_settings_collection,
+    create_tip_operations and close_connection.
+    
+    Args:
+        backend: "mongodb" or "sqlite"
+    """
+    # Imported here so the SQLite backend runs without pymongo installed
+    if backend == "sqlite":
+        from database.sqlite_storage import SQLiteDatabaseManager
+        return SQLiteDatabaseManager()
+    if backend == "mongodb":
+        from database.db_manager import DatabaseManager
+        return DatabaseManager()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+class TipStorage:
+    """Base class for tip storage backends.
+    
+    Backends implement the query and write methods below with the same
+    arguments and return shapes, so the GUI works with any of them. Tips
+    are returned as dicts with "_id", "amount", "currency", "date",
+    "notes", "location" and "base_amount" keys. Exports are shared and
+    built on _has_tips and _iter_tips_by_date.
+    """
+    
+    def parse_tip_id(self, tip_id_text):
+        """Convert a tip ID shown in the GUI back to the stored ID type."""
+        raise NotImplementedError
+    
+    def add_tip(self, amount, currency, date=None, notes="", location=""):
+        """Add a new tip entry and return its ID."""
+        raise NotImplementedError
+    
+    def insert_tips(self, tips):
+        """
+        Insert complete tip dicts (including base_amount) in bulk.
+        
+        Tips whose import_key is already stored are skipped.
+        
+        Returns:
+            int: Number of tips inserted
+        """
+        raise NotImplementedError
+    
+    def update_tip(self, tip_id, amount=None, currency=None, date=None, notes=None, location=None):
+        """Update an existing tip entry and return the number of modified tips."""
+        raise NotImplementedError
+    
+    def update_tips(self, tip_ids, currency=None, notes=None, location=None):
+        """Set currency, notes and/or location on several tips and return the number modified."""
+        raise NotImplementedError
+    
+    def delete_tip(self, tip_id):
+        """Delete a tip by ID and return the number deleted."""
+        raise NotImplementedError
+    
+    def delete_tips(self, tip_ids):
+        """Delete several tips by ID and return the number deleted."""
+        raise NotImplementedError
+    
+    def get_tip(self, tip_id):
+        """Get one tip by ID, or None."""
+        raise NotImplementedError
+    
+    def get_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Retrieve tips with optional filters, newest first."""
+        raise NotImplementedError
+    
+    def count_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Count tips matching the filters."""
+        raise NotImplementedError
+    
+    def get_tips_page(self, page_size, start_date=None, end_date=None, currency=None, location=None,
+                      after=None, before=None, last=False, last_page_size=None, offset=0):
+        """Retrieve one page of tips (newest first) using (date, _id) keyset pagination.
+        
+        offset skips rows from the newest end, or from the oldest end with
+        last=True; it is only meant for jumps without a nearby keyset boundary.
+        """
+        raise NotImplementedError
+    
+    def get_summary_stats(self, start_date=None, end_date=None):
+        """Get summary statistics of tips, or None if there are none."""
+        raise NotImplementedError
+    
+    def get_trend(self, period="month", start_date=None, end_date=None):
+        """Get tip totals per day or month, oldest first."""
+        raise NotImplementedError
+    
+    def get_daily_totals(self, start_date=None, end_date=None, max_points=DAILY_TOTALS_MAX_POINTS):
+        """
+        Get base currency totals per day for charting, downsampled to at most `max_points`.
+        
+        Ranges longer than max_points days are summed into buckets of
+        several days, computed by the database.
+        
+        Returns:
+            dict: "bucket_days" (days per point) and "points", a list of dicts
+            with bucket start, base_amount and count, oldest first
+        """
+        raise NotImplementedError
+    
+    @staticmethod
+    def _bucket_days(first_day, last_day, max_points):
+        """Get the number of days per bucket so the range fits in max_points buckets."""
+        span = (last_day - first_day).days + 1
+        return max(1, math.ceil(span / max_points))
+    
+    @staticmethod
+    def _bucket_points(first_day, bucket_days, groups):
+        """Build get_daily_totals points from (bucket number, base_amount, count) tuples."""
+        return [
+            {"start": first_day + timedelta(days=int(bucket) * bucket_days), "base_amount": base_amount or 0.0,
+             "count": count}
+            for bucket, base_amount, count in groups
+        ]
+    
+    def recalculate_base_amounts(self, progress_callback=None):
+        """Recalculate all base amounts after base currency change and return the number of tips."""
+        raise NotImplementedError
+    
+    def _summarize_currency_groups(self, groups):
+        """
+        Build the get_summary_stats dict from per-currency totals.
+        
+        Args:
+            groups: Iterable of (currency, amount, count, base_amount) tuples
+            
+        Returns:
+            dict: Summary statistics, or None if there are no groups
+        """
+        currency_totals = {}
+        currency_counts = {}
+        total_base = 0
+        for currency, amount, count, base_amount in groups:
+            currency_totals[currency] = amount
+            currency_counts[currency] = count
+            total_base += base_amount or 0
+        
+        if not currency_counts:
+            return None
+            
+        # Add USD equivalents for pie chart, leaving out currencies without a rate
+        usd_equivalents = {}
+        if self.currency_converter.exchange_rates:
+            currencies = list(currency_totals.keys())
+            converted = self.currency_converter.convert_batch(
+                [currency_totals[curr] for curr in currencies], currencies, "USD", strict=False
+            )
+            for curr, usd_amount in zip(currencies, converted):
+                if usd_amount == usd_amount:  # Skip NaN
+                    usd_equivalents[curr] = float(usd_amount)
+        
+        return {
+            "total_tips": sum(currency_counts.values()),
+            "currency_totals": currency_totals,
+            "currency_counts": currency_counts,
+            "total_base_currency": total_base,
+            "base_currency": self.currency_converter.get_base_currency(),
+            "usd_equivalents": usd_equivalents
+        }
+    
+    def _has_tips(self, start_date=None, end_date=None):
+        """Check whether any tip falls in the date range."""
+        raise NotImplementedError
+    
+    def _iter_tips_by_date(self, start_date=None, end_date=None, ascending=True, batch_size=EXPORT_CHUNK_SIZE):
+        """Iterate tips in the date range ordered by date."""
+        raise NotImplementedError
+    
+    def import_tips(self, filename, chunk_size=IMPORT_CHUNK_SIZE, progress_callback=None):
+        """
+        Import tips from a CSV or Excel file.
+        
+        The file is read, validated and converted to base amounts in chunks
+        of `chunk_size` rows, and each chunk is written with one bulk insert.
+        Tips are matched on their natural key (date to the second, amount,
+        currency, location) against the stored tips of the same days, so
+        importing the same or an overlapping file again, or a file exported
+        by the app, skips the tips already stored, whether they were
+        imported or entered by hand. Each stored day is read once per import.
+        
+        Args:
+            filename: Path of a .csv, .xlsx or .xlsm file
+            chunk_size: Number of rows per chunk
+            progress_callback: Optional callable(done, total, result) called after each chunk
+            
+        Returns:
+            dict: Counts of rows read, tips inserted, duplicates, skipped zero
+            entries and invalid rows, plus (row number, reason) errors
+        """
+        # pandas is only needed for imports
+        from database.tip_import import read_chunks, check_columns, prepare_chunk, MAX_REPORTED_ERRORS
+        
+        result = {"read": 0, "inserted": 0, "duplicates": 0, "skipped": 0, "invalid": 0, "errors": []}
+        known_keys = set()  # Natural keys of the stored and imported tips on the loaded days
+        loaded_days = set()
+        first_row = 2  # Row 1 is the header
+        for frame, done, total in read_chunks(filename, chunk_size):
+            check_columns(frame)
+            tips, skipped, errors = prepare_chunk(frame, self.currency_converter, first_row)
+            
+            days = {tip["date"].date() for tip in tips} - loaded_days
+            known_keys |= self._stored_import_keys(days)
+            loaded_days |= days
+            new_tips = []
+            for tip in tips:
+                if tip["import_key"] not in known_keys:
+                    known_keys.add(tip["import_key"])
+                    new_tips.append(tip)
+            inserted = self.insert_tips(new_tips)
+            
+            result["read"] += len(frame)
+            result["inserted"] += inserted
+            result["duplicates"] += len(tips) - inserted
+            result["skipped"] += skipped
+            result["invalid"] += len(frame) - len(tips) - skipped
+            result["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(result["errors"])])
+            first_row += len(frame)
+            
+            if progress_callback:
+                progress_callback(done, total, result)
+        return result
+    
+    def _stored_import_keys(self, days):
+        """Get the natural keys of the stored tips on the given days, reading runs of consecutive days at once."""
+        from database.tip_import import import_key
+        
+        runs = []  # [first, last] day of each run
+        for day in sorted(days):
+            if runs and day == runs[-1][1] + timedelta(days=1):
+                runs[-1][1] = day
+            else:
+                runs.append([day, day])
+        
+        keys = set()
+        for first, last in runs:
+            start_date = datetime.combine(first, datetime.min.time())
+            end_date = datetime.combine(last, datetime.max.time())
+            for tip in self._iter_tips_by_date(start_date, end_date):
+                keys.add(import_key(tip["date"], tip["amount"], tip["currency"], tip.get("location")))
+        return keys
+    
+    def export_to_csv(self, filename, start_date=None, end_date=None, include_zero_days=True):
+        """
+        Export tips to CSV file with option to include zero values for missing dates.
+        
+        Args:
+            filename: Path to save the CSV file
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            include_zero_days: If True, includes a single entry with 0 amount for dates with no tips
+            
+        Returns:
+            bool: True if export successful, False otherwise
+        """
+        return self.export_tips(filename, start_date, end_date, include_zero_days, file_format="csv")
+    
+    def export_tips(self, filename, start_date=None, end_date=None, include_zero_days=True,
+                    file_format="csv", chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Stream tips to a CSV or Parquet file.
+        
+        Tips are read from a cursor and written in chunks of `chunk_size`
+        rows, so memory use does not grow with the length of the history.
+        
+        Args:
+            filename: Path to save the file
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            include_zero_days: If True, includes a single entry with 0 amount for dates with no tips
+            file_format: "csv" or "parquet" (Parquet requires pyarrow)
+            chunk_size: Number of rows written per chunk
+            
+        Returns:
+            bool: True if export successful, False otherwise
+        """
+        if not self._has_tips(start_date, end_date):
+            return False
+        
+        rows = self.iter_export_rows(start_date, end_date, include_zero_days, chunk_size)
+        
+        if file_format == "csv":
+            self._write_csv(filename, rows, chunk_size)
+        elif file_format == "parquet":
+            self._write_parquet(filename, rows, chunk_size)
+        else:
+            raise ValueError(f"Unsupported export format: {file_format}")
+        return True
+    
+    def iter_export_rows(self, start_date=None, end_date=None, include_zero_days=True,
+                         batch_size=EXPORT_CHUNK_SIZE):
+        """
+        Yield the rows export_tips writes, as tuples in EXPORT_FIELDS order.
+        
+        Tips are read from a cursor in batches of `batch_size`, so callers
+        can stream the export to another format.
+        """
+        if not include_zero_days:
+            cursor = self._iter_tips_by_date(start_date, end_date, ascending=False, batch_size=batch_size)
+            for tip in cursor:
+                yield self._export_row(tip)
+            return
+        
+        # Walk tips in date order and emit a zero entry for every day without tips
+        cursor = self._iter_tips_by_date(start_date, end_date, ascending=True, batch_size=batch_size)
+        default_currency = self.currency_converter.get_base_currency()
+        next_day = start_date.date() if start_date else None
+        one_day = timedelta(days=1)
+        
+        for tip in cursor:
+            tip_day = tip['date'].date()
+            if next_day is None:
+                next_day = tip_day
+            if not default_currency:
+                default_currency = tip['currency']
+            
+            while next_day < tip_day:
+                yield self._zero_row(next_day, default_currency)
+                next_day += one_day
+            
+            yield self._export_row(tip)
+            next_day = max(next_day, tip_day + one_day)
+        
+        if end_date:
+            while next_day <= end_date.date():
+                yield self._zero_row(next_day, default_currency)
+                next_day += one_day
+    
+    @staticmethod
+    def _export_row(tip):
+        """Convert a tip document to an export row."""
+        return tuple(tip.get(field) for field in EXPORT_FIELDS)
+    
+    @staticmethod
+    def _zero_row(day, currency):
+        """Build the placeholder row for a day without tips."""
+        return (None, 0.0, currency, datetime.combine(day, datetime.min.time()),
+                'Auto-generated zero entry', '', 0.0)
+    
+    @staticmethod
+    def _write_csv(filename, rows, chunk_size):
+        """Write rows to CSV through a buffered file in chunks."""
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_FIELDS)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+    
+    @staticmethod
+    def _write_parquet(filename, rows, chunk_size):
+        """Write rows to a Parquet file one row group per chunk."""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+        
+        schema = pa.schema([
+            ("_id", pa.string()),
+            ("amount", pa.float64()),
+            ("currency", pa.string()),
+            ("date", pa.timestamp("ms")),
+            ("notes", pa.string()),
+            ("location", pa.string()),
+            ("base_amount", pa.float64())
+        ])
+        
+        with pq.ParquetWriter(filename, schema) as writer:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                columns = [list(column) for column in zip(*chunk)]
+                columns[0] = [str(tip_id) if tip_id is not None else None for tip_id in columns[0]]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
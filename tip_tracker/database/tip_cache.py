@@ -0,0 +1,495 @@
+"""In-memory cache of the tip columns behind counts, list pages and statistics.
+
+Enabled with TIP_CACHE in config. Instead of decoded documents the cache
+keeps one numpy array per field, sorted by (date, _id), at about 42 bytes
+per tip: dates as int64 microseconds, amounts and base amounts as float64,
+currencies and location keys as small integer codes into lookup lists, and
+each 12-byte ObjectId split into a uint32 and a uint64.
+
+Writes made through CachedTipOperations update the cache directly. Changes
+from other clients arrive through a change stream, or, on standalone servers
+(which have no change streams), by reloading every TIP_CACHE_POLL_INTERVAL
+seconds.
+"""
+
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pymongo.errors
+from bson.objectid import ObjectId
+from config import LOCATION_TEXT_SEARCH, TIP_CACHE_POLL_INTERVAL
+from database.storage import DAILY_TOTALS_MAX_POINTS
+from database.tip_operations import TipOperations
+from utils.location import location_key
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DAY_US = 86400 * 1000000
+
+# Tip fields held by the cache
+CACHE_FIELDS = {"amount": 1, "currency": 1, "date": 1, "base_amount": 1, "location_key": 1}
+
+# Cached columns and their types
+COLUMN_TYPES = {
+    "id_hi": np.uint32,  # ObjectId bytes 0-3 (creation time)
+    "id_lo": np.uint64,  # ObjectId bytes 4-11
+    "date": np.int64,  # Microseconds since the epoch
+    "amount": np.float64,
+    "base_amount": np.float64,  # NaN when the tip has no base amount
+    "currency": np.int16,  # Index into TipCache.currencies
+    "location": np.int32  # Index into TipCache.location_keys
+}
+
+
+def _split_id(tip_id):
+    """Split an ObjectId into its (id_hi, id_lo) integers."""
+    binary = tip_id.binary
+    return int.from_bytes(binary[:4], "big"), int.from_bytes(binary[4:], "big")
+
+
+def _join_id(id_hi, id_lo):
+    """Rebuild an ObjectId from its (id_hi, id_lo) integers."""
+    return ObjectId(int(id_hi).to_bytes(4, "big") + int(id_lo).to_bytes(8, "big"))
+
+
+def _to_us(date):
+    """Convert a datetime to microseconds since the epoch."""
+    return (date - EPOCH) // MICROSECOND
+
+
+class TipCache:
+    """Columnar copy of the tips collection, kept current in the background."""
+
+    def __init__(self, tips_collection, poll_interval=TIP_CACHE_POLL_INTERVAL):
+        """Create an empty cache; tips are loaded on first use."""
+        self.tips_collection = tips_collection
+        self.poll_interval = poll_interval
+
+        self.currencies = []
+        self.location_keys = []
+        self._currency_codes = {}
+        self._location_codes = {}
+
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # One load at a time
+        self._columns = self._build_columns([])
+        self._added = []  # Rows not merged into the columns yet
+        self._loaded = False
+        self._loading = False
+        self._changes_while_loading = []
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @staticmethod
+    def _code(value, codes, values):
+        """Get the integer code of a currency or location key, adding it if new."""
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def _row(self, tip, lookups=None):
+        """
+        Convert a tip document to a tuple of column values.
+
+        lookups is a (currency_codes, currencies, location_codes, location_keys)
+        tuple of the code tables to use; the cache's own by default.
+        """
+        currency_codes, currencies, location_codes, location_keys = lookups or (
+            self._currency_codes, self.currencies, self._location_codes, self.location_keys
+        )
+        id_hi, id_lo = _split_id(tip["_id"])
+        base_amount = tip.get("base_amount")
+        return (
+            id_hi, id_lo, _to_us(tip["date"]), float(tip.get("amount") or 0.0),
+            np.nan if base_amount is None else float(base_amount),
+            self._code(tip.get("currency"), currency_codes, currencies),
+            self._code(tip.get("location_key") or "", location_codes, location_keys)
+        )
+
+    @staticmethod
+    def _build_columns(rows):
+        """Build the column arrays from row tuples."""
+        values = list(zip(*rows)) or [()] * len(COLUMN_TYPES)
+        return {
+            name: np.array(column, dtype=dtype)
+            for (name, dtype), column in zip(COLUMN_TYPES.items(), values)
+        }
+
+    @staticmethod
+    def _sorted(columns):
+        """Sort columns by (date, _id)."""
+        order = np.lexsort((columns["id_lo"], columns["id_hi"], columns["date"]))
+        return {name: column[order] for name, column in columns.items()}
+
+    def load(self):
+        """Read every tip into the cache, replacing its contents."""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        """Read every tip into the cache (load lock held)."""
+        with self._lock:
+            self._loading = True
+            self._changes_while_loading = []
+
+        # Read without the lock into fresh code tables, so reads and writes carry on meanwhile
+        lookups = ({}, [], {}, [])
+        try:
+            rows = [self._row(tip, lookups) for tip in self.tips_collection.find({}, CACHE_FIELDS).batch_size(10000)]
+            columns = self._sorted(self._build_columns(rows))
+        except Exception:
+            with self._lock:
+                self._loading = False
+            raise
+
+        with self._lock:
+            self._currency_codes, self.currencies, self._location_codes, self.location_keys = lookups
+            self._columns = columns
+            self._added = []
+            self._loaded = True
+            self._loading = False
+            # Writes made during the read may be missing from it
+            for action, args in self._changes_while_loading:
+                action(*args)
+            self._changes_while_loading = []
+
+    def ensure_loaded(self):
+        """Load the cache if needed and start following changes."""
+        with self._lock:
+            if self._loaded:
+                return
+            if self._watcher is None:
+                # Started first so the change stream opens about when the load starts
+                self._stop.clear()
+                self._watcher = threading.Thread(target=self._follow_changes, name="tip-cache", daemon=True)
+                self._watcher.start()
+        with self._load_lock:
+            # Another reader may have loaded the cache meanwhile
+            if not self._loaded:
+                self._load()
+
+    def invalidate(self):
+        """Drop the cached tips; they are read again on next use."""
+        with self._lock:
+            if self._loading:
+                self._changes_while_loading.append((self.invalidate, ()))
+            self._loaded = False
+            self._columns = self._build_columns([])
+            self._added = []
+
+    def stop(self):
+        """Stop following changes."""
+        self._stop.set()
+
+    def upsert(self, tips):
+        """Add tip documents to the cache, replacing cached tips with the same _id."""
+        tips = list(tips)
+        with self._lock:
+            if self._loading:
+                self._changes_while_loading.append((self.upsert, (tips,)))
+            if not self._loaded or not tips:
+                return
+            self._drop({_split_id(tip["_id"]) for tip in tips})
+            self._added.extend(self._row(tip) for tip in tips)
+
+    def remove(self, tip_ids):
+        """Remove tips from the cache by _id."""
+        tip_ids = list(tip_ids)
+        with self._lock:
+            if self._loading:
+                self._changes_while_loading.append((self.remove, (tip_ids,)))
+            if self._loaded and tip_ids:
+                self._drop({_split_id(tip_id) for tip_id in tip_ids})
+
+    def _drop(self, keys):
+        """Remove the rows with the given (id_hi, id_lo) keys (lock held)."""
+        columns = self._merged()
+        # id_lo alone is practically unique; confirm the few candidates with id_hi
+        candidates = np.flatnonzero(np.isin(columns["id_lo"], np.array([lo for _, lo in keys], dtype=np.uint64)))
+        drop = [i for i in candidates if (int(columns["id_hi"][i]), int(columns["id_lo"][i])) in keys]
+        if drop:
+            keep = np.ones(len(columns["date"]), dtype=bool)
+            keep[drop] = False
+            self._columns = {name: column[keep] for name, column in columns.items()}
+
+    def _merged(self):
+        """Get the columns with the rows added since the last merge sorted in (lock held)."""
+        if self._added:
+            added = self._build_columns(self._added)
+            self._columns = self._sorted({
+                name: np.concatenate([self._columns[name], added[name]]) for name in COLUMN_TYPES
+            })
+            self._added = []
+        return self._columns
+
+    def _snapshot(self):
+        """Get the current columns and lookup lists for a read."""
+        self.ensure_loaded()
+        with self._lock:
+            # Arrays are replaced, never modified in place, so readers can use them unlocked
+            return self._merged(), list(self.currencies), list(self.location_keys)
+
+    @staticmethod
+    def _mask(columns, currencies, location_keys, start_date=None, end_date=None, currency=None, location=None):
+        """Get a boolean row mask for the tip filters, or None when nothing is filtered."""
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if start_date:
+            narrow(columns["date"] >= _to_us(start_date))
+        if end_date:
+            narrow(columns["date"] <= _to_us(end_date))
+        if currency:
+            code = currencies.index(currency) if currency in currencies else -1
+            narrow(columns["currency"] == code)
+        if location:
+            prefix = location_key(location)
+            codes = [code for code, key in enumerate(location_keys) if key.startswith(prefix)]
+            narrow(np.isin(columns["location"], codes))
+        return mask
+
+    def count(self, start_date=None, end_date=None, currency=None, location=None):
+        """Count tips matching the filters."""
+        columns, currencies, location_keys = self._snapshot()
+        mask = self._mask(columns, currencies, location_keys, start_date, end_date, currency, location)
+        return len(columns["date"]) if mask is None else int(np.count_nonzero(mask))
+
+    def page_ids(self, page_size, start_date=None, end_date=None, currency=None, location=None,
+                 after=None, before=None, last=False, last_page_size=None, offset=0):
+        """
+        Get the tip IDs of a list page, with the arguments of TipStorage.get_tips_page.
+
+        Returns:
+            list: ObjectIds of the page, newest first
+        """
+        columns, currencies, location_keys = self._snapshot()
+        mask = self._mask(columns, currencies, location_keys, start_date, end_date, currency, location)
+        rows = np.arange(len(columns["date"])) if mask is None else np.flatnonzero(mask)
+
+        if after is not None:
+            # Matching rows before the boundary, the newest page_size of them
+            page = rows[rows < self._position(columns, after, "left")][-page_size:]
+        elif before is not None:
+            page = rows[rows >= self._position(columns, before, "right")][:page_size]
+        elif last:
+            page = rows[offset:offset + (last_page_size or page_size)]
+        else:
+            page = rows[:len(rows) - offset][-page_size:] if offset < len(rows) else rows[:0]
+
+        return [_join_id(columns["id_hi"][i], columns["id_lo"][i]) for i in page[::-1]]
+
+    @staticmethod
+    def _position(columns, boundary, side):
+        """Find the row position of a (date, _id) keyset boundary in the sorted columns."""
+        date, tip_id = boundary
+        date_us = _to_us(date)
+        first = int(np.searchsorted(columns["date"], date_us, "left"))
+        end = int(np.searchsorted(columns["date"], date_us, "right"))
+        # Rows on the same date are few; compare their IDs directly
+        key = _split_id(tip_id)
+        same_date = zip(columns["id_hi"][first:end].tolist(), columns["id_lo"][first:end].tolist())
+        if side == "left":
+            return first + sum(1 for row_key in same_date if row_key < key)
+        return first + sum(1 for row_key in same_date if row_key <= key)
+
+    def currency_groups(self, start_date=None, end_date=None):
+        """
+        Total the tips in a date range per currency.
+
+        Returns:
+            list: (currency, amount, count, base_amount) tuples
+        """
+        columns, currencies, location_keys = self._snapshot()
+        mask = self._mask(columns, currencies, location_keys, start_date, end_date)
+        codes, amounts, base_amounts = columns["currency"], columns["amount"], columns["base_amount"]
+        if mask is not None:
+            codes, amounts, base_amounts = codes[mask], amounts[mask], base_amounts[mask]
+
+        counts = np.bincount(codes, minlength=len(currencies))
+        amount_sums = np.bincount(codes, weights=amounts, minlength=len(currencies))
+        # Missing base amounts count as zero, like $sum
+        base_sums = np.bincount(codes, weights=np.nan_to_num(base_amounts), minlength=len(currencies))
+        return [
+            (currencies[code], float(amount_sums[code]), int(counts[code]), float(base_sums[code]))
+            for code in np.flatnonzero(counts)
+        ]
+
+    def day_totals(self, start_date=None, end_date=None):
+        """
+        Get the day number (days since the epoch) and base amount of each tip on the
+        whole days from start_date's to end_date's.
+
+        Returns:
+            tuple: (days, base_amounts) arrays
+        """
+        columns, _, _ = self._snapshot()
+        days = columns["date"] // DAY_US
+        base_amounts = np.nan_to_num(columns["base_amount"])
+        if start_date or end_date:
+            mask = np.ones(len(days), dtype=bool)
+            if start_date:
+                mask &= days >= _to_us(start_date) // DAY_US
+            if end_date:
+                mask &= days <= _to_us(end_date) // DAY_US
+            days, base_amounts = days[mask], base_amounts[mask]
+        return days, base_amounts
+
+    def _follow_changes(self):
+        """Watcher thread: apply change stream events, or reload periodically without change streams."""
+        reopened = False
+        while not self._stop.is_set():
+            try:
+                with self.tips_collection.watch(full_document="updateLookup", max_await_time_ms=1000) as stream:
+                    if reopened:
+                        # Changes made while the stream was down are missing
+                        self._reload_quietly()
+                    reopened = True
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self._apply_change(change)
+            except pymongo.errors.OperationFailure:
+                # Standalone server: no change streams
+                while not self._stop.wait(self.poll_interval):
+                    self._reload_quietly()
+                return
+            except Exception as e:
+                print(f"Tip cache lost its change stream: {e}")
+                if self._stop.wait(self.poll_interval):
+                    return
+                self._reload_quietly()
+
+    def _reload_quietly(self):
+        """Reload from the watcher thread, keeping the old contents if the server is unreachable."""
+        try:
+            self.load()
+        except Exception as e:
+            print(f"Tip cache reload failed: {e}")
+
+    def _apply_change(self, change):
+        """Apply one change stream event."""
+        operation = change["operationType"]
+        if operation in ("insert", "replace", "update"):
+            tip = change.get("fullDocument")
+            if tip is not None:
+                self.upsert([tip])
+            else:
+                # Deleted again before the lookup
+                self.remove([change["documentKey"]["_id"]])
+        elif operation == "delete":
+            self.remove([change["documentKey"]["_id"]])
+        elif operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.invalidate()
+
+
+class CachedTipOperations(TipOperations):
+    """TipOperations serving counts, list pages and statistics from a TipCache."""
+
+    def __init__(self, db_manager, currency_converter, cache):
+        """Initialize tip operations reading from `cache`."""
+        super().__init__(db_manager, currency_converter)
+        self.cache = cache
+
+    def _refresh(self, tip_ids):
+        """Read tips back into the cache after they were written."""
+        tip_ids = list(tip_ids)
+        tips = list(self.tips_collection.find({"_id": {"$in": tip_ids}}, CACHE_FIELDS))
+        found = {tip["_id"] for tip in tips}
+        self.cache.upsert(tips)
+        self.cache.remove([tip_id for tip_id in tip_ids if tip_id not in found])
+
+    def add_tip(self, amount, currency, date=None, notes="", location=""):
+        """Add a tip and cache it unless it was journaled."""
+        tip_id = super().add_tip(amount, currency, date, notes, location)
+        if self.journal.get(tip_id) is None:
+            self._refresh([tip_id])
+        return tip_id
+
+    def insert_tips(self, tips):
+        """Insert tips in bulk; the cache is read again on next use."""
+        inserted = super().insert_tips(tips)
+        if inserted:
+            self.cache.invalidate()
+        return inserted
+
+    def update_tip(self, tip_id, amount=None, currency=None, date=None, notes=None, location=None):
+        """Update a tip and its cached copy; journaled tips are not cached yet."""
+        modified = super().update_tip(tip_id, amount, currency, date, notes, location)
+        if modified and self.journal.get(tip_id) is None:
+            self._refresh([tip_id])
+        return modified
+
+    def update_tips(self, tip_ids, currency=None, notes=None, location=None):
+        """Update several tips and their cached copies."""
+        tip_ids = list(tip_ids)
+        modified = super().update_tips(tip_ids, currency, notes, location)
+        written = [tip_id for tip_id in tip_ids if self.journal.get(tip_id) is None]
+        if modified and written:
+            self._refresh(written)
+        return modified
+
+    def delete_tip(self, tip_id):
+        """Delete a tip and drop it from the cache."""
+        deleted = super().delete_tip(tip_id)
+        self.cache.remove([tip_id])
+        return deleted
+
+    def delete_tips(self, tip_ids):
+        """Delete several tips and drop them from the cache."""
+        tip_ids = list(tip_ids)
+        deleted = super().delete_tips(tip_ids)
+        self.cache.remove(tip_ids)
+        return deleted
+
+    def recalculate_base_amounts(self, *args, **kwargs):
+        """Recalculate base amounts; the cache is read again on next use."""
+        total = super().recalculate_base_amounts(*args, **kwargs)
+        self.cache.invalidate()
+        return total
+
+    def count_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Count tips matching the filters in memory."""
+        if location and LOCATION_TEXT_SEARCH:
+            return super().count_tips(start_date, end_date, currency, location)
+        return self.cache.count(start_date, end_date, currency, location)
+
+    def get_tips_page(self, page_size, start_date=None, end_date=None, currency=None, location=None,
+                      after=None, before=None, last=False, last_page_size=None, offset=0):
+        """
+        Retrieve one page of tips, choosing its tips in memory.
+
+        Only the page's documents are fetched, by _id, so offsets cost no
+        skipped index entries.
+        """
+        if location and LOCATION_TEXT_SEARCH:
+            return super().get_tips_page(page_size, start_date, end_date, currency, location,
+                                         after, before, last, last_page_size, offset)
+
+        tip_ids = self.cache.page_ids(page_size, start_date, end_date, currency, location,
+                                      after, before, last, last_page_size, offset)
+        tips = {tip["_id"]: tip for tip in self.tips_collection.find({"_id": {"$in": tip_ids}})}
+        return [tips[tip_id] for tip_id in tip_ids if tip_id in tips]
+
+    def get_summary_stats(self, start_date=None, end_date=None):
+        """Get summary statistics of tips from memory."""
+        return self._summarize_currency_groups(self.cache.currency_groups(start_date, end_date))
+
+    def get_daily_totals(self, start_date=None, end_date=None, max_points=DAILY_TOTALS_MAX_POINTS):
+        """Get base currency totals per day (or per bucket of days) from memory."""
+        days, base_amounts = self.cache.day_totals(start_date, end_date)
+        if not len(days):
+            return {"bucket_days": 1, "points": []}
+
+        first_day = EPOCH + timedelta(days=int(days.min()))
+        last_day = EPOCH + timedelta(days=int(days.max()))
+        bucket_days = self._bucket_days(first_day, last_day, max_points)
+        buckets = (days - days.min()) // bucket_days
+        counts = np.bincount(buckets)
+        sums = np.bincount(buckets, weights=base_amounts)
+        groups = [(bucket, float(sums[bucket]), int(counts[bucket])) for bucket in np.flatnonzero(counts)]
+        return {"bucket_days": bucket_days, "points": self._bucket_points(first_day, bucket_days, groups)}
\ No newline at end of file
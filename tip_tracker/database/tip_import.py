@@ -0,0 +1,149 @@
+"""Chunked reading and validation of tip files for TipStorage.import_tips.
+
+Files need amount, currency and date columns; notes and location are
+optional. Header names are matched case-insensitively, and other columns
+are ignored, so files written by export_tips can be imported again.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from utils.location import location_key
+
+REQUIRED_COLUMNS = ("amount", "currency", "date")
+OPTIONAL_COLUMNS = ("notes", "location")
+
+# Invalid rows reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def import_key(date, amount, currency, location):
+    """Natural key of an imported tip; the same tip in two files gets the same key."""
+    return f"{date:%Y-%m-%dT%H:%M:%S}|{amount:.2f}|{currency}|{location_key(location)}"
+
+
+def read_chunks(filename, chunk_size):
+    """
+    Read a CSV or Excel file in DataFrame chunks.
+
+    Yields:
+        (frame, done, total): a chunk with lowercase column names, and the
+        progress through the file (bytes for CSV, rows for Excel)
+    """
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_excel_chunks(filename, chunk_size)
+        return
+
+    total = os.path.getsize(filename)
+    with open(filename, "r", newline="", encoding="utf-8-sig") as f:
+        reader = pd.read_csv(f, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        for frame in reader:
+            frame.columns = [str(column).strip().lower() for column in frame.columns]
+            yield frame, f.tell(), total
+
+
+def _read_excel_chunks(filename, chunk_size):
+    """Stream the first worksheet of an Excel file in chunks."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Excel import requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        total = workbook.worksheets[0].max_row or 0
+        header = [str(column).strip().lower() if column is not None else "" for column in next(rows, ())]
+
+        done = 1
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                done += len(chunk)
+                yield pd.DataFrame(chunk, columns=header, dtype=object), done, max(total, done)
+                chunk = []
+        if chunk:
+            done += len(chunk)
+            yield pd.DataFrame(chunk, columns=header, dtype=object), done, max(total, done)
+    finally:
+        workbook.close()
+
+
+def check_columns(frame):
+    """Raise ValueError if a required column is missing."""
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+
+def prepare_chunk(frame, currency_converter, first_row):
+    """
+    Validate a chunk and convert its amounts to the base currency.
+
+    Parsing, validation and conversion work on whole columns. Rows
+    with a missing or non-positive amount, an unparseable date or a
+    currency without an exchange rate are rejected. Zero-amount rows
+    created by include_zero_days exports are skipped silently.
+
+    Args:
+        frame: Chunk from read_chunks
+        currency_converter: Converter used for the base amounts
+        first_row: File row number of the chunk's first row, for error messages
+
+    Returns:
+        (tips, skipped, errors): tip dicts ready for insert_tips, the number
+        of skipped rows and a list of (row number, reason) tuples
+    """
+    amounts = pd.to_numeric(frame["amount"], errors="coerce").astype(float)
+    dates = pd.to_datetime(frame["date"], errors="coerce")
+    if getattr(dates.dt, "tz", None) is not None:
+        dates = dates.dt.tz_convert(None)
+    currencies = frame["currency"].fillna("").astype(str).str.strip().str.upper()
+    texts = {
+        column: frame[column].fillna("").astype(str).str.strip() if column in frame.columns else
+        pd.Series("", index=frame.index)
+        for column in OPTIONAL_COLUMNS
+    }
+
+    known = set(currency_converter.currency_index) | {currency_converter.get_base_currency()}
+    checks = [
+        (amounts.isna(), "invalid amount"),
+        (amounts <= 0, "amount must be greater than zero"),
+        (dates.isna(), "invalid date"),
+        (currencies == "", "missing currency"),
+        # Without any rates, tips are stored with no base amount as add_tip does
+        (~currencies.isin(known) if currency_converter.currency_index else pd.Series(False, index=frame.index),
+         "unknown currency")
+    ]
+
+    zero_entries = (amounts == 0) & texts["notes"].str.startswith("Auto-generated")
+    valid = ~zero_entries
+    errors = []
+    row_numbers = np.arange(first_row, first_row + len(frame))
+    for failed, reason in checks:
+        failed = failed & valid
+        for row in row_numbers[failed.to_numpy()][:MAX_REPORTED_ERRORS]:
+            errors.append((int(row), reason))
+        valid &= ~failed
+
+    base_amounts = currency_converter.convert_batch_to_base(
+        amounts[valid].to_numpy(), currencies[valid].to_numpy(), dates[valid].to_numpy()
+    )
+
+    tips = []
+    for amount, currency, date, notes, location, base_amount in zip(
+        amounts[valid].tolist(), currencies[valid].tolist(), dates[valid].dt.to_pydatetime(),
+        texts["notes"][valid].tolist(), texts["location"][valid].tolist(), base_amounts.tolist()
+    ):
+        tips.append({
+            "amount": amount,
+            "currency": currency,
+            "date": date,
+            "notes": notes,
+            "location": location,
+            "base_amount": None if base_amount != base_amount else base_amount,  # NaN -> None
+            "import_key": import_key(date, amount, currency, location)
+        })
+
+    return tips, int(zero_entries.sum()), errors
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""Append-only journal of tips that could not be written to MongoDB.
+
+Each tip is one JSON line, flushed to disk before add_tip returns. Tips
+carry the ObjectId they were given when they were entered, so replaying a
+batch that was already written only hits duplicate _id errors, which
+TipOperations.insert_tips skips.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from bson.objectid import ObjectId
+from config import JOURNAL_FLUSH_INTERVAL, JOURNAL_FLUSH_BATCH
+
+# Fields kept for a journaled tip; location_key is derived again on insert
+JOURNAL_FIELDS = ("amount", "currency", "date", "notes", "location", "base_amount")
+
+
+def _encode(tip):
+    """Convert a tip dict to a JSON line."""
+    record = {field: tip.get(field) for field in JOURNAL_FIELDS}
+    record["_id"] = str(tip["_id"])
+    record["date"] = tip["date"].isoformat()
+    return json.dumps(record) + "\n"
+
+
+def _decode(line):
+    """Convert a JSON line back to a tip dict."""
+    tip = json.loads(line)
+    tip["_id"] = ObjectId(tip["_id"])
+    tip["date"] = datetime.fromisoformat(tip["date"])
+    return tip
+
+
+class TipJournal:
+    """Line-delimited file of tips waiting to be written, with a background flusher."""
+
+    def __init__(self, path, flush_interval=JOURNAL_FLUSH_INTERVAL):
+        """Open the journal and load tips left over from an earlier run."""
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()  # Guards the pending tips, the file and the flusher
+        self._replay_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        self._pending = {}  # _id -> tip, in journal order
+        self._load()
+
+    def _load(self):
+        """Read the pending tips from the journal file."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    tip = _decode(line)
+                except (ValueError, KeyError, TypeError) as e:
+                    # A line cut short by a crash while it was being written
+                    print(f"Skipping unreadable tip journal line {number}: {e}")
+                    continue
+                self._pending[tip["_id"]] = tip
+
+    def __len__(self):
+        """Number of tips waiting to be written."""
+        with self._lock:
+            return len(self._pending)
+
+    def get(self, tip_id):
+        """Get a pending tip by ID, or None."""
+        with self._lock:
+            tip = self._pending.get(tip_id)
+            return dict(tip) if tip else None
+
+    def append(self, tip):
+        """Write a tip (with its _id already set) to the journal and flush it to disk."""
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(_encode(tip))
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending[tip["_id"]] = dict(tip)
+
+    def update(self, tip_id, changes):
+        """
+        Edit a pending tip in place.
+
+        Waits for a running replay, so the edit is never lost to a batch
+        that was read before it; a tip written by that replay is no longer
+        pending and is left to the caller to update in the database.
+
+        Args:
+            tip_id: ID of the tip
+            changes: Callable receiving the pending tip and returning the fields to set
+
+        Returns:
+            bool: True if the tip was pending and has been edited
+        """
+        with self._replay_lock, self._lock:
+            tip = self._pending.get(tip_id)
+            if tip is None:
+                return False
+            tip.update(changes(dict(tip)))
+            self._rewrite()
+            return True
+
+    def remove(self, tip_ids):
+        """
+        Drop pending tips, so they are never written; waits for a running replay like update.
+
+        Returns:
+            set: IDs of the tips that were pending
+        """
+        with self._replay_lock, self._lock:
+            removed = {tip_id for tip_id in tip_ids if self._pending.pop(tip_id, None) is not None}
+            if removed:
+                self._rewrite()
+            return removed
+
+    def _rewrite(self):
+        """Replace the journal file with the pending tips (lock held)."""
+        if not self._pending:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(_encode(tip) for tip in self._pending.values())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def replay(self, insert, batch_size=JOURNAL_FLUSH_BATCH):
+        """
+        Write the pending tips in batches and drop them from the journal.
+
+        Tips journaled while the replay runs are left for the next one. If
+        insert raises, the tips of the failed batch and after stay journaled.
+
+        Args:
+            insert: Callable receiving a list of tip dicts, e.g. TipOperations.insert_tips
+            batch_size: Number of tips per insert call
+
+        Returns:
+            int: Number of tips taken off the journal
+        """
+        with self._replay_lock:
+            with self._lock:
+                tips = list(self._pending.values())
+
+            replayed = 0
+            for start in range(0, len(tips), batch_size):
+                batch = tips[start:start + batch_size]
+                insert([dict(tip) for tip in batch])
+                with self._lock:
+                    for tip in batch:
+                        self._pending.pop(tip["_id"], None)
+                    self._rewrite()
+                replayed += len(batch)
+            return replayed
+
+    def start_flusher(self, flush):
+        """
+        Run flush() every flush_interval seconds on a daemon thread while tips are pending.
+
+        Does nothing if the flusher is already running. Errors (usually the
+        server still being unreachable) are reported and retried later.
+        """
+        with self._lock:
+            if self._flusher is not None or not self._pending:
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run_flusher, args=(flush,),
+                                             name="tip-journal", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self, flush):
+        """Flusher thread: retry until the journal is empty or the flusher is stopped."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                flush()
+            except Exception as e:
+                print(f"Journaled tips not written yet: {e}")
+            with self._lock:
+                if not self._pending:
+                    self._flusher = None
+                    return
+        with self._lock:
+            self._flusher = None
+
+    def stop_flusher(self):
+        """Stop the flusher thread; pending tips stay in the journal file."""
+        self._stop.set()
\ No newline at end of file
@@ -1,37 +1,155 @@
 """Tip-related database operations."""
 
-from datetime import datetime, timedelta
+import re
+from datetime import datetime
 import pymongo
-import pandas as pd
+import pymongo.errors
 from bson.objectid import ObjectId
+from database.rollup_operations import RollupOperations
+from database.storage import TipStorage, EXPORT_CHUNK_SIZE, DAILY_TOTALS_MAX_POINTS
+from config import LOCATION_TEXT_SEARCH, JOURNAL_FLUSH_BATCH
+from utils.currency import UnknownCurrencyError
+from utils.location import location_key
 
+# Updates per bulk_write when rebasing without pipeline updates
+REBASE_CHUNK_SIZE = 1000
 
-class TipOperations:
+# Server error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Tip fields the rollups are computed from
+ROLLUP_FIELDS = {"amount": 1, "currency": 1, "date": 1, "base_amount": 1}
+
+
+class TipOperations(TipStorage):
+    """Tip storage on MongoDB."""
+    
     def __init__(self, db_manager, currency_converter):
         """Initialize tip operations with database manager and currency converter."""
+        self.db_manager = db_manager
         self.tips_collection = db_manager.get_tips_collection()
         self.currency_converter = currency_converter
+        self.rollups = RollupOperations(db_manager)
+        
+        # Tips journaled during an earlier outage are written once the server is reachable
+        self.journal = db_manager.journal
+        self.journal.start_flusher(self.flush_journal)
     
     def add_tip(self, amount, currency, date=None, notes="", location=""):
-        """Add a new tip entry to database."""
+        """
+        Add a new tip entry to database.
+        
+        If the server cannot be reached, or older tips are still waiting in
+        the journal, the tip is journaled and written later by the flusher.
+        """
         if date is None:
             date = datetime.now()
             
         tip_data = {
+            # Assigned here so a journaled tip keeps its ID when it is written
+            "_id": ObjectId(),
             "amount": float(amount),
             "currency": currency,
             "date": date,
             "notes": notes,
             "location": location,
-            # Store the equivalent in base currency for easier reporting
-            "base_amount": self.currency_converter.convert_to_base(float(amount), currency)
+            "location_key": location_key(location),
+            # Store the equivalent in base currency (at the tip date's rates) for easier reporting
+            "base_amount": self.currency_converter.convert_to_base(float(amount), currency, date)
         }
         
-        result = self.tips_collection.insert_one(tip_data)
+        if len(self.journal):
+            # Keep tips in the order they were entered
+            return self._journal_tip(tip_data)
+        try:
+            result = self.tips_collection.insert_one(tip_data)
+        except pymongo.errors.ConnectionFailure:
+            return self._journal_tip(tip_data)
+        self.rollups.apply_tip(tip_data)
         return result.inserted_id
     
+    def _journal_tip(self, tip_data):
+        """Keep a tip in the journal until the flusher writes it."""
+        self.journal.append(tip_data)
+        self.journal.start_flusher(self.flush_journal)
+        return tip_data["_id"]
+    
+    def flush_journal(self, batch_size=JOURNAL_FLUSH_BATCH):
+        """
+        Write journaled tips to the database with bulk inserts.
+        
+        Raises ConnectionFailure while the server is still unreachable.
+        
+        Returns:
+            int: Number of tips taken off the journal
+        """
+        if not len(self.journal):
+            return 0
+        # Indexes (the unique import_key one included) may not exist if the app started offline
+        self.db_manager.ensure_setup()
+        return self.journal.replay(self.insert_tips, batch_size)
+    
+    def parse_tip_id(self, tip_id_text):
+        """Convert a tip ID shown in the GUI back to an ObjectId."""
+        return ObjectId(tip_id_text)
+    
+    def insert_tips(self, tips):
+        """
+        Insert complete tip dicts in bulk.
+        
+        Tips must already carry their base_amount; location_key is derived.
+        Tips whose import_key (or, for replayed journal tips, _id) is
+        already stored fail on the unique index and are skipped; the
+        unordered insert carries on with the rest.
+        
+        Returns:
+            int: Number of tips inserted
+        """
+        tips = [dict(tip, location_key=location_key(tip.get("location"))) for tip in tips]
+        if not tips:
+            return 0
+        
+        try:
+            self.tips_collection.insert_many(tips, ordered=False)
+            inserted = tips
+        except pymongo.errors.BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise
+            failed = {error["index"] for error in write_errors}
+            inserted = [tip for index, tip in enumerate(tips) if index not in failed]
+        
+        self.rollups.apply_changes(added=inserted)
+        return len(inserted)
+    
     def update_tip(self, tip_id, amount=None, currency=None, date=None, notes=None, location=None):
-        """Update an existing tip entry."""
+        """Update an existing tip entry; a tip still waiting in the journal is edited there."""
+        def changes(current_tip):
+            return self._tip_changes(current_tip, amount, currency, date, notes, location)
+        
+        if self.journal.update(tip_id, changes):
+            return 1
+        
+        # The current tip is only needed to recalculate the base amount
+        current_tip = None
+        if amount is not None or currency is not None or date is not None:
+            current_tip = self.tips_collection.find_one({"_id": tip_id})
+        update_data = changes(current_tip)
+        
+        if update_data:
+            result = self.tips_collection.update_one(
+                {"_id": tip_id},
+                {"$set": update_data}
+            )
+            # Move the tip between rollups when its totals or date changed
+            if current_tip and result.modified_count:
+                self.rollups.replace_tip(current_tip, {**current_tip, **update_data})
+            return result.modified_count
+        
+        return 0
+    
+    def _tip_changes(self, current_tip, amount=None, currency=None, date=None, notes=None, location=None):
+        """Build the fields update_tip sets, with the base amount recalculated if current_tip is given."""
         update_data = {}
         
         if amount is not None:
@@ -48,33 +166,24 @@ class TipOperations:
             
         if location is not None:
             update_data["location"] = location
+            update_data["location_key"] = location_key(location)
             
-        # Recalculate base amount if amount or currency changed
-        if amount is not None or currency is not None:
-            # Get current tip data
-            current_tip = self.tips_collection.find_one({"_id": tip_id})
+        # Recalculate base amount if amount, currency or date changed
+        if current_tip and (amount is not None or currency is not None or date is not None):
+            # Use new values or current values
+            new_amount = amount if amount is not None else current_tip["amount"]
+            new_currency = currency if currency is not None else current_tip["currency"]
+            new_date = date if date is not None else current_tip["date"]
             
-            if current_tip:
-                # Use new values or current values
-                new_amount = amount if amount is not None else current_tip["amount"]
-                new_currency = currency if currency is not None else current_tip["currency"]
-                
-                # Update base amount
-                update_data["base_amount"] = self.currency_converter.convert_to_base(
-                    float(new_amount), new_currency
-                )
-        
-        if update_data:
-            result = self.tips_collection.update_one(
-                {"_id": tip_id},
-                {"$set": update_data}
+            # Update base amount
+            update_data["base_amount"] = self.currency_converter.convert_to_base(
+                float(new_amount), new_currency, new_date
             )
-            return result.modified_count
         
-        return 0
+        return update_data
     
-    def get_tips(self, start_date=None, end_date=None, currency=None, location=None):
-        """Retrieve tips with optional filters."""
+    def _build_query(self, start_date=None, end_date=None, currency=None, location=None):
+        """Build the MongoDB filter shared by tip queries and aggregations."""
         query = {}
         
         if start_date and end_date:
@@ -88,146 +197,339 @@ class TipOperations:
             query["currency"] = currency
             
         if location:
-            query["location"] = {"$regex": location, "$options": "i"}
-            
+            if LOCATION_TEXT_SEARCH:
+                # Word search on the optional text index
+                query["$text"] = {"$search": location}
+            else:
+                # Anchored, case-sensitive regex on the lowercase key is an index range scan
+                query["location_key"] = {"$regex": "^" + re.escape(location_key(location))}
+        
+        return query
+    
+    def get_tip(self, tip_id):
+        """Get one tip by ID, or None."""
+        return self.journal.get(tip_id) or self.tips_collection.find_one({"_id": tip_id})
+    
+    def get_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Retrieve tips with optional filters."""
+        query = self._build_query(start_date, end_date, currency, location)
         return list(self.tips_collection.find(query).sort("date", pymongo.DESCENDING))
     
+    def count_tips(self, start_date=None, end_date=None, currency=None, location=None):
+        """Count tips matching the filters without fetching them."""
+        query = self._build_query(start_date, end_date, currency, location)
+        if not query:
+            # Collection metadata count, no scan needed
+            return self.tips_collection.estimated_document_count()
+        return self.tips_collection.count_documents(query)
+    
+    def get_tips_page(self, page_size, start_date=None, end_date=None, currency=None, location=None,
+                      after=None, before=None, last=False, last_page_size=None, offset=0):
+        """
+        Retrieve one page of tips (newest first) using keyset pagination.
+        
+        Pages are addressed by the (date, _id) of a boundary row instead of an
+        offset, so each page is a bounded range scan on the (date, _id) index.
+        
+        Args:
+            page_size: Number of tips per page
+            start_date, end_date, currency, location: Same filters as get_tips
+            after: (date, _id) of the last row of the current page, to fetch the next page
+            before: (date, _id) of the first row of the current page, to fetch the previous page
+            last: If True, fetch the last (oldest) page
+            last_page_size: Number of rows on the last page, if known from count_tips
+            offset: Number of newest rows (oldest rows with last) to skip when no keyset
+                is given; costs a scan of the skipped index entries, so use keysets for
+                neighbouring pages
+            
+        Returns:
+            list: Tips for the page, sorted by date descending
+        """
+        query = self._build_query(start_date, end_date, currency, location)
+        descending = [("date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+        ascending = [("date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+        
+        if after is not None:
+            date, tip_id = after
+            keyset = {"$or": [{"date": {"$lt": date}}, {"date": date, "_id": {"$lt": tip_id}}]}
+            sort, reverse, limit = descending, False, page_size
+        elif before is not None:
+            date, tip_id = before
+            keyset = {"$or": [{"date": {"$gt": date}}, {"date": date, "_id": {"$gt": tip_id}}]}
+            sort, reverse, limit = ascending, True, page_size
+        elif last:
+            # Walk the index from the oldest end and flip the result
+            keyset = None
+            sort, reverse, limit = ascending, True, last_page_size or page_size
+        else:
+            keyset = None
+            sort, reverse, limit = descending, False, page_size
+        
+        if keyset:
+            query = {"$and": [query, keyset]} if query else keyset
+        
+        cursor = self.tips_collection.find(query).sort(sort)
+        if offset and keyset is None:
+            cursor = cursor.skip(offset)
+        tips = list(cursor.limit(limit))
+        if reverse:
+            tips.reverse()
+        return tips
+    
     def get_summary_stats(self, start_date=None, end_date=None):
-        """Get summary statistics of tips."""
-        tips = self.get_tips(start_date, end_date)
+        """
+        Get summary statistics of tips.
+        
+        Totals are computed server-side with a $group pipeline, so only one
+        document per currency is transferred instead of every matching tip.
+        """
+        pipeline = []
+        query = self._build_query(start_date, end_date)
+        if query:
+            pipeline.append({"$match": query})
+        
+        pipeline.append({
+            "$group": {
+                "_id": "$currency",
+                "amount": {"$sum": "$amount"},
+                "count": {"$sum": 1},
+                # $sum skips missing/non-numeric values, matching the old
+                # "if 'base_amount' in tip" behaviour
+                "base_amount": {"$sum": "$base_amount"}
+            }
+        })
+        
+        groups = self.tips_collection.aggregate(pipeline)
+        return self._summarize_currency_groups(
+            (group["_id"], group["amount"], group["count"], group["base_amount"]) for group in groups
+        )
+    
+    def get_trend(self, period="month", start_date=None, end_date=None):
+        """
+        Get tip totals per day or month from the rollups collection.
+        
+        Returns:
+            list: dicts with period start, tip count, base currency total and per-currency totals
+        """
+        return [
+            {
+                "start": rollup["start"],
+                "count": rollup["count"],
+                "base_amount": rollup["base_amount"],
+                "currency_totals": {
+                    curr: totals["amount"]
+                    for curr, totals in rollup.get("currencies", {}).items() if totals["count"] > 0
+                }
+            }
+            for rollup in self.rollups.get_rollups(period, start_date, end_date)
+        ]
+    
+    def get_daily_totals(self, start_date=None, end_date=None, max_points=DAILY_TOTALS_MAX_POINTS):
+        """
+        Get base currency totals per day (or per bucket of days) from the day rollups.
+        
+        Buckets are summed by a $group on the rollups collection, so a
+        multi-year range costs one small document per point.
+        """
+        day_range = self.rollups.get_day_range(start_date, end_date)
+        if day_range is None:
+            return {"bucket_days": 1, "points": []}
         
+        first_day, last_day = day_range
+        bucket_days = self._bucket_days(first_day, last_day, max_points)
+        groups = self.rollups.get_day_buckets(first_day, bucket_days, end_date)
+        return {"bucket_days": bucket_days, "points": self._bucket_points(first_day, bucket_days, groups)}
+    
+    def delete_tip(self, tip_id):
+        """Delete a tip by ID, dropping it from the journal if it has not been written yet."""
+        if self.journal.remove([tip_id]):
+            return 1
+        deleted_tip = self.tips_collection.find_one_and_delete({"_id": tip_id})
+        if deleted_tip is None:
+            return 0
+        self.rollups.apply_tip(deleted_tip, -1)
+        return 1
+    
+    def delete_tips(self, tip_ids):
+        """
+        Delete several tips by ID.
+        
+        Tips still waiting in the journal are dropped from it. The others
+        are read once for the rollup bookkeeping and removed with a single
+        delete_many.
+        
+        Returns:
+            int: Number of tips deleted
+        """
+        tip_ids = list(tip_ids)
+        journaled = self.journal.remove(tip_ids)
+        tip_ids = [tip_id for tip_id in tip_ids if tip_id not in journaled]
+        if not tip_ids:
+            return len(journaled)
+        
+        query = {"_id": {"$in": tip_ids}}
+        tips = list(self.tips_collection.find(query, ROLLUP_FIELDS))
         if not tips:
-            return None
-            
-        # Group by currency
-        currency_totals = {}
-        for tip in tips:
-            curr = tip['currency']
-            if curr not in currency_totals:
-                currency_totals[curr] = 0
-            currency_totals[curr] += tip['amount']
-            
-        # Calculate in base currency
-        total_base = sum(tip['base_amount'] for tip in tips if 'base_amount' in tip)
+            return len(journaled)
+        
+        result = self.tips_collection.delete_many({"_id": {"$in": [tip["_id"] for tip in tips]}})
+        self.rollups.apply_changes(removed=tips)
+        return len(journaled) + result.deleted_count
+    
+    def update_tips(self, tip_ids, currency=None, notes=None, location=None):
+        """
+        Set currency, notes and/or location on several tips at once.
+        
+        Notes and location changes are one update_many. A currency change
+        also recalculates base amounts, which are sent as one unordered
+        bulk_write. Tips still waiting in the journal are edited there.
+        
+        Returns:
+            int: Number of tips modified
+        """
+        tip_ids = list(tip_ids)
+        update_data = {}
+        
+        if notes is not None:
+            update_data["notes"] = notes
             
-        # Add USD equivalents for pie chart
-        usd_equivalents = {}
-        for curr, amount in currency_totals.items():
-            usd_equivalents[curr] = self.currency_converter.convert(amount, curr, "USD")
-        
-        return {
-            "total_tips": len(tips),
-            "currency_totals": currency_totals,
-            "total_base_currency": total_base,
-            "base_currency": self.currency_converter.get_base_currency(),
-            "usd_equivalents": usd_equivalents
-        }
+        if location is not None:
+            update_data["location"] = location
+            update_data["location_key"] = location_key(location)
+        
+        if not tip_ids or (currency is None and not update_data):
+            return 0
+        
+        if currency is not None:
+            # Validate the currency before touching anything
+            self.currency_converter.convert_to_base(1.0, currency)
+        
+        journaled = 0
+        if len(self.journal):
+            remaining = []
+            for tip_id in tip_ids:
+                if self.journal.update(tip_id, lambda tip: self._tip_changes(tip, currency=currency,
+                                                                             notes=notes, location=location)):
+                    journaled += 1
+                else:
+                    remaining.append(tip_id)
+            tip_ids = remaining
+            if not tip_ids:
+                return journaled
+        
+        query = {"_id": {"$in": tip_ids}}
+        
+        if currency is None:
+            return journaled + self.tips_collection.update_many(query, {"$set": update_data}).modified_count
+        
+        old_tips = list(self.tips_collection.find(query, ROLLUP_FIELDS))
+        new_tips = []
+        update_operations = []
+        for tip in old_tips:
+            new_tip = dict(tip, currency=currency)
+            new_tip["base_amount"] = self.currency_converter.convert_to_base(tip["amount"], currency, tip["date"])
+            new_tips.append(new_tip)
+            update_operations.append(
+                pymongo.UpdateOne(
+                    {"_id": tip["_id"]},
+                    {"$set": dict(update_data, currency=currency, base_amount=new_tip["base_amount"])}
+                )
+            )
+        
+        if not update_operations:
+            return journaled
+        
+        result = self.tips_collection.bulk_write(update_operations, ordered=False)
+        self.rollups.apply_changes(removed=old_tips, added=new_tips)
+        return journaled + result.modified_count
     
-    def delete_tip(self, tip_id):
-        """Delete a tip by ID."""
-        result = self.tips_collection.delete_one({"_id": tip_id})
-        return result.deleted_count
+    def _has_tips(self, start_date=None, end_date=None):
+        """Check whether any tip falls in the date range."""
+        query = self._build_query(start_date, end_date)
+        return self.tips_collection.find_one(query, {"_id": 1}) is not None
+    
+    def _iter_tips_by_date(self, start_date=None, end_date=None, ascending=True, batch_size=EXPORT_CHUNK_SIZE):
+        """Iterate tips in the date range ordered by date."""
+        query = self._build_query(start_date, end_date)
+        direction = pymongo.ASCENDING if ascending else pymongo.DESCENDING
+        return self.tips_collection.find(query).sort("date", direction).batch_size(batch_size)
     
-    def export_to_csv(self, filename, start_date=None, end_date=None, include_zero_days=True):
+    def recalculate_base_amounts(self, progress_callback=None, chunk_size=REBASE_CHUNK_SIZE):
         """
-        Export tips to CSV file with option to include zero values for missing dates.
+        Recalculate all base amounts after base currency change.
+        
+        Tips are converted with the rates of their own date. Within a currency
+        every tip in the same rate period shares one conversion factor, so each
+        period is rebased with a single update_many using an aggregation
+        pipeline update. Servers older than MongoDB 4.2 reject pipeline
+        updates; for those the currency is rebased in chunks of UpdateOne
+        operations, with factors looked up from the in-memory rate history.
         
         Args:
-            filename: Path to save the CSV file
-            start_date: Optional start date filter
-            end_date: Optional end date filter
-            include_zero_days: If True, includes a single entry with 0 amount for dates with no tips
+            progress_callback: Optional callable(done, total) receiving the number of tips processed
+            chunk_size: Number of updates per bulk_write in the fallback path
             
         Returns:
-            bool: True if export successful, False otherwise
+            int: Number of tips processed
         """
-        # Get tips with filters
-        tips = self.get_tips(start_date, end_date)
-        if not tips:
-            return False
-        
-        # If we don't need to fill missing dates, just export as before
-        if not include_zero_days:
-            df = pd.DataFrame(tips)
-            df.to_csv(filename, index=False)
-            return True
-        
-        # Determine date range
-        if not start_date:
-            first_tip = min(tips, key=lambda x: x['date'])
-            start_date = first_tip['date']
-        
-        if not end_date:
-            last_tip = max(tips, key=lambda x: x['date'])
-            end_date = last_tip['date']
-        
-        # Create a complete date range - use date portions only to avoid time issues
-        date_range = []
-        current_date = datetime.combine(start_date.date(), datetime.min.time())
-        end_date_normalized = datetime.combine(end_date.date(), datetime.min.time())
-        
-        while current_date <= end_date_normalized:
-            date_range.append(current_date)
-            current_date = current_date + timedelta(days=1)
-        
-        # Get default currency (use base currency or first available)
-        default_currency = self.currency_converter.get_base_currency()
-        if not default_currency and tips:
-            default_currency = tips[0]['currency']
-        
-        # Group the original tips by date - use date portion only
-        tips_by_date = {}
-        for tip in tips:
-            # Use just the date portion as key to avoid time issues
-            date_key = tip['date'].strftime('%Y-%m-%d')
-            if date_key not in tips_by_date:
-                tips_by_date[date_key] = []
-            tips_by_date[date_key].append(tip)
-        
-        # Create rows for the comprehensive DataFrame
-        comprehensive_data = []
-        
-        for date in date_range:
-            date_key = date.strftime('%Y-%m-%d')
+        # One small document per currency with its tip count
+        counts = {
+            group["_id"]: group["count"]
+            for group in self.tips_collection.aggregate([
+                {"$group": {"_id": "$currency", "count": {"$sum": 1}}}
+            ])
+        }
+        total = sum(counts.values())
+        done = 0
+        
+        for currency, count in counts.items():
+            try:
+                for start, end, factor in self.currency_converter.base_factor_periods(currency):
+                    query = {"currency": currency}
+                    date_range = {}
+                    if start is not None:
+                        date_range["$gte"] = start
+                    if end is not None:
+                        date_range["$lt"] = end
+                    if date_range:
+                        query["date"] = date_range
+                    
+                    self.tips_collection.update_many(
+                        query,
+                        [{"$set": {"base_amount": {"$multiply": ["$amount", factor]}}}]
+                    )
+            except pymongo.errors.OperationFailure:
+                self._rebase_currency_chunked(currency, chunk_size)
             
-            # If no tips for this date, add a single zero entry
-            if date_key not in tips_by_date:
-                comprehensive_data.append({
-                    'date': date,
-                    'amount': 0.0,
-                    'currency': default_currency,
-                    'notes': 'Auto-generated zero entry',
-                    'base_amount': 0.0,
-                    'location': ''
-                })
-            else:
-                # Add all existing entries for this date
-                for tip in tips_by_date[date_key]:
-                    comprehensive_data.append(tip)
+            done += count
+            if progress_callback:
+                progress_callback(done, total)
         
-        # Create and export the comprehensive DataFrame
-        comprehensive_df = pd.DataFrame(comprehensive_data)
-        comprehensive_df.to_csv(filename, index=False)
-        return True
+        # Base totals in the rollups are stale now
+        self.rollups.rebuild()
+        return total
     
-    def recalculate_base_amounts(self):
-        """Recalculate all base amounts after base currency change."""
-        # Get all tips
-        tips = list(self.tips_collection.find({}))
+    def _rebase_currency_chunked(self, currency, chunk_size):
+        """Rebase one currency with bounded bulk writes (pre-4.2 servers)."""
+        cursor = self.tips_collection.find(
+            {"currency": currency}, {"amount": 1, "date": 1}
+        ).batch_size(chunk_size)
         
         update_operations = []
-        for tip in tips:
-            # Calculate the new base amount
-            new_base_amount = self.currency_converter.convert_to_base(tip['amount'], tip['currency'])
-            
-            # Prepare bulk update operation
+        for tip in cursor:
+            try:
+                new_base_amount = self.currency_converter.convert_to_base(tip["amount"], currency, tip["date"])
+            except UnknownCurrencyError:
+                new_base_amount = None
             update_operations.append(
                 pymongo.UpdateOne(
                     {"_id": tip["_id"]},
                     {"$set": {"base_amount": new_base_amount}}
                 )
             )
+            if len(update_operations) >= chunk_size:
+                self.tips_collection.bulk_write(update_operations, ordered=False)
+                update_operations = []
         
-        # Execute bulk updates if any
         if update_operations:
-            self.tips_collection.bulk_write(update_operations)
\ No newline at end of file
+            self.tips_collection.bulk_write(update_operations, ordered=False)
@@ -3,12 +3,15 @@
 import tkinter as tk
 from tkinter import ttk
 from gui.components import ComboboxKeyHandler
+from utils.currency import UnknownCurrencyError
 
 
 class AddTipTab:
-    def __init__(self, parent, tip_operations, currency_converter):
+    def __init__(self, parent, tip_operations, currency_converter, data_service):
         self.tip_operations = tip_operations
         self.currency_converter = currency_converter
+        self.data_service = data_service
+        self._tip_listeners = []
         
         # Create and add tab
         self.frame = ttk.Frame(parent)
@@ -53,30 +56,56 @@ class AddTipTab:
         # Set focus
         amount_entry.focus()
     
+    def add_tip_listener(self, callback):
+        """Register callback(tip) called on the main thread with each added tip."""
+        self._tip_listeners.append(callback)
+    
     def handle_add_tip(self):
         """Handle the Add Tip button click."""
         try:
             amount = float(self.amount_var.get())
-            currency = self.currency_var.get()
-            notes = self.notes_var.get()
-            
-            if amount <= 0:
-                self.status_var.set("Amount must be greater than zero")
-                return
-                
-            if not currency:
-                self.status_var.set("Currency must be selected")
-                return
-            
-            tip_id = self.tip_operations.add_tip(amount, currency, notes=notes)
-            
-            if tip_id:
-                self.status_var.set(f"Tip added successfully!")
-                # Clear the form
-                self.amount_var.set("")
-                self.notes_var.set("")
-            else:
-                self.status_var.set("Failed to add tip")
-                
         except ValueError:
-            self.status_var.set("Please enter a valid amount")
\ No newline at end of file
+            self.status_var.set("Please enter a valid amount")
+            return
+        
+        currency = self.currency_var.get()
+        notes = self.notes_var.get()
+        
+        if amount <= 0:
+            self.status_var.set("Amount must be greater than zero")
+            return
+            
+        if not currency:
+            self.status_var.set("Currency must be selected")
+            return
+        
+        self.status_var.set("Saving tip...")
+        self.data_service.submit(
+            self._add_tip, amount, currency, notes,
+            on_success=self._tip_added,
+            on_error=self._add_failed
+        )
+    
+    def _add_tip(self, amount, currency, notes):
+        """Store the tip and read it back (worker thread)."""
+        tip_id = self.tip_operations.add_tip(amount, currency, notes=notes)
+        return self.tip_operations.get_tip(tip_id) if tip_id else None
+    
+    def _tip_added(self, tip):
+        """Update the form after the tip was stored."""
+        if tip:
+            for callback in self._tip_listeners:
+                callback(tip)
+            self.status_var.set(f"Tip added successfully!")
+            # Clear the form
+            self.amount_var.set("")
+            self.notes_var.set("")
+        else:
+            self.status_var.set("Failed to add tip")
+    
+    def _add_failed(self, error):
+        """Report a failed insert."""
+        if isinstance(error, UnknownCurrencyError):
+            self.status_var.set(str(error))
+        else:
+            self.status_var.set(f"Failed to add tip: {error}")
\ No newline at end of file
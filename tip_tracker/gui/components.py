@@ -3,24 +3,58 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from bson.objectid import ObjectId
 from config import DARK_THEME
 from utils.date_parser import DateParser
+from utils.currency import UnknownCurrencyError
+from utils.completion import completion_index
 
 
 class ComboboxKeyHandler:
     """Setup keyboard navigation for comboboxes.
     
-    Enables jumping to items that start with the pressed key when the dropdown is open.
+    Enables jumping to items that start with the typed keys. Keys typed in
+    quick succession form a prefix ("EU" -> EUR); pressing the same key
+    again cycles through the items starting with it. Items are looked up in
+    a CompletionIndex shared by all comboboxes with the same values.
     """
     
+    # Milliseconds after which typed keys start a new prefix
+    TYPE_AHEAD_TIMEOUT = 500
+    
+    @staticmethod
+    def set_values(combobox, values):
+        """Set the values of a combobox set up with setup_keypress, rebuilding its index."""
+        values = [str(value) for value in values]
+        combobox['values'] = values
+        combobox._completion = completion_index(values)
+    
     @staticmethod
     def setup_keypress(combobox):
         """Setup keyboard navigation for comboboxes."""
         # Store state variables as attributes on the combobox widget itself
-        combobox._last_key = None
+        combobox._typed = ""
         combobox._last_key_time = 0
-        combobox._key_press_index = 0
+        # Read the values once; key presses only use the index
+        combobox._completion = completion_index(str(value) for value in combobox['values'])
+        
+        def find_match(key, current_time):
+            """Add the key to the typed prefix and get the position of the matching value."""
+            index = combobox._completion
+            if current_time - combobox._last_key_time > ComboboxKeyHandler.TYPE_AHEAD_TIMEOUT:
+                combobox._typed = ""
+            combobox._last_key_time = current_time
+            combobox._typed += key
+            typed = combobox._typed
+            
+            position = index.match(typed)
+            if position is None and typed == key * len(typed):
+                # Same key pressed again: next item starting with it
+                position = index.match(key, len(typed) - 1)
+            if position is None:
+                # No item continues the prefix; start a new one with this key
+                combobox._typed = key
+                position = index.match(key)
+            return position
         
         def on_key_press(event):
             """Handle key press events - fired when dropdown is open or closed."""
@@ -30,47 +64,20 @@ class ComboboxKeyHandler:
             # Skip if not an alphanumeric or printable character
             if not key or not key.strip():
                 return
+            
+            position = find_match(key, event.time)
                 
             # If dropdown is not open, use the standard behavior
             if not _is_dropdown_open(combobox):
                 # This works when dropdown is closed
-                values = combobox['values']
-                for value in values:
-                    if str(value).upper().startswith(key):
-                        combobox.set(value)
-                        break
+                if position is not None:
+                    combobox.set(combobox._completion.values[position])
                 return
                 
             # Beyond this point, the dropdown is open
-            
-            # Get current time for multi-key handling
-            current_time = event.time
-            
-            # Reset index if different key or too much time has passed
-            if key != combobox._last_key or (current_time - combobox._last_key_time > 500):  # 500ms timeout
-                combobox._key_press_index = 0
-            elif key == combobox._last_key:
-                # Move to next match for repeated key press
-                combobox._key_press_index += 1
-            
-            # Store key and time for next comparison
-            combobox._last_key = key
-            combobox._last_key_time = current_time
-            
-            # Find all values starting with the key
-            matching_indices = []
-            for i, value in enumerate(combobox['values']):
-                if str(value).upper().startswith(key):
-                    matching_indices.append(i)
-            
-            # If we have matches
-            if matching_indices:
-                # Wrap around the index if needed
-                match_index = combobox._key_press_index % len(matching_indices)
-                value_index = matching_indices[match_index]
-                
+            if position is not None:
                 # Select the item in the dropdown
-                combobox.current(value_index)
+                combobox.current(position)
                 
                 # Prevent default handling
                 return "break"
@@ -147,7 +154,7 @@ class JumpToKeyCombobox:
     def set_values(self, values):
         """Update the list of values."""
         self.values = list(values)
-        self.combobox['values'] = self.values
+        ComboboxKeyHandler.set_values(self.combobox, self.values)
 
 
 class EditTipDialog:
@@ -277,27 +284,138 @@ class EditTipDialog:
                 messagebox.showerror("Invalid Currency", "Currency must be selected")
                 return
             
-            # Convert string ID to ObjectId
-            tip_id = ObjectId(self.tip_id)
+            # Convert string ID to the storage's ID type
+            tip_id = self.tip_operations.parse_tip_id(self.tip_id)
             
-            # Update tip in database
-            self.tip_operations.update_tip(
+            # Update tip in database off the UI thread
+            self.parent.data_service.submit(
+                self._update_tip,
                 tip_id=tip_id, 
                 amount=new_amount, 
                 currency=new_currency, 
                 date=new_date,
-                notes=new_notes
+                notes=new_notes,
+                on_success=self._changes_saved,
+                on_error=self._save_failed
             )
             
-            # Close dialog
-            self.dialog.destroy()
-            
-            # Signal parent to refresh
-            if hasattr(self.parent, 'refresh_tips_view'):
-                self.parent.refresh_tips_view()
-            
         except ValueError:
             messagebox.showerror("Invalid Input", "Please enter a valid amount")
+    
+    def _update_tip(self, tip_id, **changes):
+        """Update the tip and read it back (worker thread)."""
+        self.tip_operations.update_tip(tip_id, **changes)
+        return tip_id, self.tip_operations.get_tip(tip_id)
+    
+    def _changes_saved(self, result):
+        """Close the dialog once the update is stored."""
+        # Close dialog
+        self.dialog.destroy()
+        
+        # Update the row in place, moving it if its date changed
+        tip_id, tip = result
+        if hasattr(self.parent, 'tip_updated'):
+            if tip is None:  # Deleted meanwhile
+                self.parent.remove_tip_items([tip_id], 0)
+            else:
+                self.parent.tip_updated(tip)
+        elif hasattr(self.parent, 'refresh_tips_view'):
+            self.parent.refresh_tips_view()
+    
+    def _save_failed(self, error):
+        """Report a failed update and keep the dialog open."""
+        if isinstance(error, UnknownCurrencyError):
+            messagebox.showerror("Invalid Currency", str(error))
+        else:
+            messagebox.showerror("Update Failed", str(error))
+
+
+class BulkEditDialog(EditTipDialog):
+    """Dialog setting currency, notes and location on several tips at once."""
+    
+    def __init__(self, parent, tip_ids, tip_operations, currency_converter):
+        self.parent = parent
+        self.tip_operations = tip_operations
+        self.currency_converter = currency_converter
+        
+        self.tip_ids = tip_ids
+        
+        self.create_dialog()
+    
+    def create_dialog(self):
+        """Create the bulk edit dialog."""
+        root = self._find_tkinter_root()
+        
+        self.dialog = tk.Toplevel(root)
+        self.dialog.title(f"Edit {len(self.tip_ids)} Tips")
+        self.dialog.geometry("400x250")
+        self.dialog.transient(root)
+        self.dialog.grab_set()
+        
+        # Apply dark theme
+        self.dialog.configure(bg=DARK_THEME['bg_color'])
+        
+        frame = ttk.Frame(self.dialog, padding=20)
+        frame.pack(fill='both', expand=True)
+        
+        ttk.Label(frame, text="Leave a field empty to keep the current values.").grid(
+            column=0, row=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Currency
+        ttk.Label(frame, text="Currency:").grid(column=0, row=1, sticky=tk.W, pady=5)
+        self.currency_var = tk.StringVar()
+        currencies = [""] + self.currency_converter.get_available_currencies()
+        currency_combo = ttk.Combobox(frame, textvariable=self.currency_var, values=currencies)
+        currency_combo.grid(column=1, row=1, sticky=(tk.W, tk.E), pady=5)
+        ComboboxKeyHandler.setup_keypress(currency_combo)
+        
+        # Notes
+        ttk.Label(frame, text="Notes:").grid(column=0, row=2, sticky=tk.W, pady=5)
+        self.notes_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=self.notes_var).grid(column=1, row=2, sticky=(tk.W, tk.E), pady=5)
+        
+        # Location
+        ttk.Label(frame, text="Location:").grid(column=0, row=3, sticky=tk.W, pady=5)
+        self.location_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=self.location_var).grid(column=1, row=3, sticky=(tk.W, tk.E), pady=5)
+        
+        # Buttons
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(column=0, row=4, columnspan=2, pady=20)
+        
+        ttk.Button(button_frame, text="Save", command=self.save_changes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # Center dialog
+        self.center_dialog(root)
+    
+    def save_changes(self):
+        """Apply the changes to all selected tips."""
+        self.changes = {
+            "currency": self.currency_var.get() or None,
+            "notes": self.notes_var.get() or None,
+            "location": self.location_var.get() or None
+        }
+        
+        if not any(value is not None for value in self.changes.values()):
+            self.dialog.destroy()
+            return
+        
+        self.parent.data_service.submit(
+            self.tip_operations.update_tips,
+            self.tip_ids,
+            on_success=self._changes_saved,
+            on_error=self._save_failed,
+            **self.changes
+        )
+    
+    def _changes_saved(self, modified_count):
+        """Close the dialog and update the rows in place."""
+        self.dialog.destroy()
+        
+        if hasattr(self.parent, 'update_tip_items'):
+            self.parent.update_tip_items(self.tip_ids, currency=self.changes["currency"],
+                                         notes=self.changes["notes"])
 
 
 class ContextMenu:
@@ -330,10 +448,16 @@ class ContextMenu:
             self.menu.post(event.x_root, event.y_root)
     
     def edit_selected_tip(self):
-        """Edit the selected tip."""
+        """Edit the selected tip, or all selected tips at once."""
         selected = self.treeview.selection()
         if not selected:
             return
+        
+        if len(selected) > 1:
+            tip_ids = [self.tip_operations.parse_tip_id(self.treeview.item(item_id, "text"))
+                       for item_id in selected]
+            BulkEditDialog(self.parent, tip_ids, self.tip_operations, self.currency_converter)
+            return
             
         item_id = selected[0]
         tip_id_str = self.treeview.item(item_id, "text")
@@ -357,12 +481,399 @@ class ContextMenu:
         if not selected:
             return
             
-        if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this tip?"):
-            for item_id in selected:
-                tip_id = self.treeview.item(item_id, "text")
-                # Convert string ID to ObjectId
-                self.tip_operations.delete_tip(ObjectId(tip_id))
+        message = "Are you sure you want to delete this tip?" if len(selected) == 1 else \
+            f"Are you sure you want to delete these {len(selected)} tips?"
+        if messagebox.askyesno("Confirm Delete", message):
+            # Convert string IDs to the storage's ID type
+            tip_ids = [self.tip_operations.parse_tip_id(self.treeview.item(item_id, "text"))
+                       for item_id in selected]
             
-            # Signal parent to refresh
-            if hasattr(self.parent, 'refresh_tips_view'):
-                self.parent.refresh_tips_view()
\ No newline at end of file
+            # One delete_many off the UI thread, then drop the rows in place
+            self.parent.data_service.submit(
+                self.tip_operations.delete_tips, tip_ids,
+                on_success=lambda deleted_count: self._remove_deleted(tip_ids, deleted_count)
+            )
+    
+    def _remove_deleted(self, tip_ids, deleted_count):
+        """Remove deleted rows from the parent view."""
+        if hasattr(self.parent, 'remove_tip_items'):
+            self.parent.remove_tip_items(tip_ids, deleted_count)
+        elif hasattr(self.parent, 'refresh_tips_view'):
+            self.parent.refresh_tips_view()
+
+# Rows fetched per window query and the most rows a TipWindowSource keeps loaded
+WINDOW_FETCH_SIZE = 200
+WINDOW_MAX_ROWS = 2000
+
+
+class TipWindowSource:
+    """Contiguous window of tips around the rows a VirtualTreeview shows.
+    
+    Rows are addressed by their position in the filtered list (newest first).
+    Scrolling next to the loaded window extends it with a keyset query from
+    its first or last row; jumping further away (e.g. dragging the scrollbar)
+    replaces it with an offset query, or a query from the oldest end for
+    positions in the second half. The window is trimmed on the far side once
+    it holds more than `max_rows` tips.
+    """
+    
+    def __init__(self, tip_operations, data_service, filters, total, rows=(),
+                 fetch_size=WINDOW_FETCH_SIZE, max_rows=WINDOW_MAX_ROWS):
+        """Initialize the source.
+        
+        Args:
+            tip_operations: Storage used for get_tips_page
+            data_service: DataService running the queries
+            filters: Filter keyword arguments for get_tips_page
+            total: Number of tips matching the filters
+            rows: Already loaded tips starting at position 0
+        """
+        self.tip_operations = tip_operations
+        self.data_service = data_service
+        self.filters = filters
+        self.total = total
+        self.fetch_size = fetch_size
+        self.max_rows = max_rows
+        
+        self.start = 0
+        self.rows = list(rows)
+        self._positions = None  # tip _id -> index in rows, rebuilt after changes
+        self.loading = False
+        self.on_change = None  # Called after a window query finished
+    
+    @property
+    def end(self):
+        """Position after the last loaded row."""
+        return self.start + len(self.rows)
+    
+    def get(self, index):
+        """Get the tip at a position, or None if it is not loaded."""
+        if self.start <= index < self.end:
+            return self.rows[index - self.start]
+        return None
+    
+    def find(self, tip_id):
+        """Get the position of a loaded tip, or None."""
+        if self._positions is None:
+            self._positions = {tip['_id']: index for index, tip in enumerate(self.rows)}
+        index = self._positions.get(tip_id)
+        return None if index is None else self.start + index
+    
+    def remove(self, tip_ids):
+        """Drop loaded rows by tip ID."""
+        tip_ids = set(tip_ids)
+        self.rows = [tip for tip in self.rows if tip['_id'] not in tip_ids]
+        self._positions = None
+    
+    def update(self, tip_ids, changes):
+        """Apply field changes to loaded rows by tip ID."""
+        for tip_id in tip_ids:
+            position = self.find(tip_id)
+            if position is not None:
+                self.rows[position - self.start].update(changes)
+    
+    def insert(self, tip):
+        """
+        Add a new tip to the list, in the window if it sorts into it.
+        
+        Returns:
+            bool: True if the tip is now loaded
+        """
+        self.total += 1
+        key = (tip['date'], tip['_id'])
+        
+        # Rows are newest first: find the first row older than the tip
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            if (self.rows[middle]['date'], self.rows[middle]['_id']) > key:
+                low = middle + 1
+            else:
+                high = middle
+        
+        if low == 0 and self.start > 0:
+            self.start += 1  # Somewhere above the window
+            return False
+        if low == len(self.rows) and self.end < self.total - 1:
+            return False  # Somewhere below the window
+        
+        self.rows.insert(low, tip)
+        self._positions = None
+        return True
+    
+    def replace(self, tip):
+        """Replace a loaded tip after an edit, moving it if its date changed."""
+        position = self.find(tip['_id'])
+        if position is None:
+            return
+        
+        index = position - self.start
+        if self.rows[index]['date'] == tip['date']:
+            self.rows[index] = tip
+            return
+        
+        del self.rows[index]
+        self._positions = None
+        self.total -= 1
+        self.insert(tip)
+    
+    def is_loaded(self, start, stop):
+        """Check whether all positions in [start, stop) are loaded."""
+        return start >= stop or (self.start <= start and stop <= self.end)
+    
+    def request(self, start, stop):
+        """Start loading positions [start, stop) unless loaded or a query is running."""
+        start = max(0, start)
+        stop = min(self.total, stop)
+        if self.loading or self.is_loaded(start, stop):
+            return
+        
+        if self.rows and self.start <= start <= self.end:
+            # Continue below the window
+            tip = self.rows[-1]
+            mode, limit = "append", max(self.fetch_size, stop - self.end)
+            args = {"after": (tip['date'], tip['_id'])}
+        elif self.rows and start < self.start <= stop:
+            # Continue above the window
+            tip = self.rows[0]
+            mode, limit = "prepend", max(self.fetch_size, self.start - start)
+            args = {"before": (tip['date'], tip['_id'])}
+        else:
+            limit = min(max(self.fetch_size, stop - start), self.max_rows)
+            start = min(start, max(0, self.total - limit))
+            if start > self.total // 2:
+                # Cheaper to skip the rows below the window from the oldest tip
+                mode = "last"
+                args = {"last": True, "last_page_size": limit, "offset": self.total - start - limit}
+            else:
+                mode, args = "offset", {"offset": start}
+        
+        self.loading = True
+        self.data_service.submit(
+            self.tip_operations.get_tips_page, limit,
+            on_success=lambda tips: self._loaded(mode, start, limit, tips, args.get("offset", 0)),
+            on_error=self._load_failed,
+            # Not "view_tips": scrolling must not supersede a refresh for new filters
+            key="view_tips_window",
+            **args,
+            **self.filters
+        )
+    
+    def _loaded(self, mode, start, limit, tips, skipped=0):
+        """Merge a finished window query (main thread); `skipped` is the offset it was given."""
+        self.loading = False
+        short = len(tips) < limit  # Fewer tips than the count promised
+        
+        self._positions = None
+        if mode == "append":
+            self.rows.extend(tips)
+            if short:
+                self.total = self.end
+            excess = len(self.rows) - self.max_rows
+            if excess > 0:
+                del self.rows[:excess]
+                self.start += excess
+        elif mode == "prepend":
+            self.rows[:0] = tips
+            self.start = 0 if short else self.start - len(tips)
+            del self.rows[self.max_rows:]
+        elif mode == "last":
+            self.rows = tips
+            self.start = start
+            if short:
+                # Nothing newer than the rows found above the skipped oldest ones
+                self.start = 0
+                self.total = skipped + len(tips)
+        else:
+            self.rows = tips
+            self.start = start
+            if short:
+                self.total = self.end
+        # The window never holds more than max_rows, whatever the query returned
+        del self.rows[self.max_rows:]
+        
+        if self.on_change:
+            self.on_change()
+    
+    def _load_failed(self, error):
+        """Report a failed window query."""
+        self.loading = False
+        messagebox.showerror("Database Error", str(error))
+
+
+class VirtualTreeview:
+    """Treeview that scrolls through a large list while holding only the visible rows.
+    
+    The tree gets exactly one item per visible row. Scrolling moves a row
+    offset, asks the source to load the rows around it (the visible rows
+    plus `buffer` on each side) and updates the items in place; items keep
+    the tip ID as their iid, so the selection survives scrolling for rows
+    that stay visible. The scrollbar reflects the position in the whole list.
+    """
+    
+    def __init__(self, parent, columns, headings, format_row, buffer=50, row_height=20):
+        """Create the tree and scrollbar in a new frame.
+        
+        Args:
+            parent: Parent widget
+            columns: Column identifiers
+            headings: dict of column -> (heading text, width)
+            format_row: Callable(tip) returning (iid, text, values) for a row
+            buffer: Rows loaded beyond each edge of the view
+            row_height: Pixel height of one row, used to fit rows to the widget
+        """
+        self.format_row = format_row
+        self.buffer = buffer
+        self.row_height = row_height
+        self.source = None
+        self.first = 0
+        self.visible = 20
+        self.items = {}  # tip _id -> tree item of the visible rows
+        
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, height=self.visible)
+        self.tree.heading("#0", text="ID")
+        self.tree.column("#0", width=0, stretch=tk.NO)  # Hide ID column
+        for column, (text, width) in headings.items():
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+        
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+        self.tree.pack(side=tk.LEFT, fill='both', expand=True)
+        
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda event: self._scroll_key(-self.visible))
+        self.tree.bind("<Next>", lambda event: self._scroll_key(self.visible))
+        self.tree.bind("<Control-Home>", lambda event: self._scroll_key(-self.first))
+        self.tree.bind("<Control-End>", lambda event: self._scroll_key(self.total()))
+        self.tree.bind("<Up>", self._on_arrow)
+        self.tree.bind("<Down>", self._on_arrow)
+    
+    def set_source(self, source):
+        """Show a new source from the top."""
+        self.source = source
+        source.on_change = self.render
+        self.first = 0
+        if self.items:
+            self.tree.delete(*self.items.values())
+            self.items = {}
+        self.render()
+    
+    def apply_change(self, change):
+        """
+        Run change() against the source and re-render in place.
+        
+        The top visible tip stays at the top, so rows inserted or removed
+        above the view do not move what the user is looking at.
+        """
+        anchor = self.source.get(self.first) if self.source else None
+        change()
+        if anchor is not None:
+            position = self.source.find(anchor['_id'])
+            if position is not None:
+                self.first = position
+        self.render()
+    
+    def item_for(self, tip_id):
+        """Get the tree item showing a tip, or None if it is not visible."""
+        return self.items.get(tip_id)
+    
+    def total(self):
+        """Number of rows in the whole list."""
+        return self.source.total if self.source else 0
+    
+    def scroll_to(self, first):
+        """Make `first` the top visible row."""
+        self.first = max(0, min(first, self.total() - self.visible))
+        self.render()
+    
+    def scroll_by(self, rows):
+        """Scroll by a number of rows."""
+        self.scroll_to(self.first + rows)
+    
+    def render(self):
+        """Show the rows at the current offset once they are loaded."""
+        if self.source is None:
+            return
+        
+        self.first = max(0, min(self.first, self.total() - self.visible))
+        stop = min(self.total(), self.first + self.visible)
+        self.source.request(self.first - self.buffer, stop + self.buffer)
+        self._update_scrollbar(stop)
+        
+        # Keep the old rows on screen until the new ones arrive
+        if not self.source.is_loaded(self.first, stop):
+            return
+        
+        tips = [self.source.get(index) for index in range(self.first, stop)]
+        wanted = {tip['_id'] for tip in tips}
+        stale = [tip_id for tip_id in self.items if tip_id not in wanted]
+        if stale:
+            self.tree.delete(*(self.items.pop(tip_id) for tip_id in stale))
+        
+        # Update kept items in place and insert only the rows that scrolled in
+        for position, tip in enumerate(tips):
+            iid, text, values = self.format_row(tip)
+            item = self.items.get(tip['_id'])
+            if item is None:
+                self.items[tip['_id']] = self.tree.insert("", position, iid=iid, text=text, values=values)
+            else:
+                self.tree.item(item, values=values)
+                if self.tree.index(item) != position:
+                    self.tree.move(item, "", position)
+    
+    def _update_scrollbar(self, stop):
+        """Set the scrollbar thumb to the visible part of the whole list."""
+        total = self.total()
+        if total:
+            self.scrollbar.set(self.first / total, stop / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Handle scrollbar drags and clicks."""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total()))
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+    
+    def _scroll_key(self, rows):
+        """Scroll from a key binding and stop the default handling."""
+        self.scroll_by(rows)
+        return "break"
+    
+    def _on_arrow(self, event):
+        """Scroll when the arrow keys move the focus past the first or last visible row."""
+        children = self.tree.get_children()
+        if not children:
+            return None
+        
+        focus = self.tree.focus()
+        if event.keysym == "Down" and focus == children[-1] and self.first + self.visible < self.total():
+            self.scroll_by(1)
+        elif event.keysym == "Up" and focus == children[0] and self.first > 0:
+            self.scroll_by(-1)
+        else:
+            return None
+        
+        # Move the focus to the row that scrolled into view
+        children = self.tree.get_children()
+        if children:
+            edge = children[-1] if event.keysym == "Down" else children[0]
+            self.tree.focus(edge)
+            self.tree.selection_set(edge)
+        return "break"
+    
+    def _on_resize(self, event):
+        """Fit the number of rows to the tree's height."""
+        # One row's worth of height is taken by the headings
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.tree.config(height=visible)
+            self.render()
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Background execution of database calls for the GUI."""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+
+class DataService:
+    """Run database work on worker threads and deliver results on the Tk main thread.
+
+    Results are handed back through a queue that is polled with `root.after`,
+    so callbacks may safely touch widgets. Requests submitted with the same
+    key supersede each other: only the newest one delivers its result.
+    """
+
+    def __init__(self, root, max_workers=2, poll_interval=50):
+        """Initialize the service for a Tk root window.
+
+        Args:
+            root: The Tk root used for after() polling
+            max_workers: Number of worker threads
+            poll_interval: Milliseconds between result queue polls
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tip-data")
+        self.results = queue.Queue()
+
+        self._pending = 0
+        self._polling = False
+        self._generations = {}  # key -> number of the newest request
+        self._futures = {}  # key -> future of the newest request
+        self._busy_listeners = []
+
+    def add_busy_listener(self, callback):
+        """Register callback(busy) called on the main thread when work starts or ends."""
+        self._busy_listeners.append(callback)
+
+    def submit(self, func, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """
+        Run func(*args, **kwargs) on a worker thread.
+
+        Args:
+            func: The callable to run
+            on_success: Optional callback(result) run on the main thread
+            on_error: Optional callback(exception) run on the main thread;
+                defaults to showing an error dialog
+            key: Optional request key; a newer request with the same key
+                cancels this one or discards its result
+        """
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._futures.get(key)
+            if previous is not None and previous.cancel():
+                # Never started, so it will never report back
+                self._set_pending(self._pending - 1)
+
+        def run():
+            try:
+                outcome = (True, func(*args, **kwargs))
+            except Exception as e:
+                outcome = (False, e)
+            self.results.put((key, generation, outcome, on_success, on_error))
+
+        future = self.executor.submit(run)
+        if key is not None:
+            self._futures[key] = future
+
+        self._set_pending(self._pending + 1)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return future
+
+    def is_current(self, key, generation):
+        """Check whether a result belongs to the newest request for its key."""
+        return key is None or self._generations.get(key) == generation
+
+    def _poll(self):
+        """Deliver finished results and keep polling while work is pending."""
+        while True:
+            try:
+                key, generation, (ok, value), on_success, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._set_pending(self._pending - 1)
+            if not self.is_current(key, generation):
+                continue  # Superseded by a newer request
+            if key is not None:
+                self._futures.pop(key, None)
+
+            if ok:
+                if on_success:
+                    on_success(value)
+            elif on_error:
+                on_error(value)
+            else:
+                messagebox.showerror("Database Error", str(value))
+
+        if self._pending > 0:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _set_pending(self, pending):
+        """Track outstanding requests and notify busy listeners on change."""
+        was_busy = self._pending > 0
+        self._pending = pending
+        if was_busy != (pending > 0):
+            for callback in self._busy_listeners:
+                callback(pending > 0)
+
+    def shutdown(self):
+        """Stop accepting work and drop queued requests."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
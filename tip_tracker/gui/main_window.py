@@ -1,23 +1,39 @@
-"""Main window setup and theme configuration."""
+"""Main window setup and theme configuration.
 
+Startup is kept short: the window is drawn before the database connection
+and exchange rates are set up, and each tab (with its imports, matplotlib
+for the statistics tab) is only built when it is first selected.
+"""
+
+import threading
 import tkinter as tk
 from tkinter import ttk
 from config import WINDOW_TITLE, DEFAULT_WINDOW_SIZE, DARK_THEME
-from database.db_manager import DatabaseManager
-from database.tip_operations import TipOperations
-from utils.currency import CurrencyConverter
-from gui.add_tip_tab import AddTipTab
-from gui.view_tips_tab import ViewTipsTab
-from gui.statistics_tab import StatisticsTab
-from gui.settings_tab import SettingsTab
+from gui.data_service import DataService
+
+# Notebook tabs in display order; the tab objects are built on first selection
+TAB_TITLES = ("Add Tip", "View Tips", "Statistics", "Settings")
+
+# Milliseconds between checks for exchange rates refreshed in the background
+RATES_POLL_INTERVAL = 250
 
 
 class TipTrackerApp:
     def __init__(self):
-        # Initialize database components
-        self.db_manager = DatabaseManager()
-        self.currency_converter = CurrencyConverter(self.db_manager)
-        self.tip_operations = TipOperations(self.db_manager, self.currency_converter)
+        # Database components are created in the background once the window is up
+        self.db_manager = None
+        self.currency_converter = None
+        self.tip_operations = None
+        
+        # Tab objects by title, filled in as the tabs are first selected
+        self.tabs = {}
+        self.add_tip_tab = None
+        self.view_tips_tab = None
+        self.statistics_tab = None
+        self.settings_tab = None
+        
+        # Set by the rate refresh thread, checked on the main thread
+        self.rates_updated = threading.Event()
         
         # Initialize the GUI
         self.root = tk.Tk()
@@ -27,6 +43,9 @@ class TipTrackerApp:
         # Apply dark theme
         self.setup_dark_theme()
 
+        # Database calls from the tabs run off the UI thread
+        self.data_service = DataService(self.root)
+
         self.setup_gui()
         
     def setup_dark_theme(self):
@@ -75,17 +94,129 @@ class TipTrackerApp:
     
     def setup_gui(self):
         """Set up the GUI interface."""
-        notebook = ttk.Notebook(self.root)
-        notebook.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        # Add tabs
-        self.add_tip_tab = AddTipTab(notebook, self.tip_operations, self.currency_converter)
-        self.view_tips_tab = ViewTipsTab(notebook, self.tip_operations, self.currency_converter)
-        self.statistics_tab = StatisticsTab(notebook, self.tip_operations, self.currency_converter)
-        self.settings_tab = SettingsTab(notebook, self.currency_converter, self.tip_operations)
+        # Busy indicator shown while database work is running
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill='x', padx=10, pady=(0, 5))
+        self.busy_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.busy_var).pack(side=tk.LEFT)
+        self.busy_bar = ttk.Progressbar(status_frame, mode='indeterminate', length=120)
+        self.data_service.add_busy_listener(self.show_busy)
+        
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Empty placeholder pages keep the tab headers visible until the tabs are built
+        self.placeholders = {}
+        for title in TAB_TITLES:
+            placeholder = ttk.Frame(self.notebook)
+            self.notebook.add(placeholder, text=title)
+            self.placeholders[title] = placeholder
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.build_selected_tab())
+    
+    def start_services(self):
+        """Connect to the database and load exchange rates off the UI thread."""
+        self.data_service.submit(self._create_services, on_success=self._services_ready)
+    
+    @staticmethod
+    def _create_services():
+        """Create the database manager, currency converter and tip operations (worker thread)."""
+        # Imported here so that numpy and the database driver load after the first frame
+        from database.storage import create_db_manager
+        from utils.currency import CurrencyConverter
+        
+        db_manager = create_db_manager()
+        # Starts a background rate refresh when the stored rates are stale
+        currency_converter = CurrencyConverter(db_manager)
+        tip_operations = db_manager.create_tip_operations(currency_converter)
+        return db_manager, currency_converter, tip_operations
+    
+    def _services_ready(self, services):
+        """Keep the database components and build the selected tab."""
+        self.db_manager, self.currency_converter, self.tip_operations = services
+        
+        # Rates may still be refreshing in the background; redraw rate-dependent views when they arrive.
+        # Listeners run on the refresh thread, which must not call Tk, so it only sets a flag.
+        self.currency_converter.add_rates_listener(self.rates_updated.set)
+        self.root.after(RATES_POLL_INTERVAL, self.poll_rates_updated)
+        self.build_selected_tab()
+    
+    def poll_rates_updated(self):
+        """Pass on rate updates flagged by the refresh thread (main thread)."""
+        if self.rates_updated.is_set():
+            self.rates_updated.clear()
+            self.on_rates_updated()
+        self.root.after(RATES_POLL_INTERVAL, self.poll_rates_updated)
+    
+    def build_selected_tab(self):
+        """Build the selected tab if it has not been built yet."""
+        if self.tip_operations is None:
+            return  # Built by _services_ready once the database is available
+        
+        selected = self.notebook.select()
+        title = self.notebook.tab(selected, "text")
+        if title in self.tabs or self.placeholders.get(title) is None:
+            return
+        
+        tab = self._create_tab(title)
+        self.tabs[title] = tab
+        
+        # The tab added itself at the end; move it into the placeholder's position
+        placeholder = self.placeholders.pop(title)
+        self.notebook.insert(self.notebook.index(placeholder), tab.frame)
+        self.notebook.forget(placeholder)
+        self.notebook.select(tab.frame)
+    
+    def _create_tab(self, title):
+        """Import and construct the tab with the given title."""
+        if title == "Add Tip":
+            from gui.add_tip_tab import AddTipTab
+            self.add_tip_tab = AddTipTab(self.notebook, self.tip_operations, self.currency_converter,
+                                         self.data_service)
+            # New tips appear in the list without reloading it
+            self.add_tip_tab.add_tip_listener(self.on_tip_added)
+            return self.add_tip_tab
+        if title == "View Tips":
+            from gui.view_tips_tab import ViewTipsTab
+            self.view_tips_tab = ViewTipsTab(self.notebook, self.tip_operations, self.currency_converter,
+                                             self.data_service)
+            return self.view_tips_tab
+        if title == "Statistics":
+            from gui.statistics_tab import StatisticsTab
+            self.statistics_tab = StatisticsTab(self.notebook, self.tip_operations, self.currency_converter,
+                                                self.data_service)
+            return self.statistics_tab
+        from gui.settings_tab import SettingsTab
+        self.settings_tab = SettingsTab(self.notebook, self.currency_converter, self.tip_operations,
+                                        self.data_service)
+        return self.settings_tab
+    
+    def on_tip_added(self, tip):
+        """Pass a new tip to the list if it has been built; otherwise it loads the tip itself."""
+        if self.view_tips_tab:
+            self.view_tips_tab.tip_added(tip)
+    
+    def show_busy(self, busy):
+        """Show or hide the busy indicator."""
+        if busy:
+            self.busy_var.set("Loading...")
+            self.busy_bar.pack(side=tk.LEFT, padx=5)
+            self.busy_bar.start(10)
+        else:
+            self.busy_var.set("")
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+    
+    def on_rates_updated(self):
+        """Handle new exchange rates on the main thread."""
+        if self.statistics_tab:
+            self.statistics_tab.update_statistics()
     
     def run(self):
         """Run the application."""
+        # Idle callbacks run in order, so this starts after the first frame has been drawn
+        self.root.after_idle(self.start_services)
         self.root.mainloop()
         # Close database connection when app closes
-        self.db_manager.close_connection()
\ No newline at end of file
+        self.data_service.shutdown()
+        if self.db_manager:
+            self.db_manager.close_connection()
\ No newline at end of file
@@ -7,9 +7,10 @@ from gui.components import ComboboxKeyHandler
 
 
 class SettingsTab:
-    def __init__(self, parent, currency_converter, tip_operations):
+    def __init__(self, parent, currency_converter, tip_operations, data_service):
         self.currency_converter = currency_converter
         self.tip_operations = tip_operations
+        self.data_service = data_service
         
         # Create and add tab
         self.frame = ttk.Frame(parent)
@@ -37,9 +38,14 @@ class SettingsTab:
         update_rates_button.grid(column=1, row=1, sticky=tk.E, pady=10)
         
         # Save settings button
-        save_button = ttk.Button(frame, text="Save Settings", 
-                                 command=self.save_settings)
-        save_button.grid(column=1, row=2, sticky=tk.E, pady=10)
+        self.save_button = ttk.Button(frame, text="Save Settings", 
+                                      command=self.save_settings)
+        self.save_button.grid(column=1, row=2, sticky=tk.E, pady=10)
+        
+        # Base amount recalculation progress
+        self.rebase_status_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.rebase_status_var).grid(column=0, row=2, sticky=tk.W, pady=10)
+        self.rebase_progress = ttk.Progressbar(frame, mode='determinate', maximum=1)
         
         # MongoDB connection info
         mongo_frame = ttk.LabelFrame(frame, text="MongoDB Connection", padding=10)
@@ -79,7 +85,7 @@ class SettingsTab:
     
     def load_settings(self):
         """Load settings from database."""
-        settings = self.currency_converter.db_manager.settings_collection.find_one({"_id": "app_settings"})
+        settings = self.currency_converter.db_manager.get_settings_collection().find_one({"_id": "app_settings"})
         
         if settings:
             # Load export settings if available
@@ -92,9 +98,12 @@ class SettingsTab:
     
     def _update_rates_thread(self):
         """Update exchange rates in a separate thread."""
-        self.currency_converter.update_exchange_rates()
-        # Update UI from main thread
-        self.frame.after(0, lambda: messagebox.showinfo("Exchange Rates", "Exchange rates updated"))
+        if self.currency_converter.update_exchange_rates():
+            # Update UI from main thread
+            self.frame.after(0, lambda: messagebox.showinfo("Exchange Rates", "Exchange rates updated"))
+        else:
+            self.frame.after(0, lambda: messagebox.showerror("Exchange Rates",
+                                                             "Failed to update exchange rates, using stored rates"))
     
     def save_settings(self):
         """Save the settings."""
@@ -106,7 +115,7 @@ class SettingsTab:
         include_zero_days = self.include_zero_days_var.get()
         
         # Save all settings to database
-        self.currency_converter.db_manager.settings_collection.update_one(
+        self.currency_converter.db_manager.get_settings_collection().update_one(
             {"_id": "app_settings"},
             {"$set": {
                 "base_currency": new_base,
@@ -119,26 +128,62 @@ class SettingsTab:
         if new_base != current_base:
             self.currency_converter.set_base_currency(new_base)
             
-            # Recalculate all base amounts for existing tips
-            self.tip_operations.recalculate_base_amounts()
+            # Recalculate all base amounts for existing tips without blocking the mainloop
+            self.save_button.config(state=tk.DISABLED)
+            self.rebase_status_var.set("Recalculating base amounts...")
+            self.rebase_progress.config(value=0)
+            self.rebase_progress.grid(column=0, row=5, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+            threading.Thread(target=self._recalculate_thread, daemon=True).start()
+            return
         
         messagebox.showinfo("Settings", "Settings saved successfully")
     
-    def test_db_connection(self):
-        """Test the database connection."""
+    def _recalculate_thread(self):
+        """Recalculate base amounts in a separate thread."""
         try:
-            from database.db_manager import DatabaseManager
-            
-            test_manager = DatabaseManager()
-            success, error = test_manager.test_connection(
-                self.mongo_server_var.get(),
-                self.mongo_db_var.get()
-            )
-            
-            if success:
-                messagebox.showinfo("Connection Test", "Successfully connected to MongoDB")
-            else:
-                messagebox.showerror("Connection Test", f"Failed to connect: {error}")
-                
+            self.tip_operations.recalculate_base_amounts(progress_callback=self._report_rebase_progress)
+            error = None
         except Exception as e:
-            messagebox.showerror("Connection Test", f"Failed to connect: {str(e)}")
\ No newline at end of file
+            error = str(e)
+        # Update UI from main thread
+        self.frame.after(0, lambda: self._recalculate_finished(error))
+    
+    def _report_rebase_progress(self, done, total):
+        """Forward rebase progress to the main thread."""
+        self.frame.after(0, lambda: self._show_rebase_progress(done, total))
+    
+    def _show_rebase_progress(self, done, total):
+        """Show rebase progress in the progress bar."""
+        self.rebase_progress.config(maximum=max(total, 1), value=done)
+        self.rebase_status_var.set(f"Recalculating base amounts... {done}/{total}")
+    
+    def _recalculate_finished(self, error):
+        """Restore the tab once the rebase has finished."""
+        self.rebase_progress.grid_remove()
+        self.rebase_status_var.set("")
+        self.save_button.config(state=tk.NORMAL)
+        
+        if error:
+            messagebox.showerror("Settings", f"Failed to recalculate base amounts: {error}")
+        else:
+            messagebox.showinfo("Settings", "Settings saved successfully")
+    
+    def test_db_connection(self):
+        """Test the database connection off the UI thread."""
+        from database.db_manager import DatabaseManager
+        
+        self.data_service.submit(
+            DatabaseManager.test_connection,
+            self.mongo_server_var.get(),
+            self.mongo_db_var.get(),
+            on_success=self.show_connection_result,
+            on_error=lambda e: messagebox.showerror("Connection Test", f"Failed to connect: {str(e)}")
+        )
+    
+    def show_connection_result(self, result):
+        """Report the connection test result (main thread)."""
+        success, error = result
+        if success:
+            messagebox.showinfo("Connection Test", "Successfully connected to MongoDB")
+        else:
+            messagebox.showerror("Connection Test", f"Failed to connect: {error}")
\ No newline at end of file
@@ -1,17 +1,20 @@
 """Statistics tab functionality."""
 
+import math
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from config import DARK_THEME
 from utils.date_parser import DateParser
 
 
 class StatisticsTab:
-    def __init__(self, parent, tip_operations, currency_converter):
+    def __init__(self, parent, tip_operations, currency_converter, data_service):
         self.tip_operations = tip_operations
         self.currency_converter = currency_converter
+        self.data_service = data_service
         
         # Create and add tab
         self.frame = ttk.Frame(parent)
@@ -46,33 +49,82 @@ class StatisticsTab:
         # Canvas for charts
         self.chart_frame = ttk.Frame(self.stats_frame)
         self.chart_frame.pack(fill='both', expand=True, pady=10)
+        self.setup_charts()
         
         # Initial stats
         self.update_statistics()
     
+    def setup_charts(self):
+        """Create the figure, axes and canvas once; refreshes only update their artists."""
+        self.figure = Figure(figsize=(8, 4), dpi=100, facecolor=DARK_THEME['bg_color'])
+        
+        # Currency distribution
+        self.pie_ax = self.figure.add_subplot(1, 2, 1, facecolor=DARK_THEME['bg_color'])
+        self.pie_ax.set_title('Tips by Currency (USD Equivalent)', color='white', pad=20)
+        self.pie_ax.set_aspect('equal')
+        self.pie_ax.axis('off')
+        self.wedges, self.pie_texts, self.pie_autotexts = [], [], []
+        
+        # Daily totals over time
+        self.trend_ax = self.figure.add_subplot(1, 2, 2, facecolor=DARK_THEME['bg_color'])
+        self.trend_line, = self.trend_ax.plot([], [], color='#4fc3f7', linewidth=1)
+        self.trend_ax.xaxis_date()
+        self.trend_ax.tick_params(colors='white', labelsize=8)
+        for spine in self.trend_ax.spines.values():
+            spine.set_color(DARK_THEME['button_active'])
+        
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
     def update_statistics(self):
         """Update the statistics display."""
-        # Clear existing stats
-        self.stats_text.delete(1.0, tk.END)
-        
-        # Clear existing charts
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-            
         # Parse dates
         start_date = DateParser.parse_date_string(self.stats_start_date_var.get())
         end_date = DateParser.parse_date_string(self.stats_end_date_var.get())
         
         if (self.stats_start_date_var.get() and not start_date) or (self.stats_end_date_var.get() and not end_date):
+            self.clear_statistics()
             self.stats_text.insert(tk.END, "Invalid date format. Use YYYY-MM-DD.\n")
             return
-            
-        # Get statistics
+        
+        # Get statistics off the UI thread; a newer request replaces this one
+        self.data_service.submit(
+            self._fetch_statistics, start_date, end_date,
+            on_success=self.show_statistics,
+            key="statistics"
+        )
+    
+    def _fetch_statistics(self, start_date, end_date):
+        """Load summary statistics, the monthly trend and daily totals (worker thread)."""
         stats = self.tip_operations.get_summary_stats(start_date, end_date)
+        if not stats:
+            return stats, [], None
+        trend = self.tip_operations.get_trend("month", start_date, end_date)
+        daily_totals = self.tip_operations.get_daily_totals(start_date, end_date)
+        return stats, trend, daily_totals
+    
+    def clear_statistics(self):
+        """Clear the text and empty the charts."""
+        # Clear existing stats
+        self.stats_text.delete(1.0, tk.END)
+        
+        # Empty the charts without recreating them
+        self.update_pie_chart({})
+        self.update_trend_chart(None)
+        self.canvas.draw_idle()
+    
+    def show_statistics(self, result):
+        """Display loaded statistics (main thread)."""
+        stats, trend, daily_totals = result
         
         if not stats:
+            self.clear_statistics()
             self.stats_text.insert(tk.END, "No data available for the selected period.\n")
             return
+        
+        # Only the text is cleared; emptying the pie first would remove its wedges
+        # and force a rebuild instead of the in-place update below
+        self.stats_text.delete(1.0, tk.END)
             
         # Display text stats
         self.stats_text.insert(tk.END, f"Total Tips: {stats['total_tips']}\n\n")
@@ -83,41 +135,79 @@ class StatisticsTab:
             # Add the USD equivalent for reference
             usd_equiv = stats['usd_equivalents'].get(curr, 0)
             self.stats_text.insert(tk.END, f"  {curr}: {amount:.2f} (≈ USD {usd_equiv:.2f})\n")
+        
+        # Monthly trend from the rollups collection
+        if trend:
+            self.stats_text.insert(tk.END, f"\nBy Month ({stats['base_currency']}):\n")
+            for month in trend:
+                self.stats_text.insert(
+                    tk.END,
+                    f"  {DateParser.format_date(month['start'], '%Y-%m')}: "
+                    f"{month['base_amount']:.2f} ({month['count']} tips)\n"
+                )
             
-        # Create chart for currency distribution
-        self.create_pie_chart(stats)
+        # Update the charts in place
+        self.update_pie_chart(stats['usd_equivalents'])
+        self.update_trend_chart(daily_totals, stats['base_currency'])
+        self.canvas.draw_idle()
     
-    def create_pie_chart(self, stats):
-        """Create pie chart for currency distribution."""
-        fig = plt.Figure(figsize=(6, 4), dpi=100, facecolor=DARK_THEME['bg_color'])
-        ax = fig.add_subplot(111, facecolor=DARK_THEME['bg_color'])
-        
+    def update_pie_chart(self, usd_equivalents):
+        """Show the currency distribution, reusing the wedges when the currencies are unchanged."""
         # Use the USD equivalents for the pie chart
-        labels = list(stats['usd_equivalents'].keys())
-        sizes = list(stats['usd_equivalents'].values())
-        
-        # Create labels with both currency and USD value
-        pie_labels = [f"{curr}\n(${val:.2f})" for curr, val in zip(labels, sizes)]
-        
-        # Create pie chart with improved styling
-        wedges, texts, autotexts = ax.pie(
-            sizes, 
-            labels=pie_labels, 
-            autopct='%1.1f%%',
-            startangle=90, 
-            textprops=dict(color='white'),
-            wedgeprops=dict(width=0.5, edgecolor=DARK_THEME['bg_color'])
+        labels = list(usd_equivalents.keys())
+        sizes = list(usd_equivalents.values())
+        total = sum(sizes)
+        
+        if len(labels) != len(self.wedges):
+            # Different number of currencies: replace the pie's artists on the same axes
+            for artist in self.wedges + self.pie_texts + self.pie_autotexts:
+                artist.remove()
+            self.wedges, self.pie_texts, self.pie_autotexts = [], [], []
+            if labels and total > 0:
+                self.wedges, self.pie_texts, self.pie_autotexts = self.pie_ax.pie(
+                    sizes,
+                    labels=labels,
+                    autopct='%1.1f%%',
+                    startangle=90,
+                    textprops=dict(color='white'),
+                    wedgeprops=dict(width=0.5, edgecolor=DARK_THEME['bg_color'])
+                )
+        
+        # Same layout as Axes.pie: counterclockwise from 90 degrees, labels at 1.1, percentages at 0.6
+        theta = 90.0
+        for wedge, text, autotext, curr, size in zip(self.wedges, self.pie_texts, self.pie_autotexts,
+                                                     labels, sizes):
+            fraction = size / total if total else 0
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + 360 * fraction)
+            middle = math.radians(theta + 180 * fraction)
+            theta += 360 * fraction
+            
+            x, y = math.cos(middle), math.sin(middle)
+            text.set_text(f"{curr}\n(${size:.2f})")
+            text.set_position((1.1 * x, 1.1 * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_text(f"{fraction * 100:.1f}%")
+            autotext.set_position((0.6 * x, 0.6 * y))
+        
+        self.pie_ax.set_xlim(-1.25, 1.25)
+        self.pie_ax.set_ylim(-1.25, 1.25)
+    
+    def update_trend_chart(self, daily_totals, base_currency=""):
+        """Show base currency totals over time from the downsampled daily totals."""
+        points = daily_totals["points"] if daily_totals else []
+        self.trend_line.set_data(
+            mdates.date2num([point['start'] for point in points]),
+            [point['base_amount'] for point in points]
         )
         
-        # Improve title
-        ax.set_title('Tips by Currency (USD Equivalent - Purchasing Power)', color='white', pad=20)
-        
-        # Set equal aspect ratio to ensure circular plot
-        ax.set_aspect('equal')
-        
-        fig.tight_layout()
+        if daily_totals and daily_totals["bucket_days"] > 1:
+            title = f"Totals per {daily_totals['bucket_days']} days ({base_currency})"
+        else:
+            title = f"Daily totals ({base_currency})" if base_currency else "Daily totals"
+        self.trend_ax.set_title(title, color='white')
         
-        # Add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
\ No newline at end of file
+        if points:
+            self.trend_ax.relim()
+            self.trend_ax.autoscale_view()
+            self.figure.autofmt_xdate()
\ No newline at end of file
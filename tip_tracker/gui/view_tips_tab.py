@@ -1,27 +1,29 @@
-"""View Tips tab functionality with pagination support."""
+"""View Tips tab functionality with virtual scrolling over all matching tips."""
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-from gui.components import ComboboxKeyHandler, ContextMenu
+from gui.components import ComboboxKeyHandler, ContextMenu, TipWindowSource, VirtualTreeview, WINDOW_FETCH_SIZE
+from utils.location import location_key
 from utils.date_parser import DateParser
 
 
 class ViewTipsTab:
-    def __init__(self, parent, tip_operations, currency_converter):
+    def __init__(self, parent, tip_operations, currency_converter, data_service):
         self.tip_operations = tip_operations
         self.currency_converter = currency_converter
+        self.data_service = data_service
         
         # Store reference to parent (notebook) and find root window
         self.parent = parent
         self.root = self._find_root()
         
-        # Pagination settings
-        self.page_size = 20  # Number of entries per page
-        self.current_page = 1
-        self.total_pages = 1
         self.total_tips = 0
         
+        # Filters in effect and the window of tips loaded for them
+        self.current_filters = {}
+        self.source = None
+        
         # Create and add tab
         self.frame = ttk.Frame(parent)
         parent.add(self.frame, text="View Tips")
@@ -72,123 +74,62 @@ class ViewTipsTab:
         currency_filter_combo.grid(column=1, row=2, pady=5)
         ComboboxKeyHandler.setup_keypress(currency_filter_combo)
         
+        # Filter by location (prefix match, case-insensitive)
+        ttk.Label(filter_frame, text="Location:").grid(column=0, row=3, sticky=tk.W, pady=5)
+        self.filter_location_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.filter_location_var).grid(column=1, row=3, pady=5)
+        
         # Apply filters button
-        ttk.Button(filter_frame, text="Apply Filters", command=self.refresh_tips_view).grid(column=1, row=3, pady=10)
+        ttk.Button(filter_frame, text="Apply Filters", command=self.refresh_tips_view).grid(column=1, row=4, pady=10)
         
         # Export button
-        ttk.Button(filter_frame, text="Export to CSV", command=self.export_tips_csv).grid(column=2, row=3, pady=10)
-        
-        # Treeview for tips
-        self.tips_tree = ttk.Treeview(frame, columns=("date", "amount", "currency", "notes"))
-        self.tips_tree.heading("#0", text="ID")
-        self.tips_tree.heading("date", text="Date")
-        self.tips_tree.heading("amount", text="Amount")
-        self.tips_tree.heading("currency", text="Currency")
-        self.tips_tree.heading("notes", text="Notes")
-        
-        self.tips_tree.column("#0", width=0, stretch=tk.NO)  # Hide ID column
-        self.tips_tree.column("date", width=100)
-        self.tips_tree.column("amount", width=100)
-        self.tips_tree.column("currency", width=80)
-        self.tips_tree.column("notes", width=300)
-        
-        self.tips_tree.pack(fill='both', expand=True, pady=10)
+        ttk.Button(filter_frame, text="Export to CSV", command=self.export_tips_csv).grid(column=2, row=4, pady=10)
+        
+        # Import button and progress
+        self.import_button = ttk.Button(filter_frame, text="Import...", command=self.import_tips)
+        self.import_button.grid(column=3, row=4, pady=10)
+        self.import_status_var = tk.StringVar()
+        ttk.Label(filter_frame, textvariable=self.import_status_var).grid(column=0, row=5, columnspan=4, sticky=tk.W)
+        self.import_progress = ttk.Progressbar(filter_frame, mode='determinate', maximum=1)
+        
+        # Virtual list of tips: only the visible rows exist as tree items
+        self.tips_view = VirtualTreeview(
+            frame,
+            columns=("date", "amount", "currency", "notes"),
+            headings={
+                "date": ("Date", 100),
+                "amount": ("Amount", 100),
+                "currency": ("Currency", 80),
+                "notes": ("Notes", 300)
+            },
+            format_row=self.format_tip_row
+        )
+        self.tips_view.frame.pack(fill='both', expand=True, pady=10)
+        self.tips_tree = self.tips_view.tree
         
         # Create context menu
         self.context_menu = ContextMenu(self, self.tips_tree, self.tip_operations, self.currency_converter)
         
-        # Pagination frame
-        self.setup_pagination_controls(frame)
+        # Total entries label
+        self.total_entries_var = tk.StringVar(value="Total entries: 0")
+        ttk.Label(frame, textvariable=self.total_entries_var).pack(anchor=tk.W, pady=5)
         
         # Load initial data
         self.refresh_tips_view()
     
-    def setup_pagination_controls(self, parent):
-        """Set up pagination controls."""
-        pagination_frame = ttk.Frame(parent)
-        pagination_frame.pack(fill='x', pady=5)
-        
-        # First page button
-        self.first_page_btn = ttk.Button(pagination_frame, text="<<", command=self.go_to_first_page)
-        self.first_page_btn.pack(side=tk.LEFT, padx=2)
-        
-        # Previous page button
-        self.prev_page_btn = ttk.Button(pagination_frame, text="<", command=self.go_to_prev_page)
-        self.prev_page_btn.pack(side=tk.LEFT, padx=2)
-        
-        # Page information label
-        self.page_info_var = tk.StringVar(value="Page 1 of 1")
-        page_info_label = ttk.Label(pagination_frame, textvariable=self.page_info_var)
-        page_info_label.pack(side=tk.LEFT, padx=10)
-        
-        # Total entries label
-        self.total_entries_var = tk.StringVar(value="Total entries: 0")
-        total_entries_label = ttk.Label(pagination_frame, textvariable=self.total_entries_var)
-        total_entries_label.pack(side=tk.LEFT, padx=10)
-        
-        # Next page button
-        self.next_page_btn = ttk.Button(pagination_frame, text=">", command=self.go_to_next_page)
-        self.next_page_btn.pack(side=tk.LEFT, padx=2)
-        
-        # Last page button
-        self.last_page_btn = ttk.Button(pagination_frame, text=">>", command=self.go_to_last_page)
-        self.last_page_btn.pack(side=tk.LEFT, padx=2)
-        
-        # Page size selection
-        ttk.Label(pagination_frame, text="Page size:").pack(side=tk.LEFT, padx=10)
-        self.page_size_var = tk.StringVar(value="20")
-        page_size_combo = ttk.Combobox(pagination_frame, textvariable=self.page_size_var, 
-                                      values=["10", "20", "50", "100"], width=5)
-        page_size_combo.pack(side=tk.LEFT)
-        page_size_combo.bind("<<ComboboxSelected>>", self.change_page_size)
+    @staticmethod
+    def format_tip_row(tip):
+        """Get the (iid, text, values) of a tip's tree row."""
+        tip_id = str(tip['_id'])
+        return tip_id, tip_id, (DateParser.format_datetime(tip['date']), tip['amount'], tip['currency'],
+                                tip.get('notes', ''))
     
-    def change_page_size(self, event=None):
-        """Handle page size change."""
-        try:
-            self.page_size = int(self.page_size_var.get())
-            self.current_page = 1  # Reset to first page
-            self.refresh_tips_view()
-        except ValueError:
-            self.page_size = 20
-            self.page_size_var.set("20")
-    
-    def go_to_first_page(self):
-        """Go to the first page."""
-        if self.current_page > 1:
-            self.current_page = 1
-            self.load_tips_for_current_page()
-    
-    def go_to_prev_page(self):
-        """Go to the previous page."""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.load_tips_for_current_page()
-    
-    def go_to_next_page(self):
-        """Go to the next page."""
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            self.load_tips_for_current_page()
-    
-    def go_to_last_page(self):
-        """Go to the last page."""
-        if self.current_page < self.total_pages:
-            self.current_page = self.total_pages
-            self.load_tips_for_current_page()
-    
-    def update_pagination_info(self):
-        """Update pagination information and button states."""
-        self.page_info_var.set(f"Page {self.current_page} of {self.total_pages}")
+    def update_total_info(self):
+        """Show the number of matching tips."""
         self.total_entries_var.set(f"Total entries: {self.total_tips}")
-        
-        # Update button states
-        self.first_page_btn.config(state=tk.NORMAL if self.current_page > 1 else tk.DISABLED)
-        self.prev_page_btn.config(state=tk.NORMAL if self.current_page > 1 else tk.DISABLED)
-        self.next_page_btn.config(state=tk.NORMAL if self.current_page < self.total_pages else tk.DISABLED)
-        self.last_page_btn.config(state=tk.NORMAL if self.current_page < self.total_pages else tk.DISABLED)
     
-    def get_filtered_tips(self):
-        """Get tips with current filters."""
+    def get_current_filters(self):
+        """Get the current filter values as keyword arguments for tip queries."""
         # Parse dates
         start_date = DateParser.parse_date_string(self.start_date_var.get())
         end_date = DateParser.parse_date_string(self.end_date_var.get())
@@ -197,57 +138,103 @@ class ViewTipsTab:
             messagebox.showerror("Invalid Date", "Please enter dates in YYYY-MM-DD format")
             return None
             
-        # Get tips with filters
-        return self.tip_operations.get_tips(
-            start_date=start_date,
-            end_date=end_date,
-            currency=self.filter_currency_var.get()
-        )
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "currency": self.filter_currency_var.get(),
+            "location": self.filter_location_var.get().strip()
+        }
     
-    def load_tips_for_current_page(self):
-        """Load tips for the current page only."""
-        # Clear existing items
-        for item in self.tips_tree.get_children():
-            self.tips_tree.delete(item)
-        
-        # Get all filtered tips
-        all_tips = self.get_filtered_tips()
-        if all_tips is None:  # Error occurred
+    def remove_tip_items(self, tip_ids, deleted_count):
+        """Remove deleted tips from the list without reloading it."""
+        if not self.source:
             return
         
-        # Calculate pagination
-        self.total_tips = len(all_tips)
-        self.total_pages = max(1, (self.total_tips + self.page_size - 1) // self.page_size)
+        def change():
+            self.source.remove(tip_ids)
+            self.source.total = max(0, self.source.total - deleted_count)
+        self.tips_view.apply_change(change)
+        self.total_tips = self.source.total
+        self.update_total_info()
+    
+    def update_tip_items(self, tip_ids, currency=None, notes=None):
+        """Update the currency and/or notes shown for tips in place."""
+        if not self.source:
+            return
         
-        # Ensure current page is valid
-        if self.current_page > self.total_pages:
-            self.current_page = self.total_pages
+        changes = {key: value for key, value in (("currency", currency), ("notes", notes)) if value is not None}
+        self.tips_view.apply_change(lambda: self.source.update(tip_ids, changes))
+    
+    def tip_updated(self, tip):
+        """Show an edited tip in place, or drop it if it no longer matches the filters."""
+        if not self.source:
+            return
         
-        # Calculate slice for current page
-        start_idx = (self.current_page - 1) * self.page_size
-        end_idx = start_idx + self.page_size
-        page_tips = all_tips[start_idx:end_idx]
+        if not self.matches_filters(tip):
+            self.remove_tip_items([tip['_id']], 1 if self.source.find(tip['_id']) is not None else 0)
+            return
         
-        # Populate tree with current page tips
-        for tip in page_tips:
-            date_str = DateParser.format_datetime(tip['date'])
-            self.tips_tree.insert("", tk.END, text=str(tip['_id']),
-                                 values=(date_str, tip['amount'], tip['currency'], 
-                                        tip.get('notes', '')))
+        self.tips_view.apply_change(lambda: self.source.replace(tip))
+        item = self.tips_view.item_for(tip['_id'])
+        if item:
+            self.tips_tree.selection_set(item)
+    
+    def tip_added(self, tip):
+        """Insert a newly added tip if it matches the current filters."""
+        if not self.source or not self.matches_filters(tip):
+            return
         
-        # Update pagination controls
-        self.update_pagination_info()
+        self.tips_view.apply_change(lambda: self.source.insert(tip))
+        self.total_tips = self.source.total
+        self.update_total_info()
+    
+    def matches_filters(self, tip):
+        """Check a tip against the filters of the loaded list, as the storage queries do."""
+        filters = self.current_filters
+        if filters.get("start_date") and tip['date'] < filters["start_date"]:
+            return False
+        if filters.get("end_date") and tip['date'] > filters["end_date"]:
+            return False
+        if filters.get("currency") and tip['currency'] != filters["currency"]:
+            return False
+        if filters.get("location") and \
+                not location_key(tip.get('location')).startswith(location_key(filters["location"])):
+            return False
+        return True
+    
+    def _fetch_first_page(self, filters):
+        """Count the filtered tips and fetch the first window (worker thread)."""
+        total = self.tip_operations.count_tips(**filters)
+        return total, self.tip_operations.get_tips_page(WINDOW_FETCH_SIZE, **filters)
+    
+    def _show_first_page(self, result):
+        """Show the list for fresh filters from the top."""
+        self.total_tips, first_tips = result
+        self.source = TipWindowSource(self.tip_operations, self.data_service, self.current_filters,
+                                      self.total_tips, first_tips)
+        self.tips_view.set_source(self.source)
+        self.update_total_info()
     
     def refresh_tips_view(self):
         """Refresh the tips view with current filters."""
-        self.current_page = 1  # Reset to first page
-        self.load_tips_for_current_page()
+        filters = self.get_current_filters()
+        if filters is None:  # Error occurred
+            return
+        
+        self.current_filters = filters
+        
+        # Supersedes any window query still in flight
+        self.data_service.submit(
+            self._fetch_first_page, filters,
+            on_success=self._show_first_page,
+            key="view_tips"
+        )
     
     def export_tips_csv(self):
         """Export tips to CSV file using settings from database."""
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet"), ("All files", "*.*")]
         )
         
         if not filename:
@@ -262,14 +249,83 @@ class ViewTipsTab:
             return
         
         # Get the setting from database
-        settings_collection = self.tip_operations.tips_collection.database.get_collection('settings')
+        settings_collection = self.currency_converter.db_manager.get_settings_collection()
         settings = settings_collection.find_one({"_id": "app_settings"})
         include_zero_days = True  # Default value
         
         if settings and 'include_zero_days_export' in settings:
             include_zero_days = settings['include_zero_days_export']
         
-        if self.tip_operations.export_to_csv(filename, start_date, end_date, include_zero_days):
+        file_format = "parquet" if filename.lower().endswith(".parquet") else "csv"
+        
+        try:
+            exported = self.tip_operations.export_tips(filename, start_date, end_date, include_zero_days,
+                                                       file_format=file_format)
+        except ImportError as e:
+            messagebox.showerror("Export Failed", str(e))
+            return
+        
+        if exported:
             messagebox.showinfo("Export Successful", f"Data exported to {filename}")
         else:
-            messagebox.showerror("Export Failed", "No data to export or export failed")
\ No newline at end of file
+            messagebox.showerror("Export Failed", "No data to export or export failed")
+    
+    def import_tips(self):
+        """Import tips from a CSV or Excel file in the background."""
+        filename = filedialog.askopenfilename(
+            filetypes=[("CSV or Excel files", "*.csv *.xlsx *.xlsm"), ("All files", "*.*")]
+        )
+        
+        if not filename:
+            return
+        
+        self.import_button.config(state=tk.DISABLED)
+        self.import_status_var.set("Importing...")
+        self.import_progress.config(value=0)
+        self.import_progress.grid(column=0, row=6, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        self.data_service.submit(
+            self.tip_operations.import_tips, filename,
+            progress_callback=self._report_import_progress,
+            on_success=self._import_finished,
+            on_error=self._import_failed
+        )
+    
+    def _report_import_progress(self, done, total, result):
+        """Forward import progress to the main thread."""
+        inserted = result["inserted"]
+        self.frame.after(0, lambda: self._show_import_progress(done, total, inserted))
+    
+    def _show_import_progress(self, done, total, inserted):
+        """Show import progress in the progress bar."""
+        self.import_progress.config(maximum=max(total, 1), value=done)
+        self.import_status_var.set(f"Importing... {inserted} tips added")
+    
+    def _end_import(self):
+        """Restore the import controls."""
+        self.import_progress.grid_remove()
+        self.import_status_var.set("")
+        self.import_button.config(state=tk.NORMAL)
+    
+    def _import_finished(self, result):
+        """Report the import result and show the new tips."""
+        self._end_import()
+        
+        message = (f"Rows read: {result['read']}\n"
+                   f"Tips added: {result['inserted']}\n"
+                   f"Already imported: {result['duplicates']}\n"
+                   f"Zero entries skipped: {result['skipped']}\n"
+                   f"Invalid rows: {result['invalid']}")
+        if result["errors"]:
+            details = "\n".join(f"Row {row}: {reason}" for row, reason in result["errors"][:10])
+            message += f"\n\n{details}"
+            if result["invalid"] > 10:
+                message += "\n..."
+        messagebox.showinfo("Import Finished", message)
+        
+        if result["inserted"]:
+            self.refresh_tips_view()
+    
+    def _import_failed(self, error):
+        """Report a failed import."""
+        self._end_import()
+        messagebox.showerror("Import Failed", str(error))
\ No newline at end of file
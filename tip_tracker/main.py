@@ -1,5 +1,9 @@
+import logging
+from config import QUERY_DEBUG
 from gui.main_window import TipTrackerApp
 
 if __name__ == "__main__":
+    if QUERY_DEBUG:
+        logging.basicConfig(level=logging.DEBUG, format="%(asctime)s %(name)s %(levelname)s %(message)s")
     app = TipTrackerApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Shared fixtures for the Tip Tracker tests.
+
+The tests run against mongomock and temporary SQLite databases, so they
+need no MongoDB server or network access. Run them from the tip_tracker
+directory:
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import datetime
+import pytest
+
+# Modules import each other from the tip_tracker directory, as when run with main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.currency import CurrencyConverter
+
+# Fixed USD-based rates, so conversions do not depend on the exchange rate API
+TEST_RATES = {"USD": 1.0, "EUR": 0.9, "GBP": 0.8, "JPY": 150.0}
+
+
+class FixedRateConverter(CurrencyConverter):
+    """Currency converter using TEST_RATES instead of stored or fetched rates."""
+
+    def _load_stored_rates(self):
+        """Use the fixed test rates."""
+        self.exchange_rates = dict(TEST_RATES)
+        self.rates_updated = datetime.now()
+
+    def update_exchange_rates(self):
+        """Keep the fixed test rates."""
+        return False
+
+
+@pytest.fixture
+def mongo_manager(tmp_path):
+    """DatabaseManager on an in-memory mongomock server with its journal in tmp_path."""
+    mongomock = pytest.importorskip("mongomock")
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager(db_name="tip_tracker_test", journal_path=str(tmp_path / "tip_journal.jsonl"),
+                                 client=mongomock.MongoClient())
+    yield db_manager
+    db_manager.close_connection()
+
+
+@pytest.fixture
+def sqlite_manager(tmp_path):
+    """SQLiteDatabaseManager on a new database file in tmp_path."""
+    from database.sqlite_storage import SQLiteDatabaseManager
+
+    db_manager = SQLiteDatabaseManager(str(tmp_path / "tips.db"))
+    yield db_manager
+    db_manager.close_connection()
+
+
+@pytest.fixture(params=["mongo", "sqlite"])
+def storage(request):
+    """Tip operations of each storage backend, converting at TEST_RATES to USD."""
+    db_manager = request.getfixturevalue(f"{request.param}_manager")
+    currency_converter = FixedRateConverter(db_manager, base_currency="USD", refresh_rates=False)
+    return db_manager.create_tip_operations(currency_converter)
@@ -0,0 +1,42 @@
+"""Tests for the prefix completion index."""
+
+from utils.completion import CompletionIndex, completion_index
+
+CURRENCIES = ["USD", "EUR", "GBP", "usd", "JPY", "US", "ZAR"]
+
+
+def test_match_ranks_alphabetically_with_the_exact_match_first():
+    index = CompletionIndex(CURRENCIES)
+
+    assert index.matches("us") == ["US", "USD", "usd"]
+    assert index.match("us") == CURRENCIES.index("US")
+    assert index.count("us") == 3
+
+
+def test_match_rank_wraps_around_the_matches():
+    index = CompletionIndex(CURRENCIES)
+    ranked = [CURRENCIES[index.match("U", rank)] for rank in range(7)]
+
+    assert ranked == ["US", "USD", "usd", "US", "USD", "usd", "US"]
+    assert CURRENCIES[index.match("U", -1)] == "usd"
+
+
+def test_no_match():
+    index = CompletionIndex(CURRENCIES)
+
+    assert index.match("X") is None
+    assert index.match("X", 4) is None
+    assert index.count("X") == 0
+    assert index.matches("X") == []
+
+
+def test_empty_prefix_matches_everything():
+    index = CompletionIndex(CURRENCIES)
+
+    assert index.count("") == len(index) == len(CURRENCIES)
+    assert index.matches("", limit=2) == ["EUR", "GBP"]
+
+
+def test_indexes_are_shared_per_value_list():
+    assert completion_index(CURRENCIES) is completion_index(list(CURRENCIES))
+    assert completion_index(CURRENCIES) is not completion_index(CURRENCIES[:3])
@@ -0,0 +1,34 @@
+"""Tests for the day and month rollups."""
+
+from datetime import datetime
+from database.rollup_operations import RollupOperations
+
+
+def test_rollups_of_a_legacy_database_are_built_once(mongo_manager, monkeypatch):
+    mongo_manager.get_tips_collection().insert_many([
+        {"amount": 10.0, "currency": "USD", "date": datetime(2024, 5, 1, 20), "base_amount": 10.0},
+        {"amount": 4.0, "currency": "EUR", "date": datetime(2024, 6, 2, 21), "base_amount": 4.4}
+    ])
+    rollups = RollupOperations(mongo_manager)
+
+    assert [(doc["start"], doc["count"]) for doc in rollups.get_rollups("month")] == [
+        (datetime(2024, 5, 1), 1), (datetime(2024, 6, 1), 1)
+    ]
+
+    checks = []
+    find_one = rollups.rollups_collection.find_one
+    monkeypatch.setattr(rollups.rollups_collection, "find_one",
+                        lambda *args, **kwargs: checks.append(args) or find_one(*args, **kwargs))
+    rollups.get_rollups("day")
+    rollups.get_rollups("month", start_date=datetime(2024, 6, 1))
+    assert checks == []
+
+
+def test_rebuild_replaces_stale_rollups(mongo_manager):
+    rollups = RollupOperations(mongo_manager)
+    tip = {"amount": 5.0, "currency": "USD", "date": datetime(2024, 5, 1, 20), "base_amount": 5.0}
+    mongo_manager.get_tips_collection().insert_one(dict(tip))
+    rollups.apply_changes(added=[tip, tip])
+
+    assert rollups.rebuild() == 2
+    assert [doc["count"] for doc in rollups.get_rollups("day")] == [1]
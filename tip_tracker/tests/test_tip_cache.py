@@ -0,0 +1,117 @@
+"""Tests comparing the in-memory TipCache reads with the same queries on MongoDB."""
+
+from datetime import datetime, timedelta
+import pytest
+from conftest import FixedRateConverter
+from database.tip_cache import TipCache, CachedTipOperations
+from database.tip_operations import TipOperations
+
+START = datetime(2024, 1, 1, 19)
+LOCATIONS = ["Harbour Bar", "harbour cafe", "Station", ""]
+CURRENCIES = ["USD", "EUR", "GBP", "JPY"]
+
+# (start_date, end_date, currency, location) filter combinations to compare
+FILTERS = [
+    (None, None, None, None),
+    (START + timedelta(days=10), START + timedelta(days=40), None, None),
+    (None, START + timedelta(days=20), "EUR", None),
+    (None, None, None, "harb"),
+    (START + timedelta(days=5), None, "GBP", "station"),
+    (None, None, "CHF", None)
+]
+
+
+@pytest.fixture
+def backends(mongo_manager):
+    """(direct, cached) tip operations on the same mongomock database, with 60 tips."""
+    currency_converter = FixedRateConverter(mongo_manager, base_currency="USD", refresh_rates=False)
+    direct = TipOperations(mongo_manager, currency_converter)
+    cache = TipCache(mongo_manager.get_tips_collection())
+    cached = CachedTipOperations(mongo_manager, currency_converter, cache)
+
+    for number in range(60):
+        # Every fifth tip shares the previous tip's date, to exercise the _id tiebreak
+        day = number - 1 if number % 5 == 4 else number
+        date = START + timedelta(days=day, hours=day % 3)
+        direct.add_tip(1.0 + number % 7, CURRENCIES[number % 4], date, location=LOCATIONS[number % 4])
+    yield direct, cached
+    cache.stop()
+
+
+def approx(value):
+    """Compare floats approximately, also inside the nested get_summary_stats and get_daily_totals results."""
+    if isinstance(value, float):
+        return pytest.approx(value)
+    if isinstance(value, dict):
+        return {key: approx(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [approx(item) for item in value]
+    return value
+
+
+def keyset(tip):
+    """The (date, _id) boundary of a tip."""
+    return tip["date"], tip["_id"]
+
+
+def assert_same_reads(direct, cached):
+    """Check counts, pages and statistics of both backends for every filter combination."""
+    for start_date, end_date, currency, location in FILTERS:
+        filters = dict(start_date=start_date, end_date=end_date, currency=currency, location=location)
+        count = direct.count_tips(**filters)
+        assert cached.count_tips(**filters) == count
+
+        pages = [
+            dict(),
+            dict(offset=9),
+            dict(last=True),
+            dict(last=True, last_page_size=count % 7 or None),
+            dict(last=True, offset=4)
+        ]
+        first = direct.get_tips_page(7, **filters)
+        if first:
+            second = direct.get_tips_page(7, after=keyset(first[-1]), **filters)
+            pages.append(dict(after=keyset(first[-1])))
+            if second:
+                pages.append(dict(before=keyset(second[0])))
+        for page in pages:
+            assert cached.get_tips_page(7, **page, **filters) == direct.get_tips_page(7, **page, **filters)
+
+    for start_date, end_date in ((None, None), (START + timedelta(days=12), START + timedelta(days=33))):
+        assert cached.get_summary_stats(start_date, end_date) == \
+            approx(direct.get_summary_stats(start_date, end_date))
+        for max_points in (100, 8):
+            assert cached.get_daily_totals(start_date, end_date, max_points) == \
+                approx(direct.get_daily_totals(start_date, end_date, max_points))
+
+
+def test_cached_reads_match_direct_queries(backends):
+    assert_same_reads(*backends)
+
+
+def test_writes_through_the_cache_are_read_back(backends):
+    direct, cached = backends
+    assert_same_reads(direct, cached)  # Loads the cache
+    tips = direct.get_tips_page(10)
+
+    cached.add_tip(12.5, "EUR", START + timedelta(days=3, hours=5), location="Harbour Pier")
+    cached.update_tip(tips[0]["_id"], amount=99.0, date=START - timedelta(days=2), location="Station")
+    cached.update_tips([tip["_id"] for tip in tips[1:4]], currency="GBP", location="harbour view")
+    cached.delete_tip(tips[4]["_id"])
+    cached.delete_tips([tip["_id"] for tip in tips[5:8]])
+    cached.insert_tips([{"amount": 3.0, "currency": "JPY", "date": START + timedelta(days=70),
+                         "notes": "", "location": "Station", "base_amount": 0.02}])
+
+    assert direct.count_tips() == 60 + 1 - 1 - 3 + 1
+    assert_same_reads(direct, cached)
+
+
+def test_reload_picks_up_writes_of_other_clients(backends):
+    direct, cached = backends
+    assert_same_reads(direct, cached)
+
+    direct.add_tip(8.0, "USD", START + timedelta(days=15), location="Harbour Bar")
+    direct.delete_tip(direct.get_tips_page(1, last=True)[0]["_id"])
+    cached.cache.load()
+
+    assert_same_reads(direct, cached)
@@ -0,0 +1,80 @@
+"""Tests for TipStorage.import_tips and its natural-key dedupe."""
+
+from datetime import datetime, timedelta
+
+BASE_DATE = datetime(2024, 3, 1, 18, 30, 15, 250000)
+
+
+def add_sample_tips(storage):
+    """Enter a few tips by hand over three days, two of them with the same amount."""
+    storage.add_tip(5.0, "USD", BASE_DATE, location="Downtown")
+    storage.add_tip(5.0, "USD", BASE_DATE + timedelta(minutes=1), location="Downtown")
+    storage.add_tip(12.5, "EUR", BASE_DATE + timedelta(days=1), notes="big table", location="Airport")
+    storage.add_tip(3.25, "GBP", BASE_DATE + timedelta(days=3))
+
+
+def write_csv(path, rows):
+    """Write an import file with the required columns and a location."""
+    lines = ["date,amount,currency,location"] + [",".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_reimporting_an_export_adds_nothing(storage, tmp_path):
+    add_sample_tips(storage)
+    for include_zero_days in (True, False):
+        filename = str(tmp_path / f"export_{include_zero_days}.csv")
+        assert storage.export_tips(filename, include_zero_days=include_zero_days)
+
+        result = storage.import_tips(filename)
+
+        assert result["inserted"] == 0
+        assert result["duplicates"] == 4
+        assert result["invalid"] == 0
+        assert storage.count_tips() == 4
+
+
+def test_import_skips_tips_already_imported(storage, tmp_path):
+    filename = tmp_path / "tips.csv"
+    write_csv(filename, [
+        ("2024-03-01 18:30:15", "5", "USD", "Downtown"),
+        ("2024-03-02 12:00:00", "7.5", "EUR", "Airport"),
+    ])
+    assert storage.import_tips(str(filename))["inserted"] == 2
+
+    # An overlapping file: one known tip (location case differs), one new
+    write_csv(filename, [
+        ("2024-03-02 12:00:00", "7.50", "EUR", "AIRPORT"),
+        ("2024-03-05 09:00:00", "4", "USD", ""),
+    ])
+    result = storage.import_tips(str(filename))
+
+    assert (result["inserted"], result["duplicates"]) == (1, 1)
+    assert storage.count_tips() == 3
+
+
+def test_import_dedupes_rows_within_a_file_across_chunks(storage, tmp_path):
+    filename = tmp_path / "tips.csv"
+    write_csv(filename, [("2024-03-01 18:30:15", "5", "USD", "Downtown")] * 3 +
+              [("2024-03-01 19:00:00", "6", "USD", "Downtown")])
+
+    result = storage.import_tips(str(filename), chunk_size=2)
+
+    assert (result["read"], result["inserted"], result["duplicates"]) == (4, 2, 2)
+    assert storage.count_tips() == 2
+
+
+def test_import_reports_invalid_rows(storage, tmp_path):
+    filename = tmp_path / "tips.csv"
+    write_csv(filename, [
+        ("2024-03-01 18:30:15", "5", "USD", ""),
+        ("not a date", "5", "USD", ""),
+        ("2024-03-01 18:31:00", "-1", "USD", ""),
+        ("2024-03-01 18:32:00", "2", "XXX", ""),
+    ])
+
+    result = storage.import_tips(str(filename))
+
+    assert (result["inserted"], result["invalid"]) == (1, 3)
+    assert sorted(result["errors"]) == [
+        (3, "invalid date"), (4, "amount must be greater than zero"), (5, "unknown currency")
+    ]
@@ -0,0 +1,112 @@
+"""Tests for TipJournal and the journaling of tips while MongoDB is unreachable."""
+
+from datetime import datetime
+from bson.objectid import ObjectId
+import pymongo.errors
+import pytest
+from conftest import FixedRateConverter
+from database.tip_journal import TipJournal
+
+TIP_DATE = datetime(2024, 3, 1, 18, 30)
+
+
+def journal_tip(amount):
+    """A tip as add_tip journals it."""
+    return {"_id": ObjectId(), "amount": amount, "currency": "USD", "date": TIP_DATE,
+            "notes": "", "location": "", "base_amount": amount}
+
+
+@pytest.fixture
+def tip_operations(mongo_manager):
+    """MongoDB tip operations on mongomock."""
+    currency_converter = FixedRateConverter(mongo_manager, base_currency="USD", refresh_rates=False)
+    return mongo_manager.create_tip_operations(currency_converter)
+
+
+def add_offline_tip(tip_operations, monkeypatch, amount=10.0, currency="EUR"):
+    """Add a tip while inserts fail as if the server were unreachable."""
+    def unreachable(*args, **kwargs):
+        raise pymongo.errors.ServerSelectionTimeoutError("server unreachable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(tip_operations.tips_collection, "insert_one", unreachable)
+        return tip_operations.add_tip(amount, currency, TIP_DATE, notes="offline", location="Harbour")
+
+
+def test_offline_tip_is_journaled_and_flushed(tip_operations, monkeypatch):
+    tip_id = add_offline_tip(tip_operations, monkeypatch)
+
+    assert len(tip_operations.journal) == 1
+    assert tip_operations.get_tip(tip_id)["amount"] == 10.0
+    assert tip_operations.tips_collection.count_documents({}) == 0
+
+    assert tip_operations.flush_journal() == 1
+    assert len(tip_operations.journal) == 0
+    assert tip_operations.tips_collection.find_one({"_id": tip_id})["location_key"] == "harbour"
+
+
+def test_editing_a_journaled_tip_edits_the_journal(tip_operations, monkeypatch):
+    tip_id = add_offline_tip(tip_operations, monkeypatch)
+
+    assert tip_operations.update_tip(tip_id, amount=18.0, notes="edited") == 1
+    assert tip_operations.update_tips([tip_id], currency="GBP") == 1
+
+    pending = tip_operations.get_tip(tip_id)
+    assert (pending["amount"], pending["currency"], pending["notes"]) == (18.0, "GBP", "edited")
+    assert pending["base_amount"] == pytest.approx(18.0 / 0.8)
+    # The edit survives a restart
+    assert TipJournal(tip_operations.journal.path).get(tip_id)["amount"] == 18.0
+
+    tip_operations.flush_journal()
+    stored = tip_operations.tips_collection.find_one({"_id": tip_id})
+    assert (stored["amount"], stored["currency"], stored["notes"]) == (18.0, "GBP", "edited")
+
+
+def test_deleting_a_journaled_tip_keeps_it_from_being_written(tip_operations, monkeypatch):
+    written_id = tip_operations.add_tip(5.0, "USD", TIP_DATE)
+    journaled_id = add_offline_tip(tip_operations, monkeypatch)
+    other_id = add_offline_tip(tip_operations, monkeypatch, amount=7.0)
+
+    assert tip_operations.delete_tips([written_id, journaled_id]) == 2
+    assert tip_operations.delete_tip(other_id) == 1
+    assert len(tip_operations.journal) == 0
+    assert len(TipJournal(tip_operations.journal.path)) == 0
+
+    assert tip_operations.flush_journal() == 0
+    assert tip_operations.tips_collection.count_documents({}) == 0
+
+
+def test_replay_keeps_the_failed_batch_and_later_tips(tmp_path):
+    journal = TipJournal(str(tmp_path / "journal.jsonl"))
+    tips = [journal_tip(amount) for amount in range(1, 6)]
+    for tip in tips:
+        journal.append(tip)
+
+    written = []
+
+    def insert(batch):
+        if written:
+            raise pymongo.errors.ServerSelectionTimeoutError("server unreachable")
+        written.extend(batch)
+
+    with pytest.raises(pymongo.errors.ServerSelectionTimeoutError):
+        journal.replay(insert, batch_size=2)
+
+    assert [tip["_id"] for tip in written] == [tip["_id"] for tip in tips[:2]]
+    assert len(journal) == 3
+    # Only the unwritten tips are loaded after a restart, still in journal order
+    reopened = TipJournal(journal.path)
+    assert reopened.replay(written.extend, batch_size=2) == 3
+    assert [tip["_id"] for tip in written] == [tip["_id"] for tip in tips]
+    assert len(reopened) == 0
+
+
+def test_unreadable_journal_lines_are_skipped(tmp_path):
+    journal = TipJournal(str(tmp_path / "journal.jsonl"))
+    tip = journal_tip(3.0)
+    journal.append(tip)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"_id": "cut short')
+
+    assert TipJournal(journal.path).get(tip["_id"]) == tip
+    assert len(TipJournal(journal.path)) == 1
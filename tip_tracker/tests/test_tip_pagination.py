@@ -0,0 +1,74 @@
+"""Tests for get_tips_page keyset and offset pagination on both backends."""
+
+from datetime import datetime, timedelta
+import pytest
+
+PAGE_SIZE = 4
+
+
+@pytest.fixture
+def paged_storage(storage):
+    """Storage with 11 tips; three share a date, so pages split on the _id tiebreak."""
+    start = datetime(2024, 1, 1, 19)
+    dates = [start + timedelta(days=day) for day in range(8)] + [start + timedelta(days=3)] * 3
+    for number, date in enumerate(dates):
+        storage.add_tip(1.0 + number, "EUR" if number % 2 else "USD", date)
+    return storage
+
+
+def keyset(tip):
+    """The (date, _id) boundary of a tip."""
+    return tip["date"], tip["_id"]
+
+
+def walk_forward(storage, **filters):
+    """Collect all pages from the newest one, following `after`."""
+    pages = [storage.get_tips_page(PAGE_SIZE, **filters)]
+    while len(pages[-1]) == PAGE_SIZE:
+        page = storage.get_tips_page(PAGE_SIZE, after=keyset(pages[-1][-1]), **filters)
+        if not page:
+            break
+        pages.append(page)
+    return pages
+
+
+def test_next_pages_cover_every_tip_once_newest_first(paged_storage):
+    pages = walk_forward(paged_storage)
+    tips = [tip for page in pages for tip in page]
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert len({tip["_id"] for tip in tips}) == 11
+    assert [keyset(tip)[0] for tip in tips] == sorted((keyset(tip)[0] for tip in tips), reverse=True)
+
+
+def test_previous_pages_mirror_next_pages(paged_storage):
+    pages = walk_forward(paged_storage)
+
+    for newer, older in zip(pages, pages[1:]):
+        assert paged_storage.get_tips_page(PAGE_SIZE, before=keyset(older[0])) == newer
+
+
+def test_last_page_holds_the_oldest_tips(paged_storage):
+    pages = walk_forward(paged_storage)
+    count = paged_storage.count_tips()
+
+    assert paged_storage.get_tips_page(PAGE_SIZE, last=True, last_page_size=count % PAGE_SIZE) == pages[-1]
+    assert paged_storage.get_tips_page(PAGE_SIZE, last=True) == [tip for page in pages for tip in page][-PAGE_SIZE:]
+
+
+def test_offsets_match_keyset_pages(paged_storage):
+    pages = walk_forward(paged_storage)
+    tips = [tip for page in pages for tip in page]
+
+    assert paged_storage.get_tips_page(PAGE_SIZE, offset=PAGE_SIZE) == pages[1]
+    # From the oldest end: skip the last page to land on the one before it
+    assert paged_storage.get_tips_page(PAGE_SIZE, last=True, offset=3) == pages[1]
+    assert paged_storage.get_tips_page(PAGE_SIZE, offset=9) == tips[9:]
+
+
+def test_pages_apply_filters(paged_storage):
+    pages = walk_forward(paged_storage, currency="EUR")
+    tips = [tip for page in pages for tip in page]
+
+    assert len(tips) == paged_storage.count_tips(currency="EUR") == 5
+    assert {tip["currency"] for tip in tips} == {"EUR"}
@@ -0,0 +1,70 @@
+"""Prefix completion over fixed value lists, such as the currency comboboxes."""
+
+from bisect import bisect_left
+from functools import lru_cache
+
+
+class CompletionIndex:
+    """Case-insensitive prefix index over a list of values.
+
+    Values are sorted once, so the matches for a prefix are a contiguous
+    range found with two binary searches.
+    """
+
+    def __init__(self, values):
+        """Build the index; `values` keeps its order for the positions returned."""
+        self.values = list(values)
+        entries = sorted((str(value).upper(), position) for position, value in enumerate(self.values))
+        self._keys = [key for key, _ in entries]
+        self._positions = [position for _, position in entries]
+
+    def __len__(self):
+        return len(self.values)
+
+    def _range(self, prefix):
+        """Get the (start, end) range of sorted keys starting with prefix."""
+        prefix = prefix.upper()
+        start = bisect_left(self._keys, prefix)
+        # Every key with the prefix sorts before prefix + the highest code point
+        end = bisect_left(self._keys, prefix + "\U0010ffff", start)
+        return start, end
+
+    def count(self, prefix):
+        """Count the values starting with prefix."""
+        start, end = self._range(prefix)
+        return end - start
+
+    def match(self, prefix, rank=0):
+        """
+        Get the position in `values` of a value starting with prefix.
+
+        Matches are ranked alphabetically, so an exact match comes first.
+
+        Args:
+            prefix: Typed text, matched case-insensitively
+            rank: Which match to return; wraps around the number of matches
+
+        Returns:
+            int: Position of the match in values, or None if nothing matches
+        """
+        start, end = self._range(prefix)
+        if start == end:
+            return None
+        return self._positions[start + rank % (end - start)]
+
+    def matches(self, prefix, limit=None):
+        """Get the values starting with prefix, ranked like match()."""
+        start, end = self._range(prefix)
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self.values[position] for position in self._positions[start:end]]
+
+
+@lru_cache(maxsize=16)
+def _shared_index(values):
+    return CompletionIndex(values)
+
+
+def completion_index(values):
+    """Get the CompletionIndex for a value list, shared by every widget with the same values."""
+    return _shared_index(tuple(values))
\ No newline at end of file
@@ -1,13 +1,68 @@
 """Currency conversion utilities."""
 
-from datetime import datetime
-import requests
-from config import EXCHANGE_RATE_API_URL, DEFAULT_BASE_CURRENCY
+from bisect import bisect_right
+from datetime import datetime, timedelta
+import threading
+import numpy as np
+from config import (EXCHANGE_RATE_API_URL, EXCHANGE_RATE_TTL_HOURS, EXCHANGE_RATE_TIMEOUT,
+                    DEFAULT_BASE_CURRENCY)
+
+
+class UnknownCurrencyError(ValueError):
+    """Raised when converting from or to a currency without a known rate."""
+
+
+class RateHistory:
+    """Date-indexed exchange rates with O(log n) lookup by day.
+    
+    Days are kept as sorted proleptic ordinals next to a parallel list of
+    rate dicts; a lookup returns the most recent rates on or before the day.
+    """
+    
+    def __init__(self):
+        self.days = []
+        self.rates = []
+    
+    def __len__(self):
+        return len(self.days)
+    
+    def add(self, day, rates):
+        """Insert or replace the rates for a day."""
+        ordinal = day.toordinal()
+        index = bisect_right(self.days, ordinal)
+        if index and self.days[index - 1] == ordinal:
+            self.rates[index - 1] = rates
+        else:
+            self.days.insert(index, ordinal)
+            self.rates.insert(index, rates)
+    
+    def rates_on(self, day):
+        """Get the rates in effect on a day (earliest known rates for older days)."""
+        if not self.days:
+            return None
+        index = bisect_right(self.days, day.toordinal())
+        return self.rates[max(index - 1, 0)]
+    
+    def periods(self):
+        """
+        Yield (start, end, rates) for each stored day.
+        
+        start is None for the first period and end is None for the last, so
+        the periods cover all dates the same way rates_on does.
+        """
+        for i, rates in enumerate(self.rates):
+            start = datetime.fromordinal(self.days[i]) if i else None
+            end = datetime.fromordinal(self.days[i + 1]) if i + 1 < len(self.days) else None
+            yield start, end, rates
 
 
 class CurrencyConverter:
-    def __init__(self, db_manager, base_currency=None):
-        """Initialize currency converter with database and base currency."""
+    def __init__(self, db_manager, base_currency=None, refresh_rates=True):
+        """Initialize currency converter with database and base currency.
+        
+        With refresh_rates disabled, stale stored rates are not refreshed
+        in the background (for short-lived command line runs).
+        """
         self.db_manager = db_manager
         self.currencies_collection = db_manager.get_currencies_collection()
         self.settings_collection = db_manager.get_settings_collection()
@@ -15,57 +70,318 @@ class CurrencyConverter:
         # Load or set base currency
         self.base_currency = base_currency or self._load_base_currency()
         
-        # Initialize exchange rates
+        # Initialize exchange rates from the stored copy, refresh in the background if stale.
+        # Assigning exchange_rates rebuilds the cross-rate matrix.
+        self._rates_state = ({}, np.ones((0, 0)))
         self.exchange_rates = {}
-        self.update_exchange_rates()
+        self.rates_updated = None
+        self._rates_listeners = []
+        self._refresh_lock = threading.Lock()
+        self.rate_history = None  # Loaded on first date-specific conversion
+        self._load_stored_rates()
+        
+        if refresh_rates and not self.rates_are_fresh():
+            self.refresh_exchange_rates_async()
+    
+    @property
+    def exchange_rates(self):
+        """USD-based exchange rates."""
+        return self._exchange_rates
+    
+    @exchange_rates.setter
+    def exchange_rates(self, rates):
+        self._exchange_rates = rates
+        self._build_rate_matrix(rates)
+    
+    @property
+    def currency_index(self):
+        """Row/column of each currency code in rate_matrix."""
+        return self._rates_state[0]
+    
+    @property
+    def rate_matrix(self):
+        """Cross-rate matrix matching currency_index."""
+        return self._rates_state[1]
+    
+    def _build_rate_matrix(self, rates):
+        """
+        Build the dense cross-rate matrix for the given USD-based rates.
+        
+        rate_matrix[i, j] converts one unit of currency i into currency j,
+        with i and j taken from currency_index. The index and matrix are
+        published in one assignment, because the background rate refresh
+        rebuilds them while the GUI thread converts; readers take
+        `_rates_state` once and so always see a matching pair.
+        """
+        codes = list(rates.keys())
+        usd_rates = np.array([rates[code] for code in codes], dtype=np.float64)
+        
+        currency_index = {code: i for i, code in enumerate(codes)}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate_matrix = usd_rates[np.newaxis, :] / usd_rates[:, np.newaxis]
+        self._rates_state = (currency_index, rate_matrix)
     
     def _load_base_currency(self):
         """Load base currency from settings or use default."""
-        settings = self.settings_collection.find_one({"_id": "app_settings"})
+        try:
+            settings = self.settings_collection.find_one({"_id": "app_settings"})
+        except Exception as e:
+            print(f"Failed to load base currency: {e}")
+            settings = None
         if settings and 'base_currency' in settings:
             return settings['base_currency']
         return DEFAULT_BASE_CURRENCY
     
+    def _load_stored_rates(self):
+        """Load the exchange rates persisted by the last successful update."""
+        try:
+            stored_rates = self.currencies_collection.find_one({"_id": "exchange_rates"})
+        except Exception as e:
+            # Database unreachable; rates are fetched from the API instead
+            print(f"Failed to load stored exchange rates: {e}")
+            return
+        if stored_rates:
+            self.exchange_rates = stored_rates['rates']
+            self.rates_updated = stored_rates.get('updated')
+    
+    def rates_are_fresh(self, ttl=timedelta(hours=EXCHANGE_RATE_TTL_HOURS)):
+        """Check whether the loaded rates are younger than the TTL."""
+        if not self.exchange_rates or not self.rates_updated:
+            return False
+        return datetime.now() - self.rates_updated < ttl
+    
+    def add_rates_listener(self, callback):
+        """
+        Register a callback invoked after new rates are loaded.
+        
+        Callbacks run on the thread that fetched the rates, which must not
+        call Tk, so GUI code should only set a flag that the main loop polls.
+        """
+        self._rates_listeners.append(callback)
+    
+    def refresh_exchange_rates_async(self):
+        """Update exchange rates in a background thread unless a refresh is already running."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        
+        def worker():
+            try:
+                self.update_exchange_rates()
+            finally:
+                self._refresh_lock.release()
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
     def update_exchange_rates(self):
-        """Update currency exchange rates from API."""
+        """
+        Update currency exchange rates from API.
+        
+        Returns:
+            bool: True if new rates were fetched, False otherwise
+        """
+        # requests is slow to import and only needed when rates are stale
+        import requests
+        
         try:
-            response = requests.get(EXCHANGE_RATE_API_URL)
-            if response.status_code == 200:
-                self.exchange_rates = response.json()['rates']
-                # Store in database for offline use
-                self.currencies_collection.replace_one(
-                    {"_id": "exchange_rates"}, 
-                    {"_id": "exchange_rates", "rates": self.exchange_rates, "updated": datetime.now()},
-                    upsert=True
-                )
+            response = requests.get(EXCHANGE_RATE_API_URL, timeout=EXCHANGE_RATE_TIMEOUT)
+            if response.status_code != 200:
+                return False
+            
+            rates = response.json()['rates']
+            updated = datetime.now()
         except Exception as e:
             print(f"Failed to update exchange rates: {e}")
             # Try to load from database as fallback
-            stored_rates = self.currencies_collection.find_one({"_id": "exchange_rates"})
-            if stored_rates:
-                self.exchange_rates = stored_rates['rates']
+            if not self.exchange_rates:
+                self._load_stored_rates()
+            return False
+        
+        try:
+            # Store in database for offline use
+            self.currencies_collection.replace_one(
+                {"_id": "exchange_rates"}, 
+                {"_id": "exchange_rates", "rates": rates, "updated": updated},
+                upsert=True
+            )
+            self.record_daily_rates(updated, rates)
+        except Exception as e:
+            # The database may be unreachable; the new rates are still used
+            print(f"Failed to store exchange rates: {e}")
+        
+        self.exchange_rates = rates
+        self.rates_updated = updated
+        for callback in list(self._rates_listeners):
+            callback()
+        return True
+    
+    def _load_rate_history(self):
+        """Load the daily rate documents into an in-memory RateHistory."""
+        history = RateHistory()
+        for doc in self.currencies_collection.find({"type": "daily_rates"}).sort("date", 1):
+            history.add(doc['date'], doc['rates'])
+        self.rate_history = history
+    
+    def get_rate_history(self):
+        """Get the rate history, loading it on first use."""
+        if self.rate_history is None:
+            try:
+                self._load_rate_history()
+            except Exception as e:
+                # Try again next time; until then conversions use the current rates
+                print(f"Failed to load rate history: {e}")
+                return RateHistory()
+        return self.rate_history
+    
+    def record_daily_rates(self, day, rates):
+        """Store the rates for a day in the history (one document per day)."""
+        day = datetime.combine(day.date(), datetime.min.time())
+        self.currencies_collection.replace_one(
+            {"_id": f"rates_{day:%Y-%m-%d}"},
+            {"_id": f"rates_{day:%Y-%m-%d}", "type": "daily_rates", "date": day, "rates": rates},
+            upsert=True
+        )
+        if self.rate_history is not None:
+            self.rate_history.add(day, rates)
+    
+    def rates_on(self, on_date=None):
+        """Get the rates for a date, falling back to the current rates."""
+        if on_date is not None:
+            rates = self.get_rate_history().rates_on(on_date)
+            if rates:
+                return rates
+        return self.exchange_rates
     
-    def convert(self, amount, from_currency, to_currency):
-        """Convert amount between currencies."""
+    @staticmethod
+    def _convert_with_rates(amount, from_currency, to_currency, rates):
+        """Convert amount using a dict of USD-based rates."""
         if from_currency == to_currency:
             return amount
             
-        if not self.exchange_rates:
+        if not rates:
             return None  # Cannot convert without rates
-            
+        
+        for code in (from_currency, to_currency):
+            if code not in rates:
+                raise UnknownCurrencyError(f"No exchange rate for {code}")
+        
         # Convert through USD as base
-        if from_currency == "USD":
-            return amount * self.exchange_rates.get(to_currency, 1.0)
-        elif to_currency == "USD":
-            return amount / self.exchange_rates.get(from_currency, 1.0)
-        else:
-            # Convert to USD first, then to target currency
-            usd_amount = amount / self.exchange_rates.get(from_currency, 1.0)
-            return usd_amount * self.exchange_rates.get(to_currency, 1.0)
+        return amount / rates[from_currency] * rates[to_currency]
     
-    def convert_to_base(self, amount, currency):
+    def convert(self, amount, from_currency, to_currency, on_date=None):
+        """Convert amount between currencies, using the rates of `on_date` if given."""
+        if on_date is not None and self.get_rate_history():
+            return self._convert_with_rates(amount, from_currency, to_currency, self.rates_on(on_date))
+        
+        if from_currency == to_currency:
+            return amount
+        
+        currency_index, rate_matrix = self._rates_state
+        if not currency_index:
+            return None  # Cannot convert without rates
+        
+        try:
+            return amount * float(rate_matrix[currency_index[from_currency], currency_index[to_currency]])
+        except KeyError as e:
+            raise UnknownCurrencyError(f"No exchange rate for {e.args[0]}")
+    
+    def convert_batch(self, amounts, currencies, to_currency=None, strict=True):
+        """
+        Convert arrays of amounts in the given currencies with one vectorized lookup.
+        
+        Args:
+            amounts: Sequence of amounts
+            currencies: Sequence of currency codes, one per amount
+            to_currency: Target currency, defaults to the base currency
+            strict: If True, raise UnknownCurrencyError for unknown currencies;
+                otherwise their results are NaN
+            
+        Returns:
+            numpy.ndarray: Converted amounts as float64
+        """
+        to_currency = to_currency or self.base_currency
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if amounts.size == 0:
+            return amounts
+        
+        # Resolve each distinct currency once, then broadcast back
+        codes, inverse = np.unique(np.asarray(currencies, dtype=object), return_inverse=True)
+        currency_index, rate_matrix = self._rates_state
+        from_index = np.array([currency_index.get(code, -1) for code in codes])
+        to_index = currency_index.get(to_currency, -1)
+        
+        unknown = from_index < 0
+        if to_index < 0:
+            unknown[:] = codes != to_currency
+        if strict and unknown.any():
+            missing = [str(code) for code in codes[unknown]]
+            raise UnknownCurrencyError(f"No exchange rate for {', '.join(missing)} to {to_currency}")
+        
+        factors = np.full(len(codes), np.nan)
+        if to_index >= 0:
+            known = ~unknown
+            factors[known] = rate_matrix[from_index[known], to_index]
+        factors[codes == to_currency] = 1.0
+        
+        return amounts * factors[inverse]
+    
+    def convert_batch_to_base(self, amounts, currencies, dates):
+        """
+        Convert arrays of amounts to the base currency at the rates of their dates.
+        
+        Each currency's rate periods are matched to the dates with one
+        searchsorted call, so the cost does not grow with a per-row lookup.
+        
+        Args:
+            amounts: Sequence of amounts
+            currencies: Sequence of currency codes, one per amount
+            dates: Sequence of datetimes, one per amount
+            
+        Returns:
+            numpy.ndarray: Base amounts as float64, NaN where a currency has no rate
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        currencies = np.asarray(currencies, dtype=object)
+        dates = np.asarray(dates, dtype="datetime64[us]")
+        result = np.full(amounts.shape, np.nan)
+        
+        for code in set(currencies.tolist()):
+            mask = currencies == code
+            periods = self.base_factor_periods(code)
+            # Start of every period after the first; dates before the first boundary use period 0
+            boundaries = np.array([start for start, _, _ in periods[1:]], dtype="datetime64[us]")
+            factors = np.array([np.nan if factor is None else factor for _, _, factor in periods])
+            result[mask] = amounts[mask] * factors[np.searchsorted(boundaries, dates[mask], side="right")]
+        return result
+    
+    def convert_to_base(self, amount, currency, on_date=None):
         """Convert amount to base currency."""
-        return self.convert(amount, currency, self.base_currency)
+        return self.convert(amount, currency, self.base_currency, on_date)
+    
+    def base_factor_periods(self, currency):
+        """
+        Get (start, end, factor) periods for converting `currency` to the base currency.
+        
+        Consecutive days with the same factor are merged, so bulk rebasing
+        needs one update per rate change rather than one per day or per tip.
+        """
+        history = self.get_rate_history()
+        if not history:
+            try:
+                return [(None, None, self.convert_to_base(1.0, currency))]
+            except UnknownCurrencyError:
+                return [(None, None, None)]
+        
+        periods = []
+        for start, end, rates in history.periods():
+            try:
+                factor = self._convert_with_rates(1.0, currency, self.base_currency, rates)
+            except UnknownCurrencyError:
+                factor = None  # Flags the tips with a null base amount
+            if periods and periods[-1][2] == factor:
+                periods[-1] = (periods[-1][0], end, factor)
+            else:
+                periods.append((start, end, factor))
+        return periods
     
     def get_base_currency(self):
         """Get the current base currency."""
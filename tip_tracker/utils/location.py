@@ -0,0 +1,8 @@
+"""Location normalization utilities."""
+
+
+def location_key(location):
+    """Normalize a location for indexed, case-insensitive prefix matching; non-strings get an empty key."""
+    if not isinstance(location, str):
+        return ""
+    return location.strip().lower()